@@ -85,6 +85,9 @@ class Account(NestedSet):
 	nsm_parent_field = "parent_account"
 
 	def on_update(self):
+		from erpnext.accounts.utils import invalidate_gl_cache
+
+		invalidate_gl_cache([self.company])
 		if frappe.local.flags.ignore_update_nsm:
 			return
 		else:
@@ -416,6 +419,10 @@ class Account(NestedSet):
 
 		super().on_trash(True)
 
+		from erpnext.accounts.utils import invalidate_gl_cache
+
+		invalidate_gl_cache([self.company])
+
 
 @frappe.whitelist()
 @frappe.validate_and_sanitize_search_inputs
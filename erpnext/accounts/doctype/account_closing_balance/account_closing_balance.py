@@ -3,12 +3,16 @@
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import cint, cstr
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Max, Min, Sum
+from frappe.utils import add_months, cint, cstr, flt, get_last_day, getdate, now, today
 
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
 
+AMOUNT_FIELDS = ["debit", "credit", "debit_in_account_currency", "credit_in_account_currency"]
+
 
 class AccountClosingBalance(Document):
 	# begin: auto-generated types
@@ -37,6 +41,10 @@ class AccountClosingBalance(Document):
 	pass
 
 
+def on_doctype_update():
+	frappe.db.add_index("Account Closing Balance", ["company", "closing_date"])
+
+
 def make_closing_entries(closing_entries, voucher_name, company, closing_date):
 	accounting_dimensions = get_accounting_dimensions()
 
@@ -144,3 +152,244 @@ def get_previous_closing_entries(company, closing_date, accounting_dimensions):
 		entries = query.run(as_dict=1)
 
 	return entries
+
+
+def is_closing_balance_snapshot_enabled():
+	if not cint(
+		frappe.db.get_single_value("Accounts Settings", "enable_closing_balance_snapshots", cache=True)
+	):
+		return False
+
+	return not cint(
+		frappe.db.get_single_value("Accounts Settings", "ignore_account_closing_balance", cache=True)
+	)
+
+
+def get_last_snapshot_date(company, date):
+	"""Closing date of the latest snapshot on or before `date`. Snapshots are Account Closing
+	Balances made at the end of every month without a Period Closing Voucher, balance sheet
+	accounts are cumulative and profit and loss accounts are totals of the fiscal year till date"""
+
+	if not is_closing_balance_snapshot_enabled():
+		return None
+
+	acb = frappe.qb.DocType("Account Closing Balance")
+	return (
+		frappe.qb.from_(acb)
+		.select(Max(acb.closing_date))
+		.where(
+			(acb.company == company)
+			& (acb.closing_date <= date)
+			& (acb.period_closing_voucher.isnull() | (acb.period_closing_voucher == ""))
+		)
+	).run()[0][0]
+
+
+def invalidate_closing_balance_snapshots(gl_entries):
+	"""Snapshots on or after the earliest posting date of `gl_entries` no longer match the ledger"""
+
+	if not gl_entries or not is_closing_balance_snapshot_enabled():
+		return
+
+	# snapshots are only made till the end of the last month
+	last_snapshot_date = get_last_day(add_months(today(), -1))
+
+	earliest_posting_dates = {}
+	for entry in gl_entries:
+		posting_date = getdate(entry.get("posting_date"))
+		company = entry.get("company")
+		if posting_date <= last_snapshot_date and posting_date < earliest_posting_dates.get(
+			company, posting_date + 1
+		):
+			earliest_posting_dates[company] = posting_date
+
+	for company, posting_date in earliest_posting_dates.items():
+		frappe.db.delete(
+			"Account Closing Balance",
+			{
+				"company": company,
+				"closing_date": (">=", posting_date),
+				"period_closing_voucher": ("is", "not set"),
+			},
+		)
+
+
+def invalidate_closing_balance_snapshots_of_voucher(voucher_type, voucher_no):
+	if not is_closing_balance_snapshot_enabled():
+		return
+
+	gl_entries = frappe.get_all(
+		"GL Entry",
+		filters={"voucher_type": voucher_type, "voucher_no": voucher_no, "is_cancelled": 0},
+		fields=["company", "posting_date"],
+		distinct=True,
+	)
+	invalidate_closing_balance_snapshots(gl_entries)
+
+
+def make_closing_balance_snapshots():
+	if is_closing_balance_snapshot_enabled():
+		build_closing_balance_snapshots()
+
+
+def build_closing_balance_snapshots(company=None):
+	"""Make the missing month end snapshots of `company` (all companies if not set) till the end
+	of the last month, each from the previous one and the GL Entries of the month"""
+
+	from erpnext.accounts.utils import get_fiscal_years
+
+	companies = [company] if company else frappe.get_all("Company", pluck="name")
+	accounting_dimensions = get_accounting_dimensions()
+	last_snapshot_date = get_last_day(add_months(today(), -1))
+
+	for company in companies:
+		previous_snapshot_date = get_last_snapshot_date(company, last_snapshot_date)
+		if previous_snapshot_date:
+			snapshot_date = get_last_day(add_months(previous_snapshot_date, 1))
+		else:
+			gle = frappe.qb.DocType("GL Entry")
+			first_posting_date = (
+				frappe.qb.from_(gle)
+				.select(Min(gle.posting_date))
+				.where((gle.company == company) & (gle.is_cancelled == 0))
+			).run()[0][0]
+			if not first_posting_date:
+				continue
+
+			snapshot_date = get_last_day(first_posting_date)
+
+		while snapshot_date <= last_snapshot_date:
+			fiscal_years = get_fiscal_years(snapshot_date, company=company, as_dict=True, boolean=True)
+			year_start_date = getdate(fiscal_years[0].year_start_date) if fiscal_years else None
+
+			entries = get_snapshot_entries(
+				company, previous_snapshot_date, snapshot_date, year_start_date, accounting_dimensions
+			)
+			insert_snapshot(company, snapshot_date, entries, accounting_dimensions)
+			previous_snapshot_date = snapshot_date
+			snapshot_date = get_last_day(add_months(snapshot_date, 1))
+
+
+def get_snapshot_entries(
+	company, previous_snapshot_date, snapshot_date, year_start_date, accounting_dimensions
+):
+	acb = frappe.qb.DocType("Account Closing Balance")
+	gle = frappe.qb.DocType("GL Entry")
+	account = frappe.qb.DocType("Account")
+
+	entries = []
+	if previous_snapshot_date:
+		query = (
+			frappe.qb.from_(acb)
+			.inner_join(account)
+			.on(acb.account == account.name)
+			.select(
+				acb.company,
+				acb.account,
+				acb.account_currency,
+				acb.cost_center,
+				acb.project,
+				acb.finance_book,
+				acb.is_period_closing_voucher_entry,
+				acb.debit,
+				acb.credit,
+				acb.debit_in_account_currency,
+				acb.credit_in_account_currency,
+				*[acb[dimension] for dimension in accounting_dimensions],
+			)
+			.where(
+				(acb.company == company)
+				& (acb.closing_date == previous_snapshot_date)
+				& (acb.period_closing_voucher.isnull() | (acb.period_closing_voucher == ""))
+			)
+		)
+		# profit and loss starts afresh with every fiscal year
+		if not year_start_date or getdate(previous_snapshot_date) < year_start_date:
+			query = query.where(account.report_type == "Balance Sheet")
+
+		entries = query.run(as_dict=True)
+
+	group_by = [
+		gle.company,
+		gle.account,
+		gle.account_currency,
+		gle.cost_center,
+		gle.project,
+		gle.finance_book,
+		*[gle[dimension] for dimension in accounting_dimensions],
+	]
+	is_period_closing_voucher_entry = Case().when(gle.voucher_type == "Period Closing Voucher", 1).else_(0)
+
+	query = (
+		frappe.qb.from_(gle)
+		.inner_join(account)
+		.on(gle.account == account.name)
+		.select(
+			*group_by,
+			is_period_closing_voucher_entry.as_("is_period_closing_voucher_entry"),
+			Sum(gle.debit).as_("debit"),
+			Sum(gle.credit).as_("credit"),
+			Sum(gle.debit_in_account_currency).as_("debit_in_account_currency"),
+			Sum(gle.credit_in_account_currency).as_("credit_in_account_currency"),
+		)
+		.where((gle.company == company) & (gle.is_cancelled == 0) & (gle.posting_date <= snapshot_date))
+		.groupby(*group_by, is_period_closing_voucher_entry)
+	)
+
+	if previous_snapshot_date:
+		query = query.where(gle.posting_date > previous_snapshot_date)
+
+	if not year_start_date:
+		query = query.where(account.report_type == "Balance Sheet")
+	elif not previous_snapshot_date or getdate(previous_snapshot_date) < year_start_date:
+		query = query.where((account.report_type == "Balance Sheet") | (gle.posting_date >= year_start_date))
+
+	return entries + query.run(as_dict=True)
+
+
+def insert_snapshot(company, closing_date, entries, accounting_dimensions):
+	merged_entries = aggregate_with_last_account_closing_balance(entries, accounting_dimensions)
+
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"docstatus",
+		"closing_date",
+		"company",
+		"account",
+		"account_currency",
+		"cost_center",
+		"project",
+		"finance_book",
+		"is_period_closing_voucher_entry",
+		*AMOUNT_FIELDS,
+		*accounting_dimensions,
+	]
+
+	values = []
+	user = frappe.session.user
+	timestamp = now()
+	for value in merged_entries.values():
+		if not any(flt(value[d]) for d in AMOUNT_FIELDS):
+			continue
+
+		row = {**value["dimensions"], **value}
+		row.update(
+			{
+				"name": frappe.generate_hash(length=10),
+				"creation": timestamp,
+				"modified": timestamp,
+				"owner": user,
+				"modified_by": user,
+				"docstatus": 1,
+				"closing_date": closing_date,
+				"company": company,
+			}
+		)
+		values.append(tuple(row.get(fieldname) for fieldname in fields))
+
+	if values:
+		frappe.db.bulk_insert("Account Closing Balance", fields=fields, values=values)
@@ -10,6 +10,12 @@ from frappe.custom.doctype.property_setter.property_setter import make_property_
 from frappe.model.document import Document
 from frappe.utils import cint
 
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	set_daily_account_balance_built,
+)
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	set_payment_ledger_outstanding_built,
+)
 from erpnext.stock.utils import check_pending_reposting
 
 
@@ -37,6 +43,7 @@ class AccountsSettings(Document):
 		credit_controller: DF.Link | None
 		delete_linked_ledger_entries: DF.Check
 		determine_address_tax_category_from: DF.Literal["Billing Address", "Shipping Address"]
+		enable_closing_balance_snapshots: DF.Check
 		enable_common_party_accounting: DF.Check
 		enable_fuzzy_matching: DF.Check
 		enable_immutable_ledger: DF.Check
@@ -59,6 +66,8 @@ class AccountsSettings(Document):
 		submit_journal_entries: DF.Check
 		unlink_advance_payment_on_cancelation_of_order: DF.Check
 		unlink_payment_on_cancellation_of_invoice: DF.Check
+		use_daily_account_balances: DF.Check
+		use_payment_ledger_outstanding: DF.Check
 	# end: auto-generated types
 
 	def validate(self):
@@ -85,6 +94,15 @@ class AccountsSettings(Document):
 		if old_doc.acc_frozen_upto != self.acc_frozen_upto:
 			self.validate_pending_reposts()
 
+		if old_doc.use_daily_account_balances != self.use_daily_account_balances:
+			self.toggle_daily_account_balances()
+
+		if old_doc.enable_closing_balance_snapshots != self.enable_closing_balance_snapshots:
+			self.toggle_closing_balance_snapshots()
+
+		if old_doc.use_payment_ledger_outstanding != self.use_payment_ledger_outstanding:
+			self.toggle_payment_ledger_outstanding()
+
 		if clear_cache:
 			frappe.clear_cache()
 
@@ -109,6 +127,46 @@ class AccountsSettings(Document):
 				validate_fields_for_doctype=False,
 			)
 
+	def toggle_daily_account_balances(self):
+		# reports fall back to GL Entries until the rebuild has completed
+		set_daily_account_balance_built(0)
+		if self.use_daily_account_balances:
+			frappe.enqueue(
+				"erpnext.accounts.doctype.daily_account_balance.daily_account_balance.rebuild_daily_account_balances",
+				queue="long",
+				timeout=7200,
+				now=frappe.flags.in_test,
+				enqueue_after_commit=True,
+			)
+		else:
+			frappe.db.delete("Daily Account Balance")
+
+	def toggle_closing_balance_snapshots(self):
+		if self.enable_closing_balance_snapshots:
+			frappe.enqueue(
+				"erpnext.accounts.doctype.account_closing_balance.account_closing_balance.build_closing_balance_snapshots",
+				queue="long",
+				timeout=7200,
+				now=frappe.flags.in_test,
+				enqueue_after_commit=True,
+			)
+		else:
+			frappe.db.delete("Account Closing Balance", {"period_closing_voucher": ("is", "not set")})
+
+	def toggle_payment_ledger_outstanding(self):
+		# reads fall back to Payment Ledger Entries until the rebuild has completed
+		set_payment_ledger_outstanding_built(0)
+		if self.use_payment_ledger_outstanding:
+			frappe.enqueue(
+				"erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding.rebuild_payment_ledger_outstanding",
+				queue="long",
+				timeout=7200,
+				now=frappe.flags.in_test,
+				enqueue_after_commit=True,
+			)
+		else:
+			frappe.db.delete("Payment Ledger Outstanding")
+
 	def validate_pending_reposts(self):
 		if self.acc_frozen_upto:
 			check_pending_reposting(self.acc_frozen_upto)
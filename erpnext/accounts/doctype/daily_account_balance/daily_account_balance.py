@@ -0,0 +1,239 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder.functions import Sum
+from frappe.utils import cint, create_batch, cstr, flt, getdate, now
+
+from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
+	get_accounting_dimensions,
+)
+
+AMOUNT_FIELDS = ["debit", "credit", "debit_in_account_currency", "credit_in_account_currency"]
+UPSERT_BATCH_SIZE = 500
+BUILT_FLAG = "daily_account_balances_built"
+
+
+class DailyAccountBalance(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		company: DF.Link | None
+		cost_center: DF.Link | None
+		credit: DF.Currency
+		credit_in_account_currency: DF.Currency
+		debit: DF.Currency
+		debit_in_account_currency: DF.Currency
+		finance_book: DF.Link | None
+		fiscal_year: DF.Link | None
+		is_opening: DF.Literal["No", "Yes"]
+		is_period_closing_voucher_entry: DF.Check
+		posting_date: DF.Date | None
+		project: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Daily Account Balance", ["company", "account", "posting_date"])
+
+
+def is_daily_account_balance_enabled():
+	return cint(frappe.db.get_single_value("Accounts Settings", "use_daily_account_balances"))
+
+
+def is_daily_account_balance_built():
+	"""Daily balances are only read once a full rebuild has completed after they were enabled"""
+	return is_daily_account_balance_enabled() and cint(frappe.db.get_global(BUILT_FLAG))
+
+
+def set_daily_account_balance_built(built):
+	frappe.db.set_global(BUILT_FLAG, cint(built))
+
+
+def lock_companies(companies, exclusive=False):
+	"""Postings share-lock their companies and a rebuild locks its company exclusively,
+	so entries posted while a company is being rebuilt are neither lost nor counted twice"""
+
+	companies = sorted(set(filter(None, companies)))
+	if not companies:
+		return
+
+	query = "select name from `tabCompany` where name in ({})".format(", ".join(["%s"] * len(companies)))
+	frappe.db.multisql(
+		{
+			"mariadb": query + (" for update" if exclusive else " lock in share mode"),
+			"postgres": query + (" for update" if exclusive else " for share"),
+		},
+		companies,
+	)
+
+
+def update_daily_account_balances(gl_entries, reverse=False):
+	"""Add the amounts of `gl_entries` to their daily balances, `reverse` subtracts them"""
+
+	if not gl_entries or not is_daily_account_balance_enabled():
+		return
+
+	lock_companies(entry.get("company") for entry in gl_entries)
+	upsert_daily_account_balances(aggregate_gl_entries(gl_entries, reverse=reverse))
+
+
+def reverse_daily_account_balances(voucher_type, voucher_no):
+	"""Subtract the active GL Entries of a voucher, called before they are cancelled or deleted"""
+
+	if not is_daily_account_balance_enabled():
+		return
+
+	gl_entries = frappe.get_all(
+		"GL Entry",
+		filters={"voucher_type": voucher_type, "voucher_no": voucher_no, "is_cancelled": 0},
+		fields=["*"],
+	)
+	update_daily_account_balances(gl_entries, reverse=True)
+
+
+def aggregate_gl_entries(gl_entries, reverse=False):
+	accounting_dimensions = get_accounting_dimensions()
+	sign = -1 if reverse else 1
+
+	balances = {}
+	for entry in gl_entries:
+		key, key_values = generate_key(entry, accounting_dimensions)
+		if key not in balances:
+			balances[key] = frappe._dict(key_values)
+			balances[key].update(dict.fromkeys(AMOUNT_FIELDS, 0.0))
+
+		for fieldname in AMOUNT_FIELDS:
+			balances[key][fieldname] += sign * flt(entry.get(fieldname))
+
+	return balances
+
+
+def generate_key(entry, accounting_dimensions):
+	key_values = {
+		"company": entry.get("company"),
+		"account": entry.get("account"),
+		"posting_date": getdate(entry.get("posting_date")),
+		"fiscal_year": entry.get("fiscal_year"),
+		"is_opening": entry.get("is_opening") or "No",
+		"is_period_closing_voucher_entry": cint(entry.get("voucher_type") == "Period Closing Voucher"),
+		"cost_center": entry.get("cost_center"),
+		"project": entry.get("project"),
+		"finance_book": entry.get("finance_book"),
+		"account_currency": entry.get("account_currency"),
+	}
+	for dimension in accounting_dimensions:
+		key_values[dimension] = entry.get(dimension)
+
+	for fieldname, value in key_values.items():
+		if not value and fieldname != "is_period_closing_voucher_entry":
+			key_values[fieldname] = None
+
+	return tuple(cstr(value) for value in key_values.values()), key_values
+
+
+def upsert_daily_account_balances(balances):
+	"""Insert new daily balances and add to the existing ones in a single statement per batch"""
+
+	if not balances:
+		return
+
+	rows = []
+	for key, balance in balances.items():
+		balance.name = hashlib.sha1("\x1f".join(key).encode()).hexdigest()
+		rows.append(balance)
+
+	# rows are always locked in the same order so that concurrent postings cannot deadlock
+	rows.sort(key=lambda d: d.name)
+
+	user = frappe.session.user
+	timestamp = now()
+	fields = ["name", "creation", "modified", "owner", "modified_by"]
+	fields.extend(fieldname for fieldname in rows[0] if fieldname != "name")
+
+	columns = ", ".join(f"`{fieldname}`" for fieldname in fields)
+	placeholder = "({})".format(", ".join(["%s"] * len(fields)))
+
+	mariadb_updates = [f"`{d}` = `{d}` + values(`{d}`)" for d in AMOUNT_FIELDS]
+	mariadb_updates.append("`modified` = values(`modified`)")
+	postgres_updates = [f'"{d}" = "tabDaily Account Balance"."{d}" + excluded."{d}"' for d in AMOUNT_FIELDS]
+	postgres_updates.append('"modified" = excluded."modified"')
+
+	for batch in create_batch(rows, UPSERT_BATCH_SIZE):
+		values = []
+		for row in batch:
+			row.update({"creation": timestamp, "modified": timestamp, "owner": user, "modified_by": user})
+			values.extend(row.get(fieldname) for fieldname in fields)
+
+		query = "insert into `tabDaily Account Balance` ({}) values {}".format(
+			columns, ", ".join([placeholder] * len(batch))
+		)
+		frappe.db.multisql(
+			{
+				"mariadb": f"{query} on duplicate key update " + ", ".join(mariadb_updates),
+				"postgres": f"{query} on conflict (name) do update set " + ", ".join(postgres_updates),
+			},
+			values,
+		)
+
+
+def rebuild_daily_account_balances(company=None):
+	"""Recompute the daily balances of `company` (all companies if not set) from GL Entries"""
+
+	rebuild_all = not company
+	companies = [company] if company else frappe.get_all("Company", pluck="name")
+	fiscal_years = frappe.get_all("Fiscal Year", pluck="name")
+	accounting_dimensions = get_accounting_dimensions()
+
+	gle = frappe.qb.DocType("GL Entry")
+	group_by = [
+		gle.company,
+		gle.account,
+		gle.posting_date,
+		gle.fiscal_year,
+		gle.is_opening,
+		gle.voucher_type,
+		gle.cost_center,
+		gle.project,
+		gle.finance_book,
+		gle.account_currency,
+	]
+	group_by.extend(gle[dimension] for dimension in accounting_dimensions)
+
+	for company in companies:
+		# each company is rebuilt in its own transaction, which only reads GL Entries once
+		# the lock is held so that postings committed in the meantime are included
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+
+		lock_companies([company], exclusive=True)
+		frappe.db.delete("Daily Account Balance", {"company": company})
+
+		# one fiscal year at a time to keep the aggregated rows in memory small
+		for fiscal_year in fiscal_years:
+			gl_entries = (
+				frappe.qb.from_(gle)
+				.select(*group_by, *[Sum(gle[d]).as_(d) for d in AMOUNT_FIELDS])
+				.where((gle.company == company) & (gle.fiscal_year == fiscal_year) & (gle.is_cancelled == 0))
+				.groupby(*group_by)
+			).run(as_dict=True)
+
+			upsert_daily_account_balances(aggregate_gl_entries(gl_entries))
+
+	if rebuild_all:
+		set_daily_account_balance_built(1)
+
+	if not frappe.flags.in_test:
+		frappe.db.commit()
@@ -0,0 +1,91 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.query_builder.functions import Sum
+from frappe.tests.utils import FrappeTestCase, change_settings
+from frappe.utils import add_days, flt, today
+
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	is_daily_account_balance_built,
+	rebuild_daily_account_balances,
+	set_daily_account_balance_built,
+)
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.utils import fix_total_debit_credit
+
+
+class TestDailyAccountBalance(FrappeTestCase):
+	@change_settings("Accounts Settings", {"use_daily_account_balances": 1})
+	def test_balances_follow_gl_entries(self):
+		accounts = ["_Test Bank - _TC", "_Test Cash - _TC"]
+		posting_date = add_days(today(), -3)
+		self.assertEqual(get_daily_balances(accounts, posting_date), get_gl_balances(accounts, posting_date))
+
+		jv = make_journal_entry(accounts[0], accounts[1], 100, posting_date=posting_date, submit=True)
+		make_journal_entry(accounts[0], accounts[1], 50, posting_date=posting_date, submit=True)
+		self.assertEqual(get_daily_balances(accounts, posting_date), get_gl_balances(accounts, posting_date))
+
+		jv.cancel()
+		self.assertEqual(get_daily_balances(accounts, posting_date), get_gl_balances(accounts, posting_date))
+
+		balances = get_daily_balances(accounts, posting_date)
+		rebuild_daily_account_balances("_Test Company")
+		self.assertEqual(get_daily_balances(accounts, posting_date), balances)
+
+	@change_settings("Accounts Settings", {"use_daily_account_balances": 1})
+	def test_balances_are_read_once_built(self):
+		self.assertTrue(is_daily_account_balance_built())
+
+		set_daily_account_balance_built(0)
+		self.assertFalse(is_daily_account_balance_built())
+
+		rebuild_daily_account_balances("_Test Company")
+		self.assertFalse(is_daily_account_balance_built())
+
+		rebuild_daily_account_balances()
+		self.assertTrue(is_daily_account_balance_built())
+
+	@change_settings("Accounts Settings", {"use_daily_account_balances": 1})
+	def test_fix_total_debit_credit_updates_balances(self):
+		accounts = ["_Test Bank - _TC", "_Test Cash - _TC"]
+		posting_date = add_days(today(), -3)
+		jv = make_journal_entry(accounts[0], accounts[1], 100, posting_date=posting_date, submit=True)
+
+		gle = frappe.qb.DocType("GL Entry")
+		frappe.qb.update(gle).set(gle.debit, gle.debit - 1).where(
+			(gle.voucher_no == jv.name) & (gle.account == accounts[0])
+		).run()
+		rebuild_daily_account_balances("_Test Company")
+		balances = get_daily_balances(accounts, posting_date)
+
+		fix_total_debit_credit()
+		self.assertEqual(get_daily_balances(accounts, posting_date), get_gl_balances(accounts, posting_date))
+		self.assertNotEqual(get_daily_balances(accounts, posting_date), balances)
+
+
+def get_daily_balances(accounts, posting_date):
+	return get_balances("Daily Account Balance", accounts, posting_date)
+
+
+def get_gl_balances(accounts, posting_date):
+	return get_balances("GL Entry", accounts, posting_date, {"is_cancelled": 0})
+
+
+def get_balances(doctype, accounts, posting_date, filters=None):
+	table = frappe.qb.DocType(doctype)
+	query = (
+		frappe.qb.from_(table)
+		.select(table.account, Sum(table.debit), Sum(table.credit))
+		.where(
+			(table.company == "_Test Company")
+			& (table.account.isin(accounts))
+			& (table.posting_date == posting_date)
+		)
+		.groupby(table.account)
+		.orderby(table.account)
+	)
+	for fieldname, value in (filters or {}).items():
+		query = query.where(table[fieldname] == value)
+
+	return [(account, flt(debit, 2), flt(credit, 2)) for account, debit, credit in query.run()]
@@ -0,0 +1,233 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Max, Sum
+from frappe.utils import cint, create_batch, cstr, flt, now
+
+KEY_FIELDS = ["company", "account", "account_type", "party_type", "party", "voucher_type", "voucher_no"]
+AMOUNT_FIELDS = ["outstanding", "outstanding_in_account_currency"]
+# Payment Ledger Entry filters that can be applied to the outstanding rows as they are
+FILTER_FIELDS = {"company", "account", "account_type", "party_type", "party"}
+UPSERT_BATCH_SIZE = 500
+BUILT_FLAG = "payment_ledger_outstanding_built"
+
+
+class PaymentLedgerOutstanding(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		account_type: DF.Literal["Receivable", "Payable"]
+		company: DF.Link | None
+		due_date: DF.Date | None
+		outstanding: DF.Currency
+		outstanding_in_account_currency: DF.Currency
+		party: DF.DynamicLink | None
+		party_type: DF.Link | None
+		posting_date: DF.Date | None
+		voucher_no: DF.DynamicLink | None
+		voucher_type: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index(
+		"Payment Ledger Outstanding", ["party_type", "party", "outstanding_in_account_currency"]
+	)
+	frappe.db.add_index("Payment Ledger Outstanding", ["voucher_no", "voucher_type"])
+
+
+def is_payment_ledger_outstanding_enabled():
+	return cint(frappe.db.get_single_value("Accounts Settings", "use_payment_ledger_outstanding"))
+
+
+def is_payment_ledger_outstanding_built():
+	"""Outstanding rows are only read once a full rebuild has completed after they were enabled"""
+	return is_payment_ledger_outstanding_enabled() and cint(frappe.db.get_global(BUILT_FLAG))
+
+
+def set_payment_ledger_outstanding_built(built):
+	frappe.db.set_global(BUILT_FLAG, cint(built))
+
+
+def update_payment_ledger_outstanding(vouchers):
+	"""
+	Recompute the outstanding of `vouchers`, (voucher_type, voucher_no) pairs, from their Payment
+	Ledger Entries. Called after entries against them are created, delinked or deleted.
+	"""
+
+	if not vouchers or not is_payment_ledger_outstanding_enabled():
+		return
+
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	outstanding = frappe.qb.DocType("Payment Ledger Outstanding")
+
+	for batch in create_batch(sorted(set(vouchers)), UPSERT_BATCH_SIZE):
+		voucher_types = {voucher_type for voucher_type, _voucher_no in batch}
+		voucher_nos = {voucher_no for _voucher_type, voucher_no in batch}
+
+		rows = get_outstanding_query(
+			(ple.against_voucher_type.isin(voucher_types)) & (ple.against_voucher_no.isin(voucher_nos))
+		).run(as_dict=True)
+
+		# settled vouchers are removed, so the table only holds open ones
+		frappe.qb.from_(outstanding).delete().where(
+			(outstanding.voucher_type.isin(voucher_types)) & (outstanding.voucher_no.isin(voucher_nos))
+		).run()
+		upsert_payment_ledger_outstanding(rows)
+
+
+def get_outstanding_query(condition):
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	is_own_entry = (ple.voucher_type == ple.against_voucher_type) & (ple.voucher_no == ple.against_voucher_no)
+	group_by = [
+		ple.company,
+		ple.account,
+		ple.account_type,
+		ple.party_type,
+		ple.party,
+		ple.against_voucher_type,
+		ple.against_voucher_no,
+		ple.account_currency,
+	]
+
+	return (
+		frappe.qb.from_(ple)
+		.select(
+			ple.company,
+			ple.account,
+			ple.account_type,
+			ple.party_type,
+			ple.party,
+			ple.against_voucher_type.as_("voucher_type"),
+			ple.against_voucher_no.as_("voucher_no"),
+			ple.account_currency,
+			Max(Case().when(is_own_entry, ple.posting_date)).as_("posting_date"),
+			Max(Case().when(is_own_entry, ple.due_date)).as_("due_date"),
+			Sum(ple.amount).as_("outstanding"),
+			Sum(ple.amount_in_account_currency).as_("outstanding_in_account_currency"),
+		)
+		.where((ple.delinked == 0) & condition)
+		.groupby(*group_by)
+	)
+
+
+def upsert_payment_ledger_outstanding(rows):
+	"""Insert the open rows, replacing the amounts of the existing ones"""
+
+	rows = [row for row in rows if any(flt(row.get(fieldname), 9) for fieldname in AMOUNT_FIELDS)]
+	if not rows:
+		return
+
+	for row in rows:
+		key = "\x1f".join(cstr(row.get(fieldname)) for fieldname in KEY_FIELDS)
+		row.name = hashlib.sha1(key.encode()).hexdigest()
+
+	# rows are always locked in the same order so that concurrent postings cannot deadlock
+	rows.sort(key=lambda d: d.name)
+
+	user = frappe.session.user
+	timestamp = now()
+	fields = ["name", "creation", "modified", "owner", "modified_by"]
+	fields.extend([*KEY_FIELDS, *AMOUNT_FIELDS, "account_currency", "posting_date", "due_date"])
+
+	columns = ", ".join(f"`{fieldname}`" for fieldname in fields)
+	placeholder = "({})".format(", ".join(["%s"] * len(fields)))
+
+	updated_fields = [*AMOUNT_FIELDS, "posting_date", "due_date", "modified"]
+	mariadb_updates = [f"`{d}` = values(`{d}`)" for d in updated_fields]
+	postgres_updates = [f'"{d}" = excluded."{d}"' for d in updated_fields]
+
+	for batch in create_batch(rows, UPSERT_BATCH_SIZE):
+		values = []
+		for row in batch:
+			row.update({"creation": timestamp, "modified": timestamp, "owner": user, "modified_by": user})
+			values.extend(row.get(fieldname) for fieldname in fields)
+
+		query = "insert into `tabPayment Ledger Outstanding` ({}) values {}".format(
+			columns, ", ".join([placeholder] * len(batch))
+		)
+		frappe.db.multisql(
+			{
+				"mariadb": f"{query} on duplicate key update " + ", ".join(mariadb_updates),
+				"postgres": f"{query} on conflict (name) do update set " + ", ".join(postgres_updates),
+			},
+			values,
+		)
+
+
+def get_open_vouchers_query(common_filter, get_invoices=False, get_payments=False):
+	"""
+	Query for the open vouchers matching `common_filter`, Payment Ledger Entry criterions on
+	`FILTER_FIELDS`. Returns None if the filters cannot be applied to the outstanding rows.
+	"""
+
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	outstanding = frappe.qb.DocType("Payment Ledger Outstanding")
+
+	fieldnames = {field.name for criterion in common_filter for field in criterion.fields_()}
+	if not fieldnames.issubset(FILTER_FIELDS):
+		return
+
+	query = frappe.qb.from_(outstanding).select(outstanding.voucher_no)
+	for criterion in common_filter:
+		query = query.where(criterion.replace_table(ple, outstanding))
+
+	if get_invoices:
+		query = query.where(outstanding.outstanding_in_account_currency > 0)
+	elif get_payments:
+		query = query.where(outstanding.outstanding_in_account_currency < 0)
+
+	return query
+
+
+def get_party_outstanding(company, party_type, party, account_type):
+	"""Total outstanding of a party in company currency"""
+
+	outstanding = frappe.qb.DocType("Payment Ledger Outstanding")
+	total = (
+		frappe.qb.from_(outstanding)
+		.select(Sum(outstanding.outstanding))
+		.where(
+			(outstanding.party_type == party_type)
+			& (outstanding.party == party)
+			& (outstanding.company == company)
+			& (outstanding.account_type == account_type)
+		)
+	).run()
+
+	return flt(total[0][0]) if total else 0.0
+
+
+def rebuild_payment_ledger_outstanding(company=None):
+	"""Recompute the outstanding of all vouchers of `company` (all companies if not set)"""
+
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	rebuild_all = not company
+	companies = [company] if company else frappe.get_all("Company", pluck="name")
+
+	for company in companies:
+		frappe.db.delete("Payment Ledger Outstanding", {"company": company})
+
+		# one party type at a time to keep the aggregated rows in memory small
+		for party_type in frappe.get_all("Party Type", pluck="name"):
+			rows = get_outstanding_query((ple.company == company) & (ple.party_type == party_type)).run(
+				as_dict=True
+			)
+			upsert_payment_ledger_outstanding(rows)
+
+	if rebuild_all:
+		set_payment_ledger_outstanding_built(1)
@@ -0,0 +1,79 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase, change_settings
+
+from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	is_payment_ledger_outstanding_built,
+	rebuild_payment_ledger_outstanding,
+	set_payment_ledger_outstanding_built,
+)
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.utils import get_outstanding_invoices
+
+
+class TestPaymentLedgerOutstanding(FrappeTestCase):
+	@change_settings("Accounts Settings", {"use_payment_ledger_outstanding": 1})
+	def test_outstanding_follows_payment_ledger(self):
+		si = create_sales_invoice(qty=1, rate=100)
+		self.assertEqual(get_outstanding(si), 100)
+
+		pe = get_payment_entry(si.doctype, si.name)
+		pe.references[0].allocated_amount = 40
+		pe.paid_amount = pe.received_amount = 40
+		pe.save().submit()
+		self.assertEqual(get_outstanding(si), 60)
+		self.assertEqual(get_open_invoices(si).get(si.name), 60)
+
+		pe.cancel()
+		self.assertEqual(get_outstanding(si), 100)
+
+		get_payment_entry(si.doctype, si.name).save().submit()
+		self.assertIsNone(get_outstanding(si))
+		self.assertNotIn(si.name, get_open_invoices(si))
+
+		rows = get_outstanding_rows(si.company)
+		rebuild_payment_ledger_outstanding(si.company)
+		self.assertEqual(get_outstanding_rows(si.company), rows)
+
+	@change_settings("Accounts Settings", {"use_payment_ledger_outstanding": 1})
+	def test_outstanding_is_read_once_built(self):
+		self.assertTrue(is_payment_ledger_outstanding_built())
+
+		si = create_sales_invoice(qty=1, rate=100)
+		set_payment_ledger_outstanding_built(0)
+		frappe.db.delete("Payment Ledger Outstanding", {"company": si.company})
+		self.assertFalse(is_payment_ledger_outstanding_built())
+		# open invoices are read from the Payment Ledger until the rebuild completes
+		self.assertEqual(get_open_invoices(si).get(si.name), 100)
+
+		rebuild_payment_ledger_outstanding(si.company)
+		self.assertFalse(is_payment_ledger_outstanding_built())
+
+		rebuild_payment_ledger_outstanding()
+		self.assertTrue(is_payment_ledger_outstanding_built())
+		self.assertEqual(get_open_invoices(si).get(si.name), 100)
+
+
+def get_outstanding(si):
+	return frappe.db.get_value(
+		"Payment Ledger Outstanding",
+		{"voucher_type": si.doctype, "voucher_no": si.name},
+		"outstanding_in_account_currency",
+	)
+
+
+def get_open_invoices(si):
+	invoices = get_outstanding_invoices("Customer", si.customer, [si.debit_to])
+	return {d.voucher_no: d.outstanding_amount for d in invoices}
+
+
+def get_outstanding_rows(company):
+	return frappe.get_all(
+		"Payment Ledger Outstanding",
+		filters={"company": company},
+		fields=["name", "voucher_type", "voucher_no", "outstanding", "outstanding_in_account_currency"],
+		order_by="name",
+	)
@@ -2,6 +2,9 @@
 # For license information, please see license.txt
 
 
+import re
+from collections import defaultdict, deque
+
 import frappe
 from frappe import _, msgprint, qb
 from frappe.model.document import Document
@@ -423,37 +426,28 @@ class PaymentReconciliation(Document):
 			"Company", self.company, "exchange_gain_loss_account"
 		)
 
-		entries = []
-		for pay in args.get("payments"):
+		payments, invoices = args.get("payments"), args.get("invoices")
+		for pay in payments:
 			pay.update({"unreconciled_amount": pay.get("amount")})
-			for inv in args.get("invoices"):
-				if pay.get("amount") >= inv.get("outstanding_amount"):
-					res = self.get_allocated_entry(pay, inv, inv["outstanding_amount"])
-					pay["amount"] = flt(pay.get("amount")) - flt(inv.get("outstanding_amount"))
-					inv["outstanding_amount"] = 0
-				else:
-					res = self.get_allocated_entry(pay, inv, pay["amount"])
-					inv["outstanding_amount"] = flt(inv.get("outstanding_amount")) - flt(pay.get("amount"))
-					pay["amount"] = 0
-
-				inv["exchange_rate"] = invoice_exchange_map.get(inv.get("invoice_number"))
-				if pay.get("reference_type") in ["Sales Invoice", "Purchase Invoice"]:
-					pay["exchange_rate"] = invoice_exchange_map.get(pay.get("reference_name"))
-
-				res.difference_amount = self.get_difference_amount(pay, inv, res["allocated_amount"])
-				res.difference_account = default_exchange_gain_loss_account
-				res.exchange_rate = inv.get("exchange_rate")
-				res.update({"gain_loss_posting_date": pay.get("posting_date")})
-
-				if pay.get("amount") == 0:
-					entries.append(res)
-					break
-				elif inv.get("outstanding_amount") == 0:
-					entries.append(res)
-					continue
 
-			else:
-				break
+		match_by = args.get("match_by") or "FIFO"
+		references = get_payment_references(payments) if match_by == "Reference" else None
+
+		entries = []
+		for match in match_payments_with_invoices(payments, invoices, match_by, references):
+			pay, inv = match.payment, match.invoice
+			res = self.get_allocated_entry(pay, inv, match.allocated_amount)
+			res.amount = match.unallocated_amount
+
+			inv["exchange_rate"] = invoice_exchange_map.get(inv.get("invoice_number"))
+			if pay.get("reference_type") in ["Sales Invoice", "Purchase Invoice"]:
+				pay["exchange_rate"] = invoice_exchange_map.get(pay.get("reference_name"))
+
+			res.difference_amount = self.get_difference_amount(pay, inv, res["allocated_amount"])
+			res.difference_account = default_exchange_gain_loss_account
+			res.exchange_rate = inv.get("exchange_rate")
+			res.update({"gain_loss_posting_date": pay.get("posting_date")})
+			entries.append(res)
 
 		self.set("allocation", [])
 		for entry in entries:
@@ -488,7 +482,7 @@ class PaymentReconciliation(Document):
 		res = self.update_dimension_values_in_allocated_entries(res)
 		return res
 
-	def reconcile_allocations(self, skip_ref_details_update_for_pe=False):
+	def reconcile_allocations(self, skip_ref_details_update_for_pe=False, bulk=False):
 		adjust_allocations_for_taxes(self)
 		dr_or_cr = (
 			"credit_in_account_currency"
@@ -510,7 +504,7 @@ class PaymentReconciliation(Document):
 				reconciled_entry.append(payment_details)
 
 		if entry_list:
-			reconcile_against_document(entry_list, skip_ref_details_update_for_pe, self.dimensions)
+			reconcile_against_document(entry_list, skip_ref_details_update_for_pe, self.dimensions, bulk=bulk)
 
 		if dr_or_cr_notes:
 			reconcile_dr_cr_note(dr_or_cr_notes, self.company, self.dimensions)
@@ -734,6 +728,87 @@ class PaymentReconciliation(Document):
 		return conditions
 
 
+def match_payments_with_invoices(payments, invoices, match_by="FIFO", references=None):
+	"""
+	Pair payments with invoices in memory, `amount` of the payments and `outstanding_amount` of
+	the invoices are reduced by every allocation.
+
+	- FIFO: payments are applied to invoices in the order they are passed
+	- Exact Amount: a payment is only applied to an invoice with the same outstanding amount
+	- Reference: a payment is applied to the invoices mentioned in `references`, a map of
+	  (reference_type, reference_name) to text such as the reference no or remarks of the payment
+	"""
+
+	def allocate(pay, inv, allocated_amount):
+		match = frappe._dict(
+			payment=pay,
+			invoice=inv,
+			allocated_amount=allocated_amount,
+			unallocated_amount=pay.get("amount"),
+		)
+		pay["amount"] = flt(pay.get("amount")) - allocated_amount
+		inv["outstanding_amount"] = flt(inv.get("outstanding_amount")) - allocated_amount
+		return match
+
+	if match_by == "Exact Amount":
+		invoices_by_amount = defaultdict(deque)
+		for inv in invoices:
+			if flt(inv.get("outstanding_amount")) > 0:
+				invoices_by_amount[flt(inv.get("outstanding_amount"), 2)].append(inv)
+
+		for pay in payments:
+			matching_invoices = invoices_by_amount.get(flt(pay.get("amount"), 2))
+			if matching_invoices:
+				inv = matching_invoices.popleft()
+				yield allocate(pay, inv, flt(inv.get("outstanding_amount")))
+
+	elif match_by == "Reference":
+		invoices_by_name = {inv.get("invoice_number"): inv for inv in invoices}
+		for pay in payments:
+			text = (references or {}).get((pay.get("reference_type"), pay.get("reference_name")))
+			for invoice_number in re.findall(r"[\w./-]+", text or ""):
+				inv = invoices_by_name.get(invoice_number)
+				if not inv or flt(pay.get("amount")) <= 0 or flt(inv.get("outstanding_amount")) <= 0:
+					continue
+
+				yield allocate(pay, inv, min(flt(pay.get("amount")), flt(inv.get("outstanding_amount"))))
+
+	else:
+		invoices = [inv for inv in invoices if flt(inv.get("outstanding_amount")) > 0]
+		idx = 0
+		for pay in payments:
+			while idx < len(invoices) and flt(pay.get("amount")) > 0:
+				inv = invoices[idx]
+				if flt(pay.get("amount")) >= flt(inv.get("outstanding_amount")):
+					idx += 1
+
+				yield allocate(pay, inv, min(flt(pay.get("amount")), flt(inv.get("outstanding_amount"))))
+
+			if idx >= len(invoices):
+				break
+
+
+def get_payment_references(payments):
+	"""Reference no and remarks of Payment Entries and Journal Entries used to match them to invoices"""
+
+	names = defaultdict(list)
+	for pay in payments:
+		names[pay.get("reference_type")].append(pay.get("reference_name"))
+
+	references = {}
+	for doctype, fields in (
+		("Payment Entry", ["name", "reference_no", "remarks"]),
+		("Journal Entry", ["name", "cheque_no", "user_remark"]),
+	):
+		if names.get(doctype):
+			for name, *text in frappe.get_all(
+				doctype, filters={"name": ("in", names[doctype])}, fields=fields, as_list=True
+			):
+				references[(doctype, name)] = " ".join(t for t in text if t)
+
+	return references
+
+
 def reconcile_dr_cr_note(dr_cr_notes, company, active_dimensions=None):
 	for inv in dr_cr_notes:
 		voucher_type = "Credit Note" if inv.voucher_type == "Sales Invoice" else "Debit Note"
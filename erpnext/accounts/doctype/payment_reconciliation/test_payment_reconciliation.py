@@ -10,6 +10,9 @@ from frappe.utils import add_days, flt, nowdate
 from erpnext import get_default_cost_center
 from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
 from erpnext.accounts.doctype.payment_entry.test_payment_entry import create_payment_entry
+from erpnext.accounts.doctype.payment_reconciliation.payment_reconciliation import (
+	match_payments_with_invoices,
+)
 from erpnext.accounts.doctype.purchase_invoice.test_purchase_invoice import make_purchase_invoice
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
 from erpnext.accounts.party import get_party_account
@@ -1574,6 +1577,78 @@ class TestPaymentReconciliation(FrappeTestCase):
 		)
 		self.assertEqual(len(pl_entries), 3)
 
+	def test_match_payments_with_invoices(self):
+		def get_matches(match_by, references=None):
+			payments = [
+				frappe._dict(reference_type="Payment Entry", reference_name="PE-1", amount=300),
+				frappe._dict(reference_type="Payment Entry", reference_name="PE-2", amount=100),
+			]
+			invoices = [
+				frappe._dict(invoice_type="Sales Invoice", invoice_number="SI-1", outstanding_amount=100),
+				frappe._dict(invoice_type="Sales Invoice", invoice_number="SI-2", outstanding_amount=250),
+				frappe._dict(invoice_type="Sales Invoice", invoice_number="SI-3", outstanding_amount=300),
+			]
+			return [
+				(x.payment.reference_name, x.invoice.invoice_number, x.allocated_amount)
+				for x in match_payments_with_invoices(payments, invoices, match_by, references)
+			]
+
+		self.assertEqual(
+			get_matches("FIFO"),
+			[("PE-1", "SI-1", 100), ("PE-1", "SI-2", 200), ("PE-2", "SI-2", 50), ("PE-2", "SI-3", 50)],
+		)
+		self.assertEqual(get_matches("Exact Amount"), [("PE-1", "SI-3", 300), ("PE-2", "SI-1", 100)])
+		self.assertEqual(
+			get_matches("Reference", {("Payment Entry", "PE-1"): "Against SI-2, SI-3"}),
+			[("PE-1", "SI-2", 250), ("PE-1", "SI-3", 50)],
+		)
+
+	def test_bulk_reconcile_by_exact_amount(self):
+		invoices = [self.create_sales_invoice(qty=1, rate=rate) for rate in (100, 200, 300)]
+		payments = [self.create_payment_entry(amount=amount).save().submit() for amount in (200, 300, 100)]
+
+		pr = self.create_payment_reconciliation()
+		pr.get_unreconciled_entries()
+		pr.allocate_entries(
+			frappe._dict(
+				{
+					"invoices": [x.as_dict() for x in pr.invoices],
+					"payments": [x.as_dict() for x in pr.payments],
+					"match_by": "Exact Amount",
+				}
+			)
+		)
+		self.assertEqual(
+			sorted((x.reference_name, x.invoice_number) for x in pr.allocation),
+			sorted(
+				zip(
+					[x.name for x in payments],
+					[invoices[1].name, invoices[2].name, invoices[0].name],
+					strict=True,
+				)
+			),
+		)
+
+		pr.reconcile_allocations(bulk=True)
+		for inv in invoices:
+			self.assertEqual(frappe.db.get_value("Sales Invoice", inv.name, "outstanding_amount"), 0)
+			self.assertEqual(frappe.db.get_value("Sales Invoice", inv.name, "status"), "Paid")
+
+		# reference details are set after the deferred outstanding update
+		references = frappe.get_all(
+			"Payment Entry Reference",
+			filters={"parent": ("in", [x.name for x in payments])},
+			fields=["reference_name", "outstanding_amount"],
+		)
+		self.assertEqual(len(references), 3)
+		for ref in references:
+			self.assertEqual(
+				ref.outstanding_amount,
+				frappe.db.get_value("Sales Invoice", ref.reference_name, "outstanding_amount"),
+			)
+		for pe in payments:
+			self.assertEqual(frappe.db.get_value("Payment Entry", pe.name, "unallocated_amount"), 0)
+
 
 def make_customer(customer_name, currency=None):
 	if not frappe.db.exists("Customer", customer_name):
@@ -2,13 +2,19 @@
 # For license information, please see license.txt
 
 import json
+from collections import defaultdict
 
 import frappe
 from frappe import _, qb
 from frappe.model.document import Document
-from frappe.utils import get_link_to_form
+from frappe.utils import get_link_to_form, now
 from frappe.utils.scheduler import is_scheduler_inactive
 
+# allocations reconciled by one job in bulk mode
+BULK_RECONCILE_BATCH_SIZE = 500
+# invoices and payments fetched for allocation in bulk mode
+BULK_FETCH_LIMIT = 50000
+
 
 class ProcessPaymentReconciliation(Document):
 	# begin: auto-generated types
@@ -21,11 +27,13 @@ class ProcessPaymentReconciliation(Document):
 
 		amended_from: DF.Link | None
 		bank_cash_account: DF.Link | None
+		bulk_reconcile: DF.Check
 		company: DF.Link
 		cost_center: DF.Link | None
 		error_log: DF.LongText | None
 		from_invoice_date: DF.Date | None
 		from_payment_date: DF.Date | None
+		match_by: DF.Literal["FIFO", "Exact Amount", "Reference"]
 		party: DF.DynamicLink
 		party_type: DF.Link
 		receivable_payable_account: DF.Link
@@ -112,6 +120,9 @@ def get_pr_instance(doc: str):
 	pr.update(d)
 	pr.invoice_limit = 1000
 	pr.payment_limit = 1000
+	if process_payment_reconciliation.bulk_reconcile:
+		pr.invoice_limit = BULK_FETCH_LIMIT
+		pr.payment_limit = BULK_FETCH_LIMIT
 	return pr
 
 
@@ -280,7 +291,7 @@ def reconcile_based_on_filters(doc: None | str = None) -> None:
 						doc=doc,
 					)
 			elif not reconciled:
-				allocation = get_next_allocation(log)
+				allocation = get_next_allocation(log, is_bulk_reconcile(doc))
 				if allocation:
 					reconcile_job_name = (
 						f"process_{doc}_reconcile_allocation_{allocation[0].idx}_{allocation[-1].idx}"
@@ -301,7 +312,11 @@ def reconcile_based_on_filters(doc: None | str = None) -> None:
 				frappe.db.set_value("Process Payment Reconciliation", doc, "status", "Completed")
 
 
-def get_next_allocation(log: str) -> list:
+def get_next_allocation(log: str, bulk: bool = False) -> list:
+	"""
+	All the pending allocations of the next payment, in bulk mode those of the payments of
+	the next `BULK_RECONCILE_BATCH_SIZE` allocations
+	"""
 	if log:
 		allocations = []
 		next = frappe.db.get_all(
@@ -309,26 +324,80 @@ def get_next_allocation(log: str) -> list:
 			filters={"parent": log, "reconciled": 0},
 			fields=["reference_type", "reference_name"],
 			order_by="idx",
-			limit=1,
+			limit=BULK_RECONCILE_BATCH_SIZE if bulk else 1,
 		)
 
 		if next:
+			references = {(x.reference_type, x.reference_name) for x in next}
 			allocations = frappe.db.get_all(
 				"Process Payment Reconciliation Log Allocations",
 				filters={
 					"parent": log,
 					"reconciled": 0,
-					"reference_type": next[0].reference_type,
-					"reference_name": next[0].reference_name,
+					"reference_name": ("in", {x.reference_name for x in next}),
 				},
 				fields=["*"],
 				order_by="idx",
 			)
+			# a Payment Entry and a Journal Entry can share a name
+			allocations = [x for x in allocations if (x.reference_type, x.reference_name) in references]
 
 		return allocations
 	return []
 
 
+def is_bulk_reconcile(doc: str) -> bool:
+	return bool(frappe.db.get_value("Process Payment Reconciliation", doc, "bulk_reconcile"))
+
+
+def insert_log_allocations(log: str, allocations: list) -> None:
+	"""Insert the allocations of a Process Payment Reconciliation Log in batched statements"""
+
+	doctype = "Process Payment Reconciliation Log Allocations"
+	user, timestamp = frappe.session.user, now()
+
+	fields, values = None, []
+	for idx, allocation in enumerate(allocations, start=1):
+		row = frappe.get_doc(
+			{
+				**allocation.as_dict(),
+				"doctype": doctype,
+				"name": frappe.generate_hash(length=10),
+				"creation": timestamp,
+				"modified": timestamp,
+				"owner": user,
+				"modified_by": user,
+				"parent": log,
+				"parenttype": "Process Payment Reconciliation Log",
+				"parentfield": "allocations",
+				"idx": idx,
+				"docstatus": 0,
+				"reconciled": 0,
+			}
+		).get_valid_dict(convert_dates_to_str=True)
+
+		fields = fields or list(row)
+		values.append(tuple(row.get(fieldname) for fieldname in fields))
+
+	if values:
+		frappe.db.bulk_insert(doctype, fields=fields, values=values, chunk_size=1000)
+
+
+def update_payment_entry_references(allocations: list) -> None:
+	"""Set reference details of Payment Entries only for the newly linked references"""
+
+	references_by_payment = defaultdict(list)
+	for x in allocations:
+		if x.reference_type == "Payment Entry":
+			references_by_payment[x.reference_name].append((x.invoice_type, x.invoice_number))
+
+	for payment_entry, references in references_by_payment.items():
+		pe = frappe.get_doc("Payment Entry", payment_entry)
+		pe.flags.ignore_validate_update_after_submit = True
+		pe.set_missing_ref_details(update_ref_details_only_for=references)
+		pe.save()
+
+
 def fetch_and_allocate(doc: str) -> None:
 	"""
 	Fetch Invoices and Payments based on filters applied. FIFO ordering is used for allocation.
@@ -342,31 +411,50 @@ def fetch_and_allocate(doc: str) -> None:
 
 				pr = get_pr_instance(doc)
 				pr.get_unreconciled_entries()
+				bulk = is_bulk_reconcile(doc)
 
 				if len(pr.invoices) > 0 and len(pr.payments) > 0:
 					invoices = [x.as_dict() for x in pr.invoices]
 					payments = [x.as_dict() for x in pr.payments]
-					pr.allocate_entries(frappe._dict({"invoices": invoices, "payments": payments}))
-
-					for x in pr.get("allocation"):
-						reconcile_log.append(
-							"allocations",
-							x.as_dict().update(
-								{
-									"parenttype": "Process Payment Reconciliation Log",
-									"parent": reconcile_log.name,
-									"name": None,
-									"reconciled": False,
-								}
-							),
-						)
-				reconcile_log.allocated = True
-				reconcile_log.total_allocations = len(reconcile_log.get("allocations"))
-				reconcile_log.reconciled_entries = 0
-				reconcile_log.save()
+					match_by = frappe.db.get_value("Process Payment Reconciliation", doc, "match_by")
+					pr.allocate_entries(
+						frappe._dict({"invoices": invoices, "payments": payments, "match_by": match_by})
+					)
+
+					if bulk:
+						insert_log_allocations(reconcile_log.name, pr.get("allocation"))
+					else:
+						for x in pr.get("allocation"):
+							reconcile_log.append(
+								"allocations",
+								x.as_dict().update(
+									{
+										"parenttype": "Process Payment Reconciliation Log",
+										"parent": reconcile_log.name,
+										"name": None,
+										"reconciled": False,
+									}
+								),
+							)
+				if bulk:
+					# saving the log would drop the allocations inserted in bulk
+					frappe.db.set_value(
+						"Process Payment Reconciliation Log",
+						reconcile_log.name,
+						{
+							"allocated": True,
+							"total_allocations": len(pr.get("allocation")),
+							"reconciled_entries": 0,
+						},
+					)
+				else:
+					reconcile_log.allocated = True
+					reconcile_log.total_allocations = len(reconcile_log.get("allocations"))
+					reconcile_log.reconciled_entries = 0
+					reconcile_log.save()
 
 				# generate reconcile job name
-				allocation = get_next_allocation(log)
+				allocation = get_next_allocation(log, bulk)
 				if allocation:
 					reconcile_job_name = (
 						f"process_{doc}_reconcile_allocation_{allocation[0].idx}_{allocation[-1].idx}"
@@ -402,7 +490,8 @@ def reconcile(doc: None | str = None) -> None:
 			if reconciled_entries != total_allocations:
 				try:
 					# Fetch next allocation
-					allocations = get_next_allocation(log)
+					bulk = is_bulk_reconcile(doc)
+					allocations = get_next_allocation(log, bulk)
 
 					pr = get_pr_instance(doc)
 
@@ -411,16 +500,11 @@ def reconcile(doc: None | str = None) -> None:
 						pr.append("allocation", x)
 
 					# reconcile
-					pr.reconcile_allocations(skip_ref_details_update_for_pe=True)
+					pr.reconcile_allocations(skip_ref_details_update_for_pe=True, bulk=bulk)
 
 					# If Payment Entry, update details only for newly linked references
 					# This is for performance
-					if allocations[0].reference_type == "Payment Entry":
-						references = [(x.invoice_type, x.invoice_number) for x in allocations]
-						pe = frappe.get_doc(allocations[0].reference_type, allocations[0].reference_name)
-						pe.flags.ignore_validate_update_after_submit = True
-						pe.set_missing_ref_details(update_ref_details_only_for=references)
-						pe.save()
+					update_payment_entry_references(allocations)
 
 					# Update reconciled flag
 					allocation_names = [x.name for x in allocations]
@@ -477,7 +561,7 @@ def reconcile(doc: None | str = None) -> None:
 						if frappe.db.get_value("Process Payment Reconciliation", doc, "status") != "Paused":
 							# trigger next batch in job
 							# generate reconcile job name
-							allocation = get_next_allocation(log)
+							allocation = get_next_allocation(log, is_bulk_reconcile(doc))
 							if allocation:
 								reconcile_job_name = f"process_{doc}_reconcile_allocation_{allocation[0].idx}_{allocation[-1].idx}"
 							else:
@@ -10,6 +10,14 @@ from frappe.utils import cint, cstr, flt, formatdate, get_link_to_form, getdate,
 
 import erpnext
 from erpnext.accounts.deferred_revenue import validate_service_stop_date
+from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+	invalidate_closing_balance_snapshots,
+	is_closing_balance_snapshot_enabled,
+)
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	is_daily_account_balance_enabled,
+	update_daily_account_balances,
+)
 from erpnext.accounts.doctype.gl_entry.gl_entry import update_outstanding_amt
 from erpnext.accounts.doctype.repost_accounting_ledger.repost_accounting_ledger import (
 	validate_docs_for_deferred_accounting,
@@ -33,7 +41,7 @@ from erpnext.accounts.general_ledger import (
 	merge_similar_entries,
 )
 from erpnext.accounts.party import get_due_date, get_party_account
-from erpnext.accounts.utils import get_account_currency, get_fiscal_year
+from erpnext.accounts.utils import get_account_currency, get_fiscal_year, invalidate_gl_cache
 from erpnext.assets.doctype.asset.asset import is_cwip_accounting_enabled
 from erpnext.assets.doctype.asset_category.asset_category import get_asset_category_account
 from erpnext.buying.utils import check_on_hold_or_closed_status
@@ -772,6 +780,22 @@ class PurchaseInvoice(BuyingController):
 				rows.add(d.name)
 
 		if rows:
+			if is_daily_account_balance_enabled() or is_closing_balance_snapshot_enabled():
+				gl_entries = frappe.get_all(
+					"GL Entry",
+					filters={
+						"voucher_type": "Purchase Receipt",
+						"voucher_no": ("in", purchase_receipts),
+						"voucher_detail_no": ("in", rows),
+						"is_cancelled": 0,
+					},
+					fields=["*"],
+				)
+				update_daily_account_balances(gl_entries, reverse=True)
+				invalidate_closing_balance_snapshots(gl_entries)
+
+			invalidate_gl_cache([self.company])
+
 			# cancel gl entries
 			gle = qb.DocType("GL Entry")
 			gle_update_query = (
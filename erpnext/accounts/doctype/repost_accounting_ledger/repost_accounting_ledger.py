@@ -6,6 +6,13 @@ from frappe import _, qb
 from frappe.model.document import Document
 from frappe.utils.data import comma_and
 
+from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+	invalidate_closing_balance_snapshots_of_voucher,
+)
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	reverse_daily_account_balances,
+)
+
 
 class RepostAccountingLedger(Document):
 	# begin: auto-generated types
@@ -154,6 +161,9 @@ def start_repost(account_repost_doc=str) -> None:
 				doc = frappe.get_doc(x.voucher_type, x.voucher_no)
 
 				if repost_doc.delete_cancelled_entries:
+					# deleted entries are not cancelled, take them out of the balances built on them
+					reverse_daily_account_balances(doc.doctype, doc.name)
+					invalidate_closing_balance_snapshots_of_voucher(doc.doctype, doc.name)
 					frappe.db.delete(
 						"GL Entry", filters={"voucher_type": doc.doctype, "voucher_no": doc.name}
 					)
@@ -7,6 +7,10 @@ from frappe.query_builder.functions import Sum
 from frappe.tests.utils import FrappeTestCase, change_settings
 from frappe.utils import add_days, nowdate, today
 
+from erpnext.accounts.doctype.daily_account_balance.test_daily_account_balance import (
+	get_daily_balances,
+	get_gl_balances,
+)
 from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
 from erpnext.accounts.doctype.payment_request.payment_request import make_payment_request
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
@@ -202,6 +206,30 @@ class TestRepostAccountingLedger(AccountsTestMixin, FrappeTestCase):
 		self.assertIsNotNone(frappe.db.exists("GL Entry", {"voucher_no": si.name, "is_cancelled": 1}))
 		self.assertIsNotNone(frappe.db.exists("GL Entry", {"voucher_no": pe.name, "is_cancelled": 1}))
 
+	@change_settings("Accounts Settings", {"use_daily_account_balances": 1})
+	def test_06_deletion_flag_keeps_daily_account_balances(self):
+		si = create_sales_invoice(
+			item=self.item,
+			company=self.company,
+			customer=self.customer,
+			debit_to=self.debit_to,
+			parent_cost_center=self.cost_center,
+			cost_center=self.cost_center,
+			rate=100,
+		)
+
+		ral = frappe.new_doc("Repost Accounting Ledger")
+		ral.company = self.company
+		ral.delete_cancelled_entries = True
+		ral.append("vouchers", {"voucher_type": si.doctype, "voucher_no": si.name})
+		ral.save().submit()
+
+		# reposted entries replace the deleted ones instead of being counted twice
+		accounts = [self.debit_to, self.income_account]
+		self.assertEqual(
+			get_daily_balances(accounts, si.posting_date), get_gl_balances(accounts, si.posting_date)
+		)
+
 
 def update_repost_settings():
 	allowed_types = ["Sales Invoice", "Purchase Invoice", "Payment Entry", "Journal Entry"]
@@ -11,6 +11,9 @@ from frappe.utils import cint, flt, formatdate, getdate, now
 from frappe.utils.dashboard import cache_source
 
 import erpnext
+from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+	invalidate_closing_balance_snapshots,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
@@ -19,7 +22,15 @@ from erpnext.accounts.doctype.accounting_dimension_filter.accounting_dimension_f
 )
 from erpnext.accounts.doctype.accounting_period.accounting_period import ClosedAccountingPeriod
 from erpnext.accounts.doctype.budget.budget import validate_expense_against_budget
-from erpnext.accounts.utils import create_payment_ledger_entry
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	reverse_daily_account_balances,
+	update_daily_account_balances,
+)
+from erpnext.accounts.utils import (
+	clear_balances_cache,
+	create_payment_ledger_entry,
+	invalidate_gl_cache,
+)
 from erpnext.exceptions import InvalidAccountDimensionError, MandatoryAccountDimensionError
 
 
@@ -370,9 +381,15 @@ def save_entries(gl_map, adv_adj, update_outstanding, from_repost=False):
 		if gl_map[0]["voucher_type"] != "Period Closing Voucher":
 			validate_against_pcv(is_opening, gl_map[0]["posting_date"], gl_map[0]["company"])
 
+	gl_entries = []
 	for entry in gl_map:
 		validate_allowed_dimensions(entry, dimension_filter_map)
-		make_entry(entry, adv_adj, update_outstanding, from_repost)
+		gl_entries.append(make_entry(entry, adv_adj, update_outstanding, from_repost))
+
+	update_daily_account_balances(gl_entries)
+	invalidate_closing_balance_snapshots(gl_entries)
+	clear_balances_cache()
+	invalidate_gl_cache(entry.company for entry in gl_entries)
 
 
 def make_entry(args, adv_adj, update_outstanding, from_repost=False):
@@ -388,6 +405,8 @@ def make_entry(args, adv_adj, update_outstanding, from_repost=False):
 	if not from_repost and gle.voucher_type != "Period Closing Voucher":
 		validate_expense_against_budget(args)
 
+	return gle
+
 
 def validate_cwip_accounts(gl_map):
 	"""Validate that CWIP account are not used in Journal Entry"""
@@ -633,10 +652,15 @@ def make_reverse_gl_entries(
 					query = query.set(gle.is_cancelled, True)
 
 				query.run()
+
+			if not immutable_ledger_enabled:
+				update_daily_account_balances(gl_entries, reverse=True)
 		else:
 			if not immutable_ledger_enabled:
+				reverse_daily_account_balances(gl_entries[0]["voucher_type"], gl_entries[0]["voucher_no"])
 				set_as_cancel(gl_entries[0]["voucher_type"], gl_entries[0]["voucher_no"])
 
+		reverse_gl_entries = []
 		for entry in gl_entries:
 			new_gle = copy.deepcopy(entry)
 			new_gle["name"] = None
@@ -659,7 +683,15 @@ def make_reverse_gl_entries(
 				new_gle["posting_date"] = frappe.form_dict.get("posting_date") or getdate()
 
 			if new_gle["debit"] or new_gle["credit"]:
-				make_entry(new_gle, adv_adj, "Yes")
+				reverse_gl_entries.append(make_entry(new_gle, adv_adj, "Yes"))
+
+		if immutable_ledger_enabled:
+			# reversals are posted as active entries when the ledger is immutable
+			update_daily_account_balances(reverse_gl_entries)
+
+		invalidate_closing_balance_snapshots(gl_entries + reverse_gl_entries)
+		clear_balances_cache()
+		invalidate_gl_cache(entry.get("company") for entry in gl_entries)
 
 
 def check_freezing_date(posting_date, adv_adj=False):
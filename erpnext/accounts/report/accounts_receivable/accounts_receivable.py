@@ -14,6 +14,10 @@ from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimension_with_children,
 )
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	get_open_vouchers_query,
+	is_payment_ledger_outstanding_built,
+)
 from erpnext.accounts.utils import get_currency_precision, get_party_types_from_account_type
 
 #  This report gives a summary of all Outstanding Invoices considering the following
@@ -85,6 +89,9 @@ class ReceivablePayableReport:
 				self.skip_total_row = 1
 
 	def get_data(self):
+		# Get return entries
+		self.get_return_entries()
+
 		self.get_ple_entries()
 		self.get_sales_invoices_or_customers_based_on_sales_person()
 		self.voucher_balance = OrderedDict()
@@ -99,9 +106,6 @@ class ReceivablePayableReport:
 		# fetch future payments against invoices
 		self.get_future_payments()
 
-		# Get return entries
-		self.get_return_entries()
-
 		# Get Exchange Rate Revaluations
 		self.get_exchange_rate_revaluations()
 
@@ -765,6 +769,9 @@ class ReceivablePayableReport:
 		else:
 			self.qb_selection_filter.append(self.ple.posting_date.lte(self.filters.report_date))
 
+		if is_payment_ledger_outstanding_built() and self.filters.report_date >= getdate(nowdate()):
+			self.qb_selection_filter.append(self.get_open_vouchers_condition())
+
 		ple = qb.DocType("Payment Ledger Entry")
 		query = (
 			qb.from_(ple)
@@ -804,6 +811,59 @@ class ReceivablePayableReport:
 
 		self.ple_entries = query.run(as_dict=True)
 
+	def get_open_vouchers_condition(self):
+		"""
+		Vouchers that can have an outstanding on the report date, only their entries are fetched
+		instead of the full ledger. Entries posted after the report date are not considered for
+		balances, so the vouchers they are against are included as well.
+		"""
+		common_filter = [
+			self.ple.company == self.filters.company,
+			self.ple.account_type == self.account_type,
+			self.ple.party_type.isin(self.party_type),
+		]
+		if self.filters.get("party"):
+			common_filter.append(self.ple.party.isin(self.filters.get("party")))
+
+		later_ple = qb.DocType("Payment Ledger Entry").as_("later_ple")
+		vouchers = [
+			get_open_vouchers_query(common_filter),
+			qb.from_(later_ple)
+			.select(later_ple.against_voucher_no)
+			.distinct()
+			.where(
+				(later_ple.company == self.filters.company)
+				& (later_ple.account_type == self.account_type)
+				& (later_ple.posting_date > self.filters.report_date)
+				& (later_ple.delinked == 0)
+			),
+		]
+
+		def is_open(field):
+			return Criterion.any([field.isin(query) for query in vouchers])
+
+		# balances against a return are shown against the invoice it was made for
+		doctype = "Sales Invoice" if self.account_type == "Receivable" else "Purchase Invoice"
+		returns = qb.DocType(doctype).as_("returns")
+		returns_query = qb.from_(returns).where(
+			(returns.is_return == 1)
+			& (returns.docstatus == 1)
+			& (returns.company == self.filters.company)
+			& (returns.update_outstanding_for_self == 0)
+		)
+
+		return Criterion.any(
+			[
+				is_open(self.ple.against_voucher_no),
+				self.ple.against_voucher_no.isin(
+					returns_query.select(returns.name).where(is_open(returns.return_against))
+				),
+				self.ple.against_voucher_no.isin(
+					returns_query.select(returns.return_against).where(is_open(returns.name))
+				),
+			]
+		)
+
 	def get_sales_invoices_or_customers_based_on_sales_person(self):
 		if self.filters.get("sales_person"):
 			lft, rgt = frappe.db.get_value("Sales Person", self.filters.get("sales_person"), ["lft", "rgt"])
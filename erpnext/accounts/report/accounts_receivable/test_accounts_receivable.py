@@ -403,6 +403,33 @@ class TestAccountsReceivable(AccountsTestMixin, FrappeTestCase):
 		report = execute(filters)
 		self.assertEqual(report[1], [])
 
+	def test_report_from_payment_ledger_outstanding(self):
+		si = self.create_sales_invoice(no_payment_schedule=True)
+		self.create_payment_entry(si.name)
+		self.create_credit_note(si.name)
+
+		paid_si = self.create_sales_invoice(no_payment_schedule=True)
+		pe = get_payment_entry(paid_si.doctype, paid_si.name, bank_account=self.cash)
+		pe.paid_from = self.debit_to
+		pe.insert().submit()
+
+		filters = {
+			"company": self.company,
+			"report_date": today(),
+			"range1": 30,
+			"range2": 60,
+			"range3": 90,
+			"range4": 120,
+		}
+		expected_data = execute(filters)[1]
+		vouchers = [row.voucher_no for row in expected_data]
+		self.assertIn(si.name, vouchers)
+		self.assertNotIn(paid_si.name, vouchers)
+
+		# only the entries of open vouchers are read, the result stays the same
+		with change_settings("Accounts Settings", {"use_payment_ledger_outstanding": 1}):
+			self.assertEqual(execute(filters)[1], expected_data)
+
 	def test_group_by_party(self):
 		si1 = self.create_sales_invoice(do_not_submit=True)
 		si1.posting_date = add_days(today(), -1)
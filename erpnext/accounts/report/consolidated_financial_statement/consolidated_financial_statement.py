@@ -2,12 +2,15 @@
 # For license information, please see license.txt
 
 
+import hashlib
 from collections import defaultdict
 
 import frappe
 from frappe import _
-from frappe.query_builder import Criterion
+from frappe.query_builder import Case, Criterion
+from frappe.query_builder.functions import Min, Sum
 from frappe.utils import flt, getdate
+from frappe.utils.background_jobs import is_job_enqueued
 
 import erpnext
 from erpnext.accounts.report.balance_sheet.balance_sheet import (
@@ -38,6 +41,10 @@ from erpnext.accounts.report.profit_and_loss_statement.profit_and_loss_statement
 	get_report_summary as get_pl_summary,
 )
 from erpnext.accounts.report.utils import convert, convert_to_presentation_currency
+from erpnext.accounts.utils import get_gl_cache_version
+
+# balances are invalidated on every GL change by the GL cache version, this only bounds the cache size
+GL_CACHE_EXPIRY = 24 * 60 * 60
 
 
 def execute(filters=None):
@@ -336,24 +343,21 @@ def get_data(companies, root_type, balance_must_be, fiscal_year, filters=None, i
 	filters.end_date = end_date
 
 	gl_entries_by_account = {}
-	for root in frappe.db.sql(
-		"""select lft, rgt from tabAccount
-			where root_type=%s and ifnull(parent_account, '') = ''""",
-		root_type,
-		as_dict=1,
-	):
-		set_gl_entries_by_account(
-			start_date,
-			end_date,
-			root.lft,
-			root.rgt,
-			filters,
-			gl_entries_by_account,
-			accounts_by_name,
-			accounts,
-			ignore_closing_entries=False,
-			root_type=root_type,
-		)
+	set_gl_entries_by_account(
+		start_date,
+		end_date,
+		filters,
+		gl_entries_by_account,
+		accounts_by_name,
+		accounts,
+		ignore_closing_entries=False,
+		root_type=root_type,
+		period_start_date=(
+			fiscal_year.year_start_date
+			if filters.filter_based_on == "Fiscal Year"
+			else filters.period_start_date
+		),
+	)
 
 	calculate_values(accounts_by_name, gl_entries_by_account, companies, filters, fiscal_year)
 	accumulate_values_into_parents(accounts, accounts_by_name, companies)
@@ -584,14 +588,13 @@ def prepare_data(accounts, start_date, end_date, balance_must_be, companies, com
 def set_gl_entries_by_account(
 	from_date,
 	to_date,
-	root_lft,
-	root_rgt,
 	filters,
 	gl_entries_by_account,
 	accounts_by_name,
 	accounts,
 	ignore_closing_entries=False,
 	root_type=None,
+	period_start_date=None,
 ):
 	"""Returns a dict like { "account": [gl entries], ... }"""
 
@@ -611,43 +614,18 @@ def set_gl_entries_by_account(
 		{"report_date": to_date, "presentation_currency": filters.get("presentation_currency")}
 	)
 
-	for d in companies:
-		gle = frappe.qb.DocType("GL Entry")
-		account = frappe.qb.DocType("Account")
-		query = (
-			frappe.qb.from_(gle)
-			.inner_join(account)
-			.on(account.name == gle.account)
-			.select(
-				gle.posting_date,
-				gle.account,
-				gle.debit,
-				gle.credit,
-				gle.is_opening,
-				gle.company,
-				gle.fiscal_year,
-				gle.debit_in_account_currency,
-				gle.credit_in_account_currency,
-				gle.account_currency,
-				account.account_name,
-				account.account_number,
-			)
-			.where(
-				(gle.company == d.name)
-				& (gle.is_cancelled == 0)
-				& (gle.posting_date <= to_date)
-				& (account.lft >= root_lft)
-				& (account.rgt <= root_rgt)
-			)
-			.orderby(gle.account, gle.posting_date)
-		)
+	args = frappe._dict(
+		from_date=from_date,
+		to_date=to_date,
+		filters=filters,
+		ignore_closing_entries=ignore_closing_entries,
+		root_type=root_type,
+		period_start_date=period_start_date,
+	)
+	gl_entries_by_company = get_gl_entries_by_company([d.name for d in companies], args)
 
-		if root_type:
-			query = query.where(account.root_type == root_type)
-		additional_conditions = get_additional_conditions(from_date, ignore_closing_entries, filters, d)
-		if additional_conditions:
-			query = query.where(Criterion.all(additional_conditions))
-		gl_entries = query.run(as_dict=True)
+	for d in companies:
+		gl_entries = gl_entries_by_company[d.name]
 
 		if filters and filters.get("presentation_currency") != d.default_currency:
 			currency_info["company"] = d.name
@@ -666,6 +644,115 @@ def set_gl_entries_by_account(
 	return gl_entries_by_account
 
 
+def get_gl_entries_by_company(companies, args):
+	"""
+	GL balances of each of `companies`. Companies without cached balances are computed by
+	background jobs in parallel while the request works through them from the other end, so
+	neither waits for the other.
+	"""
+
+	queries = {company: get_company_gl_query(company, args) for company in companies}
+	gl_entries_by_company = {}
+	pending = []
+
+	for company in companies:
+		gl_entries = get_cached_company_gl_entries(company, queries[company])
+		if gl_entries is None:
+			pending.append(company)
+		else:
+			gl_entries_by_company[company] = gl_entries
+
+	if len(pending) > 1:
+		for company in pending[:-1]:
+			job_id = "consolidated_financial_statement::" + get_cache_key(company, queries[company])
+			if not is_job_enqueued(job_id):
+				frappe.enqueue(
+					compute_company_gl_entries,
+					queue="short",
+					job_id=job_id,
+					company=company,
+					args=args,
+					now=frappe.flags.in_test,
+				)
+
+	for company in reversed(pending):
+		gl_entries = get_cached_company_gl_entries(company, queries[company])
+		if gl_entries is None:
+			gl_entries = compute_company_gl_entries(company, args)
+		gl_entries_by_company[company] = gl_entries
+
+	# entries are returned uncached so that currency conversion does not alter the cached values
+	return {
+		company: [frappe._dict(entry) for entry in gl_entries_by_company[company]] for company in companies
+	}
+
+
+def compute_company_gl_entries(company, args):
+	query = get_company_gl_query(company, args)
+	# keyed on the version before the query, changes made meanwhile leave the entries stale
+	cache_key = get_cache_key(company, query)
+	gl_entries = query.run(as_dict=True)
+
+	frappe.cache().set_value(cache_key, gl_entries, expires_in_sec=GL_CACHE_EXPIRY)
+
+	return gl_entries
+
+
+def get_cached_company_gl_entries(company, query):
+	return frappe.cache().get_value(get_cache_key(company, query))
+
+
+def get_cache_key(company, query):
+	key = f"{company}:{get_gl_cache_version(company)}:{query}"
+	return "consolidated_financial_statement:" + hashlib.sha1(key.encode()).hexdigest()
+
+
+def get_company_gl_query(company, args):
+	"""GL balances of `company` per account, split into before and within the period"""
+
+	gle = frappe.qb.DocType("GL Entry")
+	account = frappe.qb.DocType("Account")
+	is_opening_balance = Case().when(gle.posting_date < args.period_start_date, 1).else_(0)
+
+	query = (
+		frappe.qb.from_(gle)
+		.inner_join(account)
+		.on(account.name == gle.account)
+		.select(
+			Min(gle.posting_date).as_("posting_date"),
+			gle.account,
+			Sum(gle.debit).as_("debit"),
+			Sum(gle.credit).as_("credit"),
+			gle.company,
+			Sum(gle.debit_in_account_currency).as_("debit_in_account_currency"),
+			Sum(gle.credit_in_account_currency).as_("credit_in_account_currency"),
+			gle.account_currency,
+			account.account_name,
+			account.account_number,
+		)
+		.where((gle.company == company) & (gle.is_cancelled == 0) & (gle.posting_date <= args.to_date))
+		.groupby(
+			gle.account,
+			gle.company,
+			gle.account_currency,
+			account.account_name,
+			account.account_number,
+			is_opening_balance,
+		)
+		.orderby(gle.account)
+	)
+
+	if args.root_type:
+		query = query.where(account.root_type == args.root_type)
+	additional_conditions = get_additional_conditions(
+		args.from_date, args.ignore_closing_entries, args.filters, frappe._dict(name=company)
+	)
+	if additional_conditions:
+		query = query.where(Criterion.all(additional_conditions))
+
+	return query
+
+
 def get_account_details(account):
 	return frappe.get_cached_value(
 		"Account",
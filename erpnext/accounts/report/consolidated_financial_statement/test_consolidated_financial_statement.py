@@ -0,0 +1,42 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# MIT License. See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt, today
+
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.report.consolidated_financial_statement.consolidated_financial_statement import (
+	execute,
+)
+from erpnext.accounts.utils import get_fiscal_year
+
+
+class TestConsolidatedFinancialStatement(FrappeTestCase):
+	def test_cached_balances_follow_gl_entries(self):
+		fiscal_year = get_fiscal_year(today(), company="_Test Company")[0]
+		filters = frappe._dict(
+			company="_Test Company",
+			filter_based_on="Fiscal Year",
+			from_fiscal_year=fiscal_year,
+			to_fiscal_year=fiscal_year,
+			report="Balance Sheet",
+			presentation_currency="INR",
+			include_default_book_entries=1,
+		)
+		balance = get_balance(filters, "_Test Bank")
+
+		# the second run is served from the cache, posting must invalidate it
+		self.assertEqual(get_balance(filters, "_Test Bank"), balance)
+		jv = make_journal_entry(
+			"_Test Bank - _TC", "_Test Cash - _TC", 100, posting_date=today(), submit=True
+		)
+		self.assertEqual(get_balance(filters, "_Test Bank"), balance + 100)
+
+		jv.cancel()
+		self.assertEqual(get_balance(filters, "_Test Bank"), balance)
+
+
+def get_balance(filters, account_name):
+	data = execute(frappe._dict(filters))[1]
+	return sum(flt(row.get("total")) for row in data if row.get("account_name") == account_name)
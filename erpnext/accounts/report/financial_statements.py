@@ -2,18 +2,23 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import bisect
 import functools
 import math
 import re
 
 import frappe
 from frappe import _
+from frappe.query_builder.functions import Sum
 from frappe.utils import add_days, add_months, cint, cstr, flt, formatdate, get_first_day, getdate
 
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimension_with_children,
 )
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	is_daily_account_balance_built,
+)
 from erpnext.accounts.report.utils import convert_to_presentation_currency, get_currency
 from erpnext.accounts.utils import get_fiscal_year
 
@@ -226,7 +231,14 @@ def calculate_values(
 	accumulated_values,
 	ignore_accumulated_values_for_fy,
 ):
+	# periods are ordered, so the first period an entry falls in is found by bisecting their end dates
+	to_dates = [period.to_date for period in period_list]
+	year_start_date = period_list[0].year_start_date
+
 	for entries in gl_entries_by_account.values():
+		# net amount posted in each period, per fiscal year if it does not accumulate across years
+		period_amounts = {}
+
 		for entry in entries:
 			d = accounts_by_name.get(entry.account)
 			if not d:
@@ -235,32 +247,56 @@ def calculate_values(
 					title="Error",
 					raise_exception=1,
 				)
-			for period in period_list:
-				# check if posting date is within the period
 
-				if entry.posting_date <= period.to_date:
-					if (accumulated_values or entry.posting_date >= period.from_date) and (
-						not ignore_accumulated_values_for_fy
-						or entry.fiscal_year == period.to_date_fiscal_year
-					):
-						d[period.key] = d.get(period.key, 0.0) + flt(entry.debit) - flt(entry.credit)
+			amount = flt(entry.debit) - flt(entry.credit)
+			idx = bisect.bisect_left(to_dates, entry.posting_date)
+
+			if idx < len(period_list) and (
+				accumulated_values or entry.posting_date >= period_list[idx].from_date
+			):
+				fiscal_year = entry.fiscal_year if ignore_accumulated_values_for_fy else None
+				amounts = period_amounts.setdefault((entry.account, fiscal_year), [None] * len(period_list))
+				amounts[idx] = (amounts[idx] or 0.0) + amount
 
-			if entry.posting_date < period_list[0].year_start_date:
-				d["opening_balance"] = d.get("opening_balance", 0.0) + flt(entry.debit) - flt(entry.credit)
+			if entry.posting_date < year_start_date:
+				d["opening_balance"] = d.get("opening_balance", 0.0) + amount
+
+		for (account, fiscal_year), amounts in period_amounts.items():
+			d = accounts_by_name[account]
+			balance = None
+
+			for period, amount in zip(period_list, amounts, strict=True):
+				if not accumulated_values:
+					balance = amount
+				elif amount is not None:
+					balance = (balance or 0.0) + amount
+
+				if balance is None or (
+					ignore_accumulated_values_for_fy and period.to_date_fiscal_year != fiscal_year
+				):
+					continue
+
+				d[period.key] = d.get(period.key, 0.0) + balance
 
 
 def accumulate_values_into_parents(accounts, accounts_by_name, period_list):
 	"""accumulate children's values in parent accounts"""
-	for d in reversed(accounts):
-		if d.parent_account:
-			for period in period_list:
-				accounts_by_name[d.parent_account][period.key] = accounts_by_name[d.parent_account].get(
-					period.key, 0.0
-				) + d.get(period.key, 0.0)
 
-			accounts_by_name[d.parent_account]["opening_balance"] = accounts_by_name[d.parent_account].get(
-				"opening_balance", 0.0
-			) + d.get("opening_balance", 0.0)
+	# in lft order, the descendants of an account are the accounts after it up to its rgt,
+	# so its total is a difference of prefix sums over that range
+	accounts = sorted(accounts, key=lambda d: d.lft)
+	lfts = [d.lft for d in accounts]
+	ends = [bisect.bisect_left(lfts, d.rgt, lo=idx + 1) for idx, d in enumerate(accounts)]
+	keys = list(dict.fromkeys([period.key for period in period_list] + ["opening_balance"]))
+
+	for key in keys:
+		prefix_sums = [0.0]
+		for d in accounts:
+			prefix_sums.append(prefix_sums[-1] + d.get(key, 0.0))
+
+		for idx, d in enumerate(accounts):
+			if ends[idx] > idx + 1:
+				d[key] = prefix_sums[ends[idx]] - prefix_sums[idx]
 
 
 def prepare_data(accounts, balance_must_be, period_list, company_currency, accumulated_values):
@@ -481,7 +517,7 @@ def set_gl_entries_by_account(
 				ignore_opening_entries = True
 
 		gl_entries += get_accounting_entries(
-			"GL Entry",
+			"Daily Account Balance" if is_daily_account_balance_built() else "GL Entry",
 			from_date,
 			to_date,
 			accounts_list,
@@ -510,24 +546,35 @@ def get_accounting_entries(
 	ignore_opening_entries=False,
 ):
 	gl_entry = frappe.qb.DocType(doctype)
+	amount_fields = ["debit", "credit", "debit_in_account_currency", "credit_in_account_currency"]
+
+	if doctype == "Daily Account Balance":
+		# balances are kept per dimension, sum them up after applying the dimension filters
+		amounts = [Sum(gl_entry[fieldname]).as_(fieldname) for fieldname in amount_fields]
+	else:
+		amounts = [gl_entry[fieldname] for fieldname in amount_fields]
+
 	query = (
 		frappe.qb.from_(gl_entry)
-		.select(
-			gl_entry.account,
-			gl_entry.debit,
-			gl_entry.credit,
-			gl_entry.debit_in_account_currency,
-			gl_entry.credit_in_account_currency,
-			gl_entry.account_currency,
-		)
+		.select(gl_entry.account, *amounts, gl_entry.account_currency)
 		.where(gl_entry.company == filters.company)
 	)
 
-	if doctype == "GL Entry":
+	if doctype in ("GL Entry", "Daily Account Balance"):
 		query = query.select(gl_entry.posting_date, gl_entry.is_opening, gl_entry.fiscal_year)
-		query = query.where(gl_entry.is_cancelled == 0)
 		query = query.where(gl_entry.posting_date <= to_date)
 
+		if doctype == "GL Entry":
+			query = query.where(gl_entry.is_cancelled == 0)
+		else:
+			query = query.groupby(
+				gl_entry.account,
+				gl_entry.account_currency,
+				gl_entry.posting_date,
+				gl_entry.is_opening,
+				gl_entry.fiscal_year,
+			)
+
 		if ignore_opening_entries:
 			query = query.where(gl_entry.is_opening == "No")
 	else:
@@ -552,7 +599,7 @@ def apply_additional_conditions(doctype, query, from_date, ignore_closing_entrie
 		else:
 			query = query.where(gl_entry.is_period_closing_voucher_entry == 0)
 
-	if from_date and doctype == "GL Entry":
+	if from_date and doctype != "Account Closing Balance":
 		query = query.where(gl_entry.posting_date >= from_date)
 
 	if filters:
@@ -2,11 +2,13 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import csv
 from collections import OrderedDict
+from itertools import islice
 
 import frappe
 from frappe import _, _dict
-from frappe.utils import cstr, getdate
+from frappe.utils import cint, cstr, getdate
 
 from erpnext import get_company_currency, get_default_company
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
@@ -14,7 +16,12 @@ from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_dimension_with_children,
 )
 from erpnext.accounts.report.financial_statements import get_cost_centers_with_children
-from erpnext.accounts.report.utils import convert_to_presentation_currency, get_currency
+from erpnext.accounts.report.utils import (
+	convert_entry_to_presentation_currency,
+	convert_to_presentation_currency,
+	get_currency,
+	get_rate_as_at,
+)
 from erpnext.accounts.utils import get_account_currency
 
 # to cache translations
@@ -158,6 +165,27 @@ def get_result(filters, account_details):
 
 def get_gl_entries(filters, accounting_dimensions):
 	currency_map = get_currency(filters)
+
+	if filters.get("include_default_book_entries"):
+		filters["company_fb"] = frappe.get_cached_value(
+			"Company", filters.get("company"), "default_finance_book"
+		)
+
+	gl_entries = frappe.db.sql(
+		get_gl_entries_query(filters, accounting_dimensions, get_conditions(filters)),
+		filters,
+		as_dict=1,
+	)
+
+	if filters.get("presentation_currency"):
+		return convert_to_presentation_currency(gl_entries, currency_map)
+	else:
+		return gl_entries
+
+
+def get_gl_entries_query(
+	filters, accounting_dimensions, conditions, order_by_statement=None, extra_fields=""
+):
 	select_fields = """, debit, credit, debit_in_account_currency,
 		credit_in_account_currency """
 
@@ -167,20 +195,16 @@ def get_gl_entries(filters, accounting_dimensions):
 		else:
 			select_fields += """,remarks"""
 
-	order_by_statement = "order by posting_date, account, creation"
-
-	if filters.get("include_dimensions"):
-		order_by_statement = "order by posting_date, creation"
+	if not order_by_statement:
+		order_by_statement = "order by posting_date, account, creation"
 
-	if filters.get("group_by") == "Group by Voucher":
-		order_by_statement = "order by posting_date, voucher_type, voucher_no"
-	if filters.get("group_by") == "Group by Account":
-		order_by_statement = "order by account, posting_date, creation"
+		if filters.get("include_dimensions"):
+			order_by_statement = "order by posting_date, creation"
 
-	if filters.get("include_default_book_entries"):
-		filters["company_fb"] = frappe.get_cached_value(
-			"Company", filters.get("company"), "default_finance_book"
-		)
+		if filters.get("group_by") == "Group by Voucher":
+			order_by_statement = "order by posting_date, voucher_type, voucher_no"
+		if filters.get("group_by") == "Group by Account":
+			order_by_statement = "order by account, posting_date, creation"
 
 	dimension_fields = ""
 	if accounting_dimensions:
@@ -192,26 +216,17 @@ def get_gl_entries(filters, accounting_dimensions):
 			"debit_in_transaction_currency, credit_in_transaction_currency, transaction_currency,"
 		)
 
-	gl_entries = frappe.db.sql(
-		f"""
+	return f"""
 		select
 			name as gl_entry, posting_date, account, party_type, party,
 			voucher_type, voucher_subtype, voucher_no, {dimension_fields}
 			cost_center, project, {transaction_currency_fields}
 			against_voucher_type, against_voucher, account_currency,
-			against, is_opening, creation {select_fields}
+			against, is_opening, creation {select_fields} {extra_fields}
 		from `tabGL Entry`
-		where company=%(company)s {get_conditions(filters)}
+		where company=%(company)s {conditions}
 		{order_by_statement}
-	""",
-		filters,
-		as_dict=1,
-	)
-
-	if filters.get("presentation_currency"):
-		return convert_to_presentation_currency(gl_entries, currency_map)
-	else:
-		return gl_entries
+	"""
 
 
 def get_conditions(filters):
@@ -418,43 +433,12 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map):
 	group_by = group_by_field(filters.get("group_by"))
 	group_by_voucher_consolidated = filters.get("group_by") == "Group by Voucher (Consolidated)"
 
+	account_type_map = None
 	if filters.get("show_net_values_in_party_account"):
 		account_type_map = get_account_type_map(filters.get("company"))
 
 	def update_value_in_dict(data, key, gle):
-		data[key].debit += gle.debit
-		data[key].credit += gle.credit
-
-		data[key].debit_in_account_currency += gle.debit_in_account_currency
-		data[key].credit_in_account_currency += gle.credit_in_account_currency
-
-		if filters.get("add_values_in_transaction_currency") and key not in ["opening", "closing", "total"]:
-			data[key].debit_in_transaction_currency += gle.debit_in_transaction_currency
-			data[key].credit_in_transaction_currency += gle.credit_in_transaction_currency
-
-		if filters.get("show_net_values_in_party_account") and account_type_map.get(data[key].account) in (
-			"Receivable",
-			"Payable",
-		):
-			net_value = data[key].debit - data[key].credit
-			net_value_in_account_currency = (
-				data[key].debit_in_account_currency - data[key].credit_in_account_currency
-			)
-
-			if net_value < 0:
-				dr_or_cr = "credit"
-				rev_dr_or_cr = "debit"
-			else:
-				dr_or_cr = "debit"
-				rev_dr_or_cr = "credit"
-
-			data[key][dr_or_cr] = abs(net_value)
-			data[key][dr_or_cr + "_in_account_currency"] = abs(net_value_in_account_currency)
-			data[key][rev_dr_or_cr] = 0
-			data[key][rev_dr_or_cr + "_in_account_currency"] = 0
-
-		if data[key].against_voucher and gle.against_voucher:
-			data[key].against_voucher += ", " + gle.against_voucher
+		add_to_totals(data, key, gle, filters, account_type_map)
 
 	from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
 	show_opening_entries = filters.get("show_opening_entries")
@@ -510,6 +494,39 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map):
 	return totals, entries
 
 
+def add_to_totals(data, key, gle, filters, account_type_map=None):
+	data[key].debit += gle.debit
+	data[key].credit += gle.credit
+
+	data[key].debit_in_account_currency += gle.debit_in_account_currency
+	data[key].credit_in_account_currency += gle.credit_in_account_currency
+
+	if filters.get("add_values_in_transaction_currency") and key not in ["opening", "closing", "total"]:
+		data[key].debit_in_transaction_currency += gle.debit_in_transaction_currency
+		data[key].credit_in_transaction_currency += gle.credit_in_transaction_currency
+
+	if account_type_map and account_type_map.get(data[key].account) in ("Receivable", "Payable"):
+		net_value = data[key].debit - data[key].credit
+		net_value_in_account_currency = (
+			data[key].debit_in_account_currency - data[key].credit_in_account_currency
+		)
+
+		if net_value < 0:
+			dr_or_cr = "credit"
+			rev_dr_or_cr = "debit"
+		else:
+			dr_or_cr = "debit"
+			rev_dr_or_cr = "credit"
+
+		data[key][dr_or_cr] = abs(net_value)
+		data[key][dr_or_cr + "_in_account_currency"] = abs(net_value_in_account_currency)
+		data[key][rev_dr_or_cr] = 0
+		data[key][rev_dr_or_cr + "_in_account_currency"] = 0
+
+	if data[key].against_voucher and gle.against_voucher:
+		data[key].against_voucher += ", " + gle.against_voucher
+
+
 def get_account_type_map(company):
 	account_type_map = frappe._dict(
 		frappe.get_all("Account", fields=["name", "account_type"], filters={"company": company}, as_list=1)
@@ -672,3 +689,340 @@ def get_columns(filters):
 		columns.extend([{"label": _("Remarks"), "fieldname": "remarks", "width": 400}])
 
 	return columns
+
+
+class GeneralLedgerStream:
+	"""
+	Yields the rows of the General Ledger report one at a time.
+
+	GL Entries of the period are read through an unbuffered cursor, ordered by the group, and
+	the opening, total and closing rows and running balances are computed while iterating.
+	Only the openings of the groups are held in memory.
+	"""
+
+	def __init__(self, filters, limit=None):
+		self.filters = frappe._dict(filters)
+		self.limit = limit
+
+		if self.filters.get("print_in_account_currency") and not self.filters.get("account"):
+			frappe.throw(_("Select an account to print in account currency"))
+
+		account_details = {}
+		for acc in frappe.db.sql("""select name, is_group from tabAccount""", as_dict=1):
+			account_details.setdefault(acc.name, acc)
+
+		if self.filters.get("party"):
+			self.filters.party = frappe.parse_json(self.filters.get("party"))
+
+		validate_filters(self.filters, account_details)
+		validate_party(self.filters)
+		self.filters = set_account_currency(self.filters)
+		update_translations()
+
+		self.group_by = self.filters.get("group_by")
+		self.accounting_dimensions = []
+		if self.filters.get("include_dimensions"):
+			self.accounting_dimensions = get_accounting_dimensions()
+
+		if self.filters.get("include_default_book_entries"):
+			self.filters["company_fb"] = frappe.get_cached_value(
+				"Company", self.filters.get("company"), "default_finance_book"
+			)
+
+		self.conditions = get_conditions(self.filters)
+		self.opening_condition = "(posting_date < %(from_date)s or is_opening = 'Yes')"
+		if self.filters.get("show_opening_entries"):
+			self.opening_condition = "posting_date < %(from_date)s"
+
+		self.prepare_caches()
+		self.group_openings = self.get_group_openings()
+
+	def prepare_caches(self):
+		"""Everything read from the database while the cursor is open has to be fetched upfront"""
+
+		self.account_type_map = None
+		if self.filters.get("show_net_values_in_party_account"):
+			self.account_type_map = get_account_type_map(self.filters.get("company"))
+
+		self.currency_info = None
+		if self.filters.get("presentation_currency"):
+			self.currency_info = get_currency(self.filters)
+			self.account_currencies = frappe.db.sql_list(
+				f"""select distinct account_currency from `tabGL Entry`
+				where company=%(company)s {self.conditions}""",
+				self.filters,
+			)
+			get_rate_as_at(
+				self.currency_info["report_date"],
+				self.currency_info["presentation_currency"],
+				self.currency_info["company_currency"],
+			)
+
+		# HACK: avoids a db query in flt and translations while the cursor is open
+		frappe.get_cached_doc("System Settings")
+		_("Opening")
+
+	def get_group_openings(self):
+		"""Opening of every account or party, a single overall opening for the other groupings"""
+
+		group_field, group_by = "''", "account_currency"
+		if self.group_by in ("Group by Account", "Group by Party"):
+			group_field = group_by_field(self.group_by)
+			group_by = f"{group_field}, account_currency"
+
+		openings = {}
+		for d in frappe.db.sql(
+			f"""
+			select {group_field} as group_key, account_currency,
+				sum(debit) as debit, sum(credit) as credit,
+				sum(debit_in_account_currency) as debit_in_account_currency,
+				sum(credit_in_account_currency) as credit_in_account_currency
+			from `tabGL Entry`
+			where company=%(company)s {self.conditions} and {self.opening_condition}
+			group by {group_by}
+		""",
+			self.filters,
+			as_dict=1,
+		):
+			self.convert_currency(d)
+			opening = openings.setdefault(d.group_key, get_totals_dict().opening)
+			add_to_totals({"opening": opening}, "opening", d, self.filters)
+
+		return openings
+
+	def convert_currency(self, gle):
+		if self.currency_info:
+			convert_entry_to_presentation_currency(gle, self.currency_info, self.account_currencies)
+
+	def get_order_by_statement(self):
+		if self.group_by in ("Group by Account", "Group by Party"):
+			return f"order by {group_by_field(self.group_by)}, posting_date, creation"
+
+		if self.group_by == "Group by Voucher (Consolidated)":
+			fields = ["posting_date", "voucher_type", "voucher_no", "account", "party_type", "party"]
+			if self.filters.get("include_dimensions"):
+				fields += [*self.accounting_dimensions, "cost_center"]
+
+			return "order by {}, creation".format(", ".join(fields))
+
+		return "order by posting_date, voucher_type, voucher_no, creation"
+
+	def get_gl_entries(self):
+		bill_no = """, (select bill_no from `tabPurchase Invoice` pi
+			where pi.name = `tabGL Entry`.against_voucher and pi.docstatus = 1) as bill_no"""
+
+		query = get_gl_entries_query(
+			self.filters,
+			self.accounting_dimensions,
+			f"{self.conditions} and not {self.opening_condition}",
+			self.get_order_by_statement(),
+			extra_fields=bill_no,
+		)
+		if self.limit:
+			query += f" limit {cint(self.limit)}"
+
+		for gle in frappe.db.sql(query, self.filters, as_dict=1, as_iterator=True):
+			gle.voucher_subtype = _(gle.voucher_subtype)
+			gle.against_voucher_type = _(gle.against_voucher_type)
+			gle.remarks = _(gle.remarks)
+			gle.party_type = _(gle.party_type)
+			gle.bill_no = gle.bill_no or ""
+			self.convert_currency(gle)
+
+			yield gle
+
+	def __iter__(self):
+		totals = get_totals_dict()
+		for opening in self.group_openings.values():
+			add_to_totals(totals, "opening", opening, self.filters)
+			add_to_totals(totals, "closing", opening, self.filters)
+
+		with frappe.db.unbuffered_cursor():
+			yield from self.set_balance([totals.opening])
+
+			if self.group_by == "Group by Voucher (Consolidated)":
+				rows = self.get_consolidated_entries(totals)
+			else:
+				rows = self.get_grouped_entries(totals)
+
+			yield from self.set_balance(rows)
+
+		yield from self.set_balance([totals.total, totals.closing])
+
+	def get_grouped_entries(self, totals):
+		group_by = group_by_field(self.group_by)
+		show_group_opening = self.group_by != "Group by Voucher"
+		group_totals, group_key = None, None
+
+		for gle in self.get_gl_entries():
+			if group_totals is None or gle.get(group_by) != group_key:
+				if group_totals:
+					yield from self.get_group_closing_rows(group_totals, show_group_opening)
+
+				group_key = gle.get(group_by)
+				group_totals = get_totals_dict()
+				if opening := self.group_openings.get(group_key):
+					add_to_totals(group_totals, "opening", opening, self.filters)
+					add_to_totals(group_totals, "closing", opening, self.filters)
+
+				yield {"debit_in_transaction_currency": None, "credit_in_transaction_currency": None}
+				if show_group_opening:
+					yield group_totals.opening
+
+			for data in (group_totals, totals):
+				add_to_totals(data, "total", gle, self.filters)
+				add_to_totals(data, "closing", gle, self.filters)
+
+			yield gle
+
+		if group_totals:
+			yield from self.get_group_closing_rows(group_totals, show_group_opening)
+
+		yield {"debit_in_transaction_currency": None, "credit_in_transaction_currency": None}
+
+	def get_group_closing_rows(self, group_totals, show_group_opening):
+		yield group_totals.total
+		if show_group_opening:
+			yield group_totals.closing
+
+	def get_consolidated_entries(self, totals):
+		fields = ["voucher_type", "voucher_no", "account", "party_type", "party"]
+		if self.filters.get("include_dimensions"):
+			fields += [*self.accounting_dimensions, "cost_center"]
+
+		consolidated, consolidated_key = None, None
+		for gle in self.get_gl_entries():
+			key = tuple(gle.get(field) for field in fields)
+			if consolidated and key == consolidated_key:
+				add_to_totals({"entry": consolidated}, "entry", gle, self.filters, self.account_type_map)
+				continue
+
+			if consolidated:
+				yield self.add_consolidated_entry(consolidated, totals)
+
+			consolidated, consolidated_key = gle, key
+
+		if consolidated:
+			yield self.add_consolidated_entry(consolidated, totals)
+
+	def add_consolidated_entry(self, entry, totals):
+		if ", " in cstr(entry.against_voucher):
+			entry.bill_no = ""
+
+		add_to_totals(totals, "total", entry, self.filters)
+		add_to_totals(totals, "closing", entry, self.filters)
+		return entry
+
+	def set_balance(self, rows):
+		"""Running balance as in `get_result_as_list`, rows without a posting date start afresh"""
+
+		balance = 0
+		for row in rows:
+			if not row.get("posting_date"):
+				balance = 0
+
+			balance = get_balance(row, balance, "debit", "credit")
+			row["balance"] = balance
+			row["account_currency"] = self.filters.account_currency
+			row.setdefault("bill_no", "")
+
+			yield row
+
+
+@frappe.whitelist()
+def get_general_ledger_page(filters, start=0, page_length=500):
+	"""Return a page of the General Ledger report without building the complete report"""
+
+	check_report_permission()
+
+	filters = frappe._dict(frappe.parse_json(filters))
+	start, page_length = cint(start), cint(page_length)
+
+	# every page row past the first needs at most one GL Entry, so the rest is never read
+	stream = GeneralLedgerStream(filters, limit=start + page_length)
+	rows = iter(stream)
+	result = list(islice(rows, start, start + page_length))
+	rows.close()
+
+	return {"columns": get_columns(stream.filters), "result": result}
+
+
+@frappe.whitelist()
+def export_general_ledger(filters, file_format="CSV"):
+	"""Write the complete General Ledger report to a private file in the background"""
+
+	check_report_permission()
+
+	if file_format not in ("CSV", "Excel"):
+		frappe.throw(_("File format must be either CSV or Excel"))
+
+	frappe.enqueue(
+		"erpnext.accounts.report.general_ledger.general_ledger.write_general_ledger_file",
+		queue="long",
+		timeout=3600,
+		filters=frappe.parse_json(filters),
+		file_format=file_format,
+		user=frappe.session.user,
+		enqueue_after_commit=True,
+	)
+
+	frappe.msgprint(_("General Ledger export has been queued, you will be notified once the file is ready."))
+
+
+def check_report_permission():
+	if not frappe.get_cached_doc("Report", "General Ledger").is_permitted():
+		frappe.throw(_("You are not permitted to access the General Ledger"), frappe.PermissionError)
+
+
+def write_general_ledger_file(filters, file_format, user):
+	stream = GeneralLedgerStream(filters)
+	columns = get_columns(stream.filters)
+	fieldnames = [d["fieldname"] for d in columns]
+
+	extension = "csv" if file_format == "CSV" else "xlsx"
+	file_name = f"general-ledger-{frappe.generate_hash(length=10)}.{extension}"
+	path = frappe.get_site_path("private", "files", file_name)
+
+	def get_values(row):
+		values = []
+		for fieldname in fieldnames:
+			value = row.get(fieldname)
+			if fieldname == "account" and value:
+				# labels of the opening, total and closing rows are quoted for the report view
+				value = value.strip("'")
+
+			values.append("" if value is None else value)
+
+		return values
+
+	header = [d["label"] for d in columns]
+	if file_format == "CSV":
+		with open(path, "w", newline="", encoding="utf-8") as f:
+			writer = csv.writer(f)
+			writer.writerow(header)
+			for row in stream:
+				writer.writerow(get_values(row))
+	else:
+		from openpyxl import Workbook
+
+		wb = Workbook(write_only=True)
+		ws = wb.create_sheet(_("General Ledger"))
+		ws.append(header)
+		for row in stream:
+			ws.append(get_values(row))
+		wb.save(path)
+
+	file = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+		}
+	).insert(ignore_permissions=True)
+
+	frappe.publish_realtime(
+		"msgprint",
+		_("General Ledger export is ready: {0}").format(f'<a href="{file.file_url}">{file.file_name}</a>'),
+		user=user,
+	)
@@ -3,9 +3,10 @@
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
-from frappe.utils import flt, today
+from frappe.utils import add_days, cstr, flt, today
 
-from erpnext.accounts.report.general_ledger.general_ledger import execute
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.report.general_ledger.general_ledger import GeneralLedgerStream, execute
 
 
 class TestGeneralLedger(FrappeTestCase):
@@ -248,3 +249,38 @@ class TestGeneralLedger(FrappeTestCase):
 			)
 		)
 		self.assertIn(revaluation_jv.name, set([x.voucher_no for x in data]))
+
+	def test_streamed_general_ledger(self):
+		accounts = ["_Test Bank - _TC", "_Test Cash - _TC"]
+		make_journal_entry(accounts[0], accounts[1], 100, posting_date=add_days(today(), -10), submit=True)
+		make_journal_entry(accounts[0], accounts[1], 40, posting_date=today(), submit=True)
+		make_journal_entry(accounts[1], accounts[0], 15, posting_date=today(), submit=True)
+
+		filters = {
+			"company": "_Test Company",
+			"from_date": add_days(today(), -5),
+			"to_date": today(),
+			"account": ["Cash In Hand - _TC", "Bank Accounts - _TC"],
+			"group_by": "Group by Account",
+		}
+		columns, data = execute(frappe._dict(filters))
+		streamed = list(GeneralLedgerStream(filters))
+
+		self.assertEqual(len(streamed), len(data))
+		for row, streamed_row in zip(data, streamed, strict=True):
+			self.assertEqual(row.get("account"), streamed_row.get("account"))
+			self.assertEqual(row.get("voucher_no"), streamed_row.get("voucher_no"))
+			for fieldname in ("debit", "credit", "balance"):
+				self.assertAlmostEqual(flt(row.get(fieldname)), flt(streamed_row.get(fieldname)))
+
+		# consolidated vouchers are streamed in voucher order, the rows and totals are the same
+		filters.update({"account": accounts, "group_by": "Group by Voucher (Consolidated)"})
+		columns, data = execute(frappe._dict(filters))
+		streamed = list(GeneralLedgerStream(filters))
+
+		def get_rows(rows):
+			return sorted((cstr(d.get("voucher_no")), d.get("account"), flt(d.get("debit"), 2)) for d in rows)
+
+		self.assertEqual(get_rows(streamed), get_rows(data))
+		for row, streamed_row in zip(data[-2:], streamed[-2:], strict=True):
+			self.assertAlmostEqual(flt(row.get("balance")), flt(streamed_row.get("balance")))
@@ -6,10 +6,11 @@ from collections import OrderedDict
 import frappe
 from frappe import _, qb, scrub
 from frappe.query_builder import Order
-from frappe.utils import cint, flt, formatdate
+from frappe.utils import cint, create_batch, flt, formatdate
 
 from erpnext.controllers.queries import get_match_cond
 from erpnext.stock.report.stock_ledger.stock_ledger import get_item_group_condition
+from erpnext.stock.stock_ledger import get_previous_sle
 from erpnext.stock.utils import get_incoming_rate
 
 
@@ -396,11 +397,13 @@ def get_column_names():
 class GrossProfitGenerator:
 	def __init__(self, filters=None):
 		self.sle = {}
+		self.items_with_sle = {}
 		self.data = []
 		self.average_buying_rate = {}
 		self.filters = frappe._dict(filters)
 		self.load_invoice_items()
 		self.get_delivery_notes()
+		self.load_stock_ledger_entries()
 
 		if filters.group_by == "Invoice":
 			self.group_items_by_invoice()
@@ -617,21 +620,33 @@ class GrossProfitGenerator:
 
 		return flt(buying_amount, self.currency_precision)
 
-	def calculate_buying_amount_from_sle(self, row, my_sle, parenttype, parent, item_row, item_code):
-		for i, sle in enumerate(my_sle):
-			# find the stock valution rate from stock ledger entry
-			if (
-				sle.voucher_type == parenttype
-				and parent == sle.voucher_no
-				and sle.voucher_detail_no == item_row
-			):
-				previous_stock_value = len(my_sle) > i + 1 and flt(my_sle[i + 1].stock_value) or 0.0
-
-				if previous_stock_value:
-					return abs(previous_stock_value - flt(sle.stock_value)) * flt(row.qty) / abs(flt(sle.qty))
-				else:
-					return flt(row.qty) * self.get_average_buying_rate(row, item_code)
-		return 0.0
+	def calculate_buying_amount_from_sle(self, row, parenttype, parent, item_row, item_code, warehouse):
+		sle = self.sle.get((parenttype, parent, item_row, item_code, warehouse))
+		if not sle:
+			return flt(row.qty) * self.get_valuation_rate(row, item_code, warehouse)
+
+		# stock value of the item and warehouse before this entry
+		previous_stock_value = flt(
+			flt(sle.stock_value) - flt(sle.stock_value_difference), self.currency_precision
+		)
+
+		if previous_stock_value:
+			return abs(flt(sle.stock_value_difference)) * flt(row.qty) / abs(flt(sle.qty))
+		else:
+			return flt(row.qty) * self.get_average_buying_rate(row, item_code)
+
+	def get_valuation_rate(self, row, item_code, warehouse):
+		"""Valuation rate of the item in the warehouse at the time of the row"""
+		previous_sle = get_previous_sle(
+			{
+				"item_code": item_code,
+				"warehouse": warehouse,
+				"posting_date": row.posting_date,
+				"posting_time": row.posting_time,
+			}
+		)
+
+		return flt(previous_sle.get("valuation_rate"))
 
 	def get_buying_amount(self, row, item_code):
 		# IMP NOTE
@@ -643,14 +658,14 @@ class GrossProfitGenerator:
 			return flt(row.qty) * item_rate
 
 		else:
-			my_sle = self.get_stock_ledger_entries(item_code, row.warehouse)
-			if (row.update_stock or row.dn_detail) and my_sle:
+			has_sle = self.has_stock_ledger_entries(item_code, row.warehouse)
+			if (row.update_stock or row.dn_detail) and has_sle:
 				parenttype, parent = row.parenttype, row.parent
 				if row.dn_detail:
 					parenttype, parent = "Delivery Note", row.delivery_note
 
 				return self.calculate_buying_amount_from_sle(
-					row, my_sle, parenttype, parent, row.item_row, item_code
+					row, parenttype, parent, row.item_row, item_code, row.warehouse
 				)
 			elif self.delivery_notes.get((row.parent, row.item_code), None):
 				#  check if Invoice has delivery notes
@@ -661,9 +676,11 @@ class GrossProfitGenerator:
 					dn["item_row"],
 					dn["warehouse"],
 				)
-				my_sle = self.get_stock_ledger_entries(item_code, dn_warehouse)
+				if not self.has_stock_ledger_entries(item_code, dn_warehouse):
+					return 0.0
+
 				return self.calculate_buying_amount_from_sle(
-					row, my_sle, parenttype, parent, item_row, item_code
+					row, parenttype, parent, item_row, item_code, dn_warehouse
 				)
 			elif row.sales_order and row.so_detail:
 				incoming_amount = self.get_buying_amount_from_so_dn(row.sales_order, row.so_detail, item_code)
@@ -950,36 +967,71 @@ class GrossProfitGenerator:
 	def get_bundle_item_details(self, item_code):
 		return frappe.db.get_value("Item", item_code, ["item_name", "description", "item_group", "brand"])
 
-	def get_stock_ledger_entries(self, item_code, warehouse):
-		if item_code and warehouse:
-			if (item_code, warehouse) not in self.sle:
-				sle = qb.DocType("Stock Ledger Entry")
-				res = (
-					qb.from_(sle)
-					.select(
-						sle.item_code,
-						sle.voucher_type,
-						sle.voucher_no,
-						sle.voucher_detail_no,
-						sle.stock_value,
-						sle.warehouse,
-						sle.actual_qty.as_("qty"),
-					)
-					.where(
-						(sle.company == self.filters.company)
-						& (sle.item_code == item_code)
-						& (sle.warehouse == warehouse)
-						& (sle.is_cancelled == 0)
-					)
-					.orderby(sle.item_code)
-					.orderby(sle.warehouse, sle.posting_datetime, sle.creation, order=Order.desc)
-					.run(as_dict=True)
+	def load_stock_ledger_entries(self):
+		"""
+		Stock Ledger Entries of the invoices and delivery notes in the report, keyed by voucher,
+		voucher row, item and warehouse. Only the entries of these vouchers are fetched instead of
+		the full history of every item and warehouse.
+		"""
+		vouchers = set()
+		for row in self.si_list:
+			if row.update_stock and row.parent:
+				vouchers.add((row.parenttype, row.parent))
+			if row.dn_detail and row.delivery_note:
+				vouchers.add(("Delivery Note", row.delivery_note))
+
+		for dn in self.delivery_notes.values():
+			vouchers.add(("Delivery Note", dn.delivery_note))
+
+		sle = qb.DocType("Stock Ledger Entry")
+		for batch in create_batch(sorted(vouchers), 1000):
+			entries = (
+				qb.from_(sle)
+				.select(
+					sle.item_code,
+					sle.voucher_type,
+					sle.voucher_no,
+					sle.voucher_detail_no,
+					sle.stock_value,
+					sle.stock_value_difference,
+					sle.warehouse,
+					sle.actual_qty.as_("qty"),
+				)
+				.where(
+					(sle.voucher_type.isin({voucher_type for voucher_type, _voucher_no in batch}))
+					& (sle.voucher_no.isin([voucher_no for _voucher_type, voucher_no in batch]))
+					& (sle.company == self.filters.company)
+					& (sle.is_cancelled == 0)
 				)
+				.orderby(sle.posting_datetime, sle.creation, order=Order.desc)
+				.run(as_dict=True)
+			)
 
-				self.sle[(item_code, warehouse)] = res
+			for d in entries:
+				# latest entry of the voucher row, as the voucher may have been reposted
+				self.sle.setdefault(
+					(d.voucher_type, d.voucher_no, d.voucher_detail_no, d.item_code, d.warehouse), d
+				)
+				self.items_with_sle[(d.item_code, d.warehouse)] = True
+
+	def has_stock_ledger_entries(self, item_code, warehouse):
+		if not (item_code and warehouse):
+			return False
+
+		if (item_code, warehouse) not in self.items_with_sle:
+			self.items_with_sle[(item_code, warehouse)] = bool(
+				frappe.db.exists(
+					"Stock Ledger Entry",
+					{
+						"company": self.filters.company,
+						"item_code": item_code,
+						"warehouse": warehouse,
+						"is_cancelled": 0,
+					},
+				)
+			)
 
-			return self.sle[(item_code, warehouse)]
-		return []
+		return self.items_with_sle[(item_code, warehouse)]
 
 	def load_product_bundle(self):
 		self.product_bundles = {}
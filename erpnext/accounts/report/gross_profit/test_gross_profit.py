@@ -558,3 +558,29 @@ class TestGrossProfit(FrappeTestCase):
 		}
 		gp_entry = [x for x in data if x.parent_invoice == sinv.name]
 		self.assertEqual(gp_entry[0], gp_entry[0] | expected_entry)
+
+	def test_buying_amount_ignores_later_stock_entries(self):
+		"""
+		Buying amount of an invoice is taken from its own stock ledger entry, entries posted after it
+		do not change it
+		"""
+		make_stock_entry(
+			company=self.company, item_code=self.item, target=self.warehouse, qty=10, basic_rate=100
+		)
+
+		sinv = self.create_sales_invoice(qty=2, rate=150, do_not_submit=True)
+		sinv.update_stock = 1
+		sinv.save().submit()
+
+		make_stock_entry(
+			company=self.company, item_code=self.item, target=self.warehouse, qty=10, basic_rate=300
+		)
+
+		filters = frappe._dict(
+			company=self.company, from_date=nowdate(), to_date=nowdate(), group_by="Invoice"
+		)
+		columns, data = execute(filters=filters)
+
+		gp_entry = [x for x in data if x.parent_invoice == sinv.name]
+		self.assertEqual(gp_entry[0].buying_amount, 200.0)
+		self.assertEqual(gp_entry[0].gross_profit, 100.0)
@@ -6,7 +6,11 @@ from frappe.tests.utils import FrappeTestCase
 from frappe.utils import getdate, today
 
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
-from erpnext.accounts.report.financial_statements import get_period_list
+from erpnext.accounts.report.financial_statements import (
+	accumulate_values_into_parents,
+	calculate_values,
+	get_period_list,
+)
 from erpnext.accounts.report.profit_and_loss_statement.profit_and_loss_statement import execute
 from erpnext.accounts.test.accounts_mixin import AccountsTestMixin
 
@@ -90,3 +94,71 @@ class TestProfitAndLossStatement(AccountsTestMixin, FrappeTestCase):
 				with self.subTest(current_period_key=current_period_key):
 					self.assertEqual(acc[current_period_key], 150)
 					self.assertEqual(acc["total"], 150)
+
+	def test_period_values_and_parent_accumulation(self):
+		period_list = [
+			frappe._dict(
+				key=key,
+				from_date=getdate(from_date),
+				to_date=getdate(to_date),
+				to_date_fiscal_year=fiscal_year,
+				year_start_date=getdate("2024-01-01"),
+			)
+			for key, from_date, to_date, fiscal_year in [
+				("jun_2024", "2024-01-01", "2024-06-30", "2024"),
+				("dec_2024", "2024-07-01", "2024-12-31", "2024"),
+				("jun_2025", "2025-01-01", "2025-06-30", "2025"),
+			]
+		]
+		entries = [
+			("Income", "2023-12-31", "2023", 5),
+			("Income", "2024-02-01", "2024", 10),
+			("Income", "2024-06-30", "2024", 20),
+			("Income", "2025-03-01", "2025", 40),
+			("Expense", "2024-07-01", "2024", -1),
+			("Expense", "2025-07-01", "2025", -100),
+		]
+
+		def get_values(accumulated_values, ignore_accumulated_values_for_fy):
+			accounts = [
+				frappe._dict(name="Root", parent_account=None, lft=1, rgt=6),
+				frappe._dict(name="Income", parent_account="Root", lft=2, rgt=3),
+				frappe._dict(name="Expense", parent_account="Root", lft=4, rgt=5),
+			]
+			accounts_by_name = {d.name: d for d in accounts}
+			gl_entries_by_account = {}
+			for account, posting_date, fiscal_year, amount in entries:
+				gl_entries_by_account.setdefault(account, []).append(
+					frappe._dict(
+						account=account,
+						posting_date=getdate(posting_date),
+						fiscal_year=fiscal_year,
+						debit=amount,
+						credit=0,
+					)
+				)
+
+			calculate_values(
+				accounts_by_name,
+				gl_entries_by_account,
+				period_list,
+				accumulated_values,
+				ignore_accumulated_values_for_fy,
+			)
+			accumulate_values_into_parents(accounts, accounts_by_name, period_list)
+
+			keys = [period.key for period in period_list] + ["opening_balance"]
+			return {d.name: [d.get(key, 0.0) for key in keys] for d in accounts}
+
+		self.assertEqual(
+			get_values(False, False),
+			{"Root": [30, -1, 40, 5], "Income": [30, 0, 40, 5], "Expense": [0, -1, 0, 0]},
+		)
+		self.assertEqual(
+			get_values(True, False),
+			{"Root": [35, 34, 74, 5], "Income": [35, 35, 75, 5], "Expense": [0, -1, -1, 0]},
+		)
+		self.assertEqual(
+			get_values(True, True),
+			{"Root": [30, 29, 40, 5], "Income": [30, 30, 40, 5], "Expense": [0, -1, 0, 0]},
+		)
@@ -2,10 +2,20 @@
 # MIT License. See license.txt
 
 import frappe
-from frappe.tests.utils import FrappeTestCase
-from frappe.utils import today
-
-from erpnext.accounts.report.trial_balance.trial_balance import execute
+from frappe.tests.utils import FrappeTestCase, change_settings
+from frappe.utils import add_months, flt, today
+
+from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+	build_closing_balance_snapshots,
+	get_last_snapshot_date,
+)
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.report.trial_balance.trial_balance import (
+	execute,
+	get_opening_balances,
+	validate_filters,
+)
+from erpnext.accounts.utils import get_fiscal_year
 
 
 class TestTrialBalance(FrappeTestCase):
@@ -62,6 +72,37 @@ class TestTrialBalance(FrappeTestCase):
 		total_row = execute(filters)[1][-1]
 		self.assertEqual(total_row["debit"], total_row["credit"])
 
+	@change_settings("Accounts Settings", {"enable_closing_balance_snapshots": 1})
+	def test_opening_balances_from_snapshots(self):
+		make_journal_entry(
+			"_Test Bank - _TC", "Sales - _TC", 100, posting_date=add_months(today(), -1), submit=True
+		)
+		build_closing_balance_snapshots("_Test Company")
+		self.assertTrue(get_last_snapshot_date("_Test Company", today()))
+
+		filters = frappe._dict(
+			{
+				"company": "_Test Company",
+				"fiscal_year": get_fiscal_year(today(), company="_Test Company")[0],
+				"from_date": today(),
+				"to_date": today(),
+			}
+		)
+		validate_filters(filters)
+		from_snapshots = get_opening_balances(filters)
+
+		frappe.db.set_single_value("Accounts Settings", "enable_closing_balance_snapshots", 0)
+		from_gl_entries = get_opening_balances(filters)
+
+		def get_balances(opening_balances):
+			return {
+				d["account"]: (flt(d["opening_debit"], 2), flt(d["opening_credit"], 2))
+				for d in opening_balances.values()
+				if flt(d["opening_debit"], 2) or flt(d["opening_credit"], 2)
+			}
+
+		self.assertEqual(get_balances(from_snapshots), get_balances(from_gl_entries))
+
 	def tearDown(self):
 		clear_dimension_defaults("Branch")
 		disable_dimension()
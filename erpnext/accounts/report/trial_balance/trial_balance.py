@@ -8,6 +8,9 @@ from frappe.query_builder.functions import Sum
 from frappe.utils import add_days, cstr, flt, formatdate, getdate
 
 import erpnext
+from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+	get_last_snapshot_date,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimension_with_children,
@@ -158,7 +161,23 @@ def get_rootwise_opening_balances(filters, report_type):
 
 	accounting_dimensions = get_accounting_dimensions(as_list=False)
 
-	if last_period_closing_voucher:
+	snapshot_date = None
+	if not ignore_closing_balances:
+		snapshot_date = get_snapshot_date(filters, report_type, last_period_closing_voucher)
+
+	if snapshot_date:
+		# monthly snapshot and only the GL Entries posted after it
+		gle = get_opening_balance(
+			"Account Closing Balance",
+			filters,
+			report_type,
+			accounting_dimensions,
+			snapshot_date=snapshot_date,
+		)
+		gle += get_opening_balance(
+			"GL Entry", filters, report_type, accounting_dimensions, snapshot_date=snapshot_date
+		)
+	elif last_period_closing_voucher:
 		gle = get_opening_balance(
 			"Account Closing Balance",
 			filters,
@@ -192,8 +211,33 @@ def get_rootwise_opening_balances(filters, report_type):
 	return opening
 
 
+def get_snapshot_date(filters, report_type, last_period_closing_voucher):
+	snapshot_date = get_last_snapshot_date(filters.company, add_days(filters.from_date, -1))
+	if not snapshot_date:
+		return None
+
+	# profit and loss snapshots only hold the totals of their own fiscal year
+	if report_type == "Profit and Loss" and (
+		filters.show_unclosed_fy_pl_balances or getdate(snapshot_date) < filters.year_start_date
+	):
+		return None
+
+	if last_period_closing_voucher and getdate(last_period_closing_voucher[0].posting_date) >= getdate(
+		snapshot_date
+	):
+		return None
+
+	return snapshot_date
+
+
 def get_opening_balance(
-	doctype, filters, report_type, accounting_dimensions, period_closing_voucher=None, start_date=None
+	doctype,
+	filters,
+	report_type,
+	accounting_dimensions,
+	period_closing_voucher=None,
+	start_date=None,
+	snapshot_date=None,
 ):
 	closing_balance = frappe.qb.DocType(doctype)
 	account = frappe.qb.DocType("Account")
@@ -223,6 +267,19 @@ def get_opening_balance(
 		opening_balance = opening_balance.where(
 			closing_balance.period_closing_voucher == period_closing_voucher
 		)
+	elif snapshot_date and doctype == "Account Closing Balance":
+		opening_balance = opening_balance.where(
+			(closing_balance.closing_date == snapshot_date)
+			& (
+				closing_balance.period_closing_voucher.isnull()
+				| (closing_balance.period_closing_voucher == "")
+			)
+		)
+	elif snapshot_date:
+		opening_balance = opening_balance.where(
+			(closing_balance.posting_date > snapshot_date)
+			& ((closing_balance.posting_date < filters.from_date) | (closing_balance.is_opening == "Yes"))
+		)
 	else:
 		if start_date:
 			opening_balance = opening_balance.where(
@@ -7,6 +7,8 @@ from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_ent
 from erpnext.accounts.doctype.purchase_invoice.test_purchase_invoice import make_purchase_invoice
 from erpnext.accounts.party import get_party_shipping_address
 from erpnext.accounts.utils import (
+	get_balance_on,
+	get_balances_on,
 	get_future_stock_vouchers,
 	get_voucherwise_gl_entries,
 	sort_stock_vouchers_by_posting_date,
@@ -156,6 +158,37 @@ class TestUtils(unittest.TestCase):
 		self.assertSequenceEqual(doc_name[0:2], ("SUP", fiscal_year))
 		frappe.db.set_default("supp_master_name", "Supplier Name")
 
+	def test_get_balances_on(self):
+		from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+
+		accounts = [
+			"_Test Bank - _TC",
+			"_Test Cash - _TC",
+			"Current Assets - _TC",
+			"_Test Account Cost for Goods Sold - _TC",
+		]
+		balances = get_balances_on(accounts, company="_Test Company")
+		for account in accounts:
+			self.assertAlmostEqual(balances[account], get_balance_on(account, company="_Test Company"), 2)
+
+		# cached balances are discarded once entries are posted
+		make_journal_entry("_Test Bank - _TC", "_Test Cash - _TC", 100, submit=True)
+		new_balances = get_balances_on(accounts, company="_Test Company")
+		self.assertAlmostEqual(new_balances["_Test Bank - _TC"], balances["_Test Bank - _TC"] + 100)
+		self.assertAlmostEqual(new_balances["_Test Cash - _TC"], balances["_Test Cash - _TC"] - 100)
+		self.assertAlmostEqual(new_balances["Current Assets - _TC"], balances["Current Assets - _TC"])
+
+		cost_center = "_Test Cost Center - _TC"
+		balances = get_balances_on(accounts, company="_Test Company", cost_center=cost_center)
+		for account in accounts:
+			self.assertAlmostEqual(
+				balances[account], get_balance_on(account, company="_Test Company", cost_center=cost_center)
+			)
+
+		balances = get_balances_on(party_type="Customer", parties=["_Test Customer", "_Test Customer 1"])
+		for party in balances:
+			self.assertAlmostEqual(balances[party], get_balance_on(party_type="Customer", party=party))
+
 
 ADDRESS_RECORDS = [
 	{
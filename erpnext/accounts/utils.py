@@ -2,6 +2,7 @@
 # License: GNU General Public License v3. See license.txt
 
 
+from collections import defaultdict
 from json import loads
 from typing import TYPE_CHECKING, Optional
 
@@ -9,7 +10,7 @@ import frappe
 import frappe.defaults
 from frappe import _, qb, throw
 from frappe.model.meta import get_field_precision
-from frappe.query_builder import AliasedQuery, Criterion, Table
+from frappe.query_builder import AliasedQuery, Case, Criterion, Table
 from frappe.query_builder.functions import Round, Sum
 from frappe.query_builder.utils import DocType
 from frappe.utils import (
@@ -33,6 +34,12 @@ import erpnext
 # imported to enable erpnext.accounts.utils.get_account_currency
 from erpnext.accounts.doctype.account.account import get_account_currency
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import get_dimensions
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	get_open_vouchers_query,
+	is_payment_ledger_outstanding_built,
+	is_payment_ledger_outstanding_enabled,
+	update_payment_ledger_outstanding,
+)
 from erpnext.stock import get_warehouse_account_map
 from erpnext.stock.utils import get_stock_value_on
 
@@ -299,6 +306,321 @@ def get_balance_on(
 		return flt(bal)
 
 
+def get_balances_on(
+	accounts=None,
+	date=None,
+	company=None,
+	party_type=None,
+	parties=None,
+	cost_center=None,
+	in_account_currency=True,
+	ignore_account_permission=False,
+):
+	"""Returns `{account: balance}`, or `{party: balance}` if `parties` are passed, as on `date`
+	(all entries if `date` is not set).
+
+	Balances of any number of group or ledger accounts are fetched with one aggregate query per company,
+	starting from the latest Account Closing Balance when there is one. Results are cached until the next
+	ledger posting in the same request."""
+
+	if not (accounts or parties):
+		return {}
+
+	date = getdate(date) if date else None
+	accounts = list(accounts or [])
+	parties = list(parties or [])
+
+	cache_key = (
+		tuple(accounts),
+		date,
+		company,
+		party_type,
+		tuple(parties),
+		cost_center,
+		cint(in_account_currency),
+	)
+	if frappe.flags.account_balances is None:
+		frappe.flags.account_balances = {}
+
+	if cache_key in frappe.flags.account_balances:
+		return frappe.flags.account_balances[cache_key].copy()
+
+	balances = dict.fromkeys(parties or accounts, 0.0)
+
+	try:
+		get_fiscal_year(date or nowdate(), company=company, verbose=0)
+	except FiscalYearError:
+		if getdate(date) > getdate(nowdate()):
+			get_fiscal_year(nowdate(), verbose=1)
+		else:
+			# older than any existing fiscal year, hence balances are 0.0
+			frappe.flags.account_balances[cache_key] = balances
+			return balances.copy()
+
+	account_details = get_account_details(accounts, ignore_account_permission)
+	ledgers_of_account = get_ledgers_of_accounts(account_details.values())
+
+	cost_centers = None
+	if cost_center:
+		cc = frappe.get_cached_value("Cost Center", cost_center, ["lft", "rgt", "is_group"], as_dict=True)
+		cost_centers = [cost_center]
+		if cc.is_group:
+			cost_centers = frappe.get_all(
+				"Cost Center", filters={"lft": (">=", cc.lft), "rgt": ("<=", cc.rgt)}, pluck="name"
+			)
+
+	# cost center filter only applies to profit and loss accounts
+	pl_ledgers, other_ledgers = set(), set()
+	for account, ledgers in ledgers_of_account.items():
+		if account_details[account].report_type == "Profit and Loss" and cost_centers:
+			pl_ledgers.update(ledgers)
+		else:
+			other_ledgers.update(ledgers)
+
+	if accounts:
+		ledger_sets = ((pl_ledgers, cost_centers), (other_ledgers, None))
+	else:
+		ledger_sets = ((set(), None),)
+
+	ledger_balances = {}
+	for ledgers, ledger_cost_centers in ledger_sets:
+		if accounts and not ledgers:
+			continue
+
+		ledger_balances.update(
+			get_ledger_balances(
+				date, list(ledgers), company, party_type, parties, ledger_cost_centers, account_details
+			)
+		)
+
+	if parties:
+		for (_account, party), balance in ledger_balances.items():
+			balances[party] += balance[1] if in_account_currency else balance[0]
+	else:
+		for account, ledgers in ledgers_of_account.items():
+			details = account_details[account]
+			company_currency = frappe.get_cached_value("Company", details.company, "default_currency")
+			# balance of a group in company currency is returned in company currency
+			use_account_currency = in_account_currency and not (
+				details.is_group and details.account_currency == company_currency
+			)
+
+			for ledger in ledgers:
+				balance = ledger_balances.get((ledger, None))
+				if balance:
+					balances[account] += balance[1] if use_account_currency else balance[0]
+
+	balances = {key: flt(value) for key, value in balances.items()}
+	frappe.flags.account_balances[cache_key] = balances
+
+	return balances.copy()
+
+
+def clear_balances_cache():
+	frappe.flags.account_balances = None
+
+
+def get_gl_cache_version(company):
+	"""Changes whenever the GL Entries or Accounts of `company` change, cached balances are keyed on it"""
+	return cstr(frappe.cache().get_value(f"gl_cache_version:{company}"))
+
+
+def invalidate_gl_cache(companies):
+	"""
+	Change the GL cache version of `companies`. It is changed again after commit, so balances
+	computed by another request before the changes were committed are not kept either.
+	"""
+
+	companies = {company for company in companies if company}
+	if not companies:
+		return
+
+	def update_versions():
+		for company in companies:
+			frappe.cache().set_value(f"gl_cache_version:{company}", frappe.generate_hash(length=10))
+
+	update_versions()
+	frappe.db.after_commit.add(update_versions)
+
+
+def get_account_details(accounts, ignore_account_permission=False):
+	if not accounts:
+		return {}
+
+	if not (frappe.flags.ignore_account_permission or ignore_account_permission):
+		permitted_accounts = frappe.get_list("Account", filters={"name": ("in", accounts)}, pluck="name")
+		for account in set(accounts) - set(permitted_accounts):
+			frappe.throw(
+				_("Not permitted to read Account {0}").format(frappe.bold(account)), frappe.PermissionError
+			)
+
+	account_details = frappe.get_all(
+		"Account",
+		filters={"name": ("in", accounts)},
+		fields=["name", "company", "lft", "rgt", "is_group", "report_type", "account_currency"],
+	)
+
+	return {d.name: d for d in account_details}
+
+
+def get_ledgers_of_accounts(accounts):
+	"""Maps each account to the ledgers under it, a ledger maps to itself"""
+	from bisect import bisect_left, bisect_right
+
+	ledgers_of_account = {d.name: [d.name] for d in accounts if not d.is_group}
+
+	groups = [d for d in accounts if d.is_group]
+	if not groups:
+		return ledgers_of_account
+
+	ledgers_by_company = {}
+	for d in frappe.get_all(
+		"Account",
+		filters={"company": ("in", {d.company for d in groups}), "is_group": 0},
+		fields=["name", "company", "lft"],
+		order_by="lft",
+	):
+		ledgers_by_company.setdefault(d.company, []).append(d)
+
+	lfts_by_company = {company: [d.lft for d in ledgers] for company, ledgers in ledgers_by_company.items()}
+
+	for group in groups:
+		ledgers = ledgers_by_company.get(group.company, [])
+		lfts = lfts_by_company.get(group.company, [])
+		start, end = bisect_left(lfts, group.lft), bisect_right(lfts, group.rgt)
+		ledgers_of_account[group.name] = [d.name for d in ledgers[start:end]]
+
+	return ledgers_of_account
+
+
+def get_ledger_balances(
+	date, ledgers, company=None, party_type=None, parties=None, cost_centers=None, account_details=None
+):
+	"""Returns `{(account, party): [balance, balance_in_account_currency]}` as on `date`
+	(all entries if not set), party is None unless `parties` are passed"""
+
+	balances = {}
+
+	def add_balances(rows):
+		for row in rows:
+			balance = balances.setdefault((row.account, row.get("party")), [0.0, 0.0])
+			balance[0] += flt(row.balance)
+			balance[1] += flt(row.balance_in_account_currency)
+
+	companies = {account_details[d].company for d in ledgers} if ledgers else {company}
+	for ledger_company in companies:
+		company_ledgers = [d for d in ledgers if account_details[d].company == ledger_company]
+		from_date = None
+
+		if not parties:
+			closing = get_last_closing_before(ledger_company, date)
+			if closing:
+				add_balances(get_closing_balances(closing.name, company_ledgers, cost_centers))
+				from_date = add_days(closing.posting_date, 1)
+
+		add_balances(
+			get_gl_balances(
+				from_date, date, company_ledgers, ledger_company, party_type, parties, cost_centers
+			)
+		)
+
+	return balances
+
+
+def get_last_closing_before(company, date=None):
+	if not company or cint(frappe.db.get_single_value("Accounts Settings", "ignore_account_closing_balance")):
+		return None
+
+	filters = {"docstatus": 1, "company": company}
+	if date:
+		filters["posting_date"] = ("<=", date)
+
+	last_period_closing_voucher = frappe.db.get_all(
+		"Period Closing Voucher",
+		filters=filters,
+		fields=["name", "posting_date"],
+		order_by="posting_date desc",
+		limit=1,
+	)
+
+	# closing balances of large vouchers are made in the background
+	if last_period_closing_voucher and frappe.db.exists(
+		"Account Closing Balance", {"period_closing_voucher": last_period_closing_voucher[0].name}
+	):
+		return last_period_closing_voucher[0]
+
+	return None
+
+
+def get_closing_balances(period_closing_voucher, ledgers, cost_centers=None):
+	acb = qb.DocType("Account Closing Balance")
+	query = (
+		qb.from_(acb)
+		.select(
+			acb.account,
+			(Sum(acb.debit) - Sum(acb.credit)).as_("balance"),
+			(Sum(acb.debit_in_account_currency) - Sum(acb.credit_in_account_currency)).as_(
+				"balance_in_account_currency"
+			),
+		)
+		.where(acb.period_closing_voucher == period_closing_voucher)
+		.groupby(acb.account)
+	)
+
+	if ledgers:
+		query = query.where(acb.account.isin(ledgers))
+
+	if cost_centers:
+		query = query.where(acb.cost_center.isin(cost_centers))
+
+	return query.run(as_dict=True)
+
+
+def get_gl_balances(
+	from_date, to_date, ledgers, company=None, party_type=None, parties=None, cost_centers=None
+):
+	gle = qb.DocType("GL Entry")
+	precision = get_currency_precision()
+
+	query = (
+		qb.from_(gle)
+		.select(
+			gle.account,
+			(Sum(Round(gle.debit, precision)) - Sum(Round(gle.credit, precision))).as_("balance"),
+			(
+				Sum(Round(gle.debit_in_account_currency, precision))
+				- Sum(Round(gle.credit_in_account_currency, precision))
+			).as_("balance_in_account_currency"),
+		)
+		.where(gle.is_cancelled == 0)
+		.groupby(gle.account)
+	)
+
+	if from_date:
+		query = query.where(gle.posting_date >= from_date)
+
+	if to_date:
+		query = query.where(gle.posting_date <= to_date)
+
+	if ledgers:
+		query = query.where(gle.account.isin(ledgers))
+
+	if company:
+		query = query.where(gle.company == company)
+
+	if parties:
+		query = (
+			query.select(gle.party)
+			.where((gle.party_type == party_type) & (gle.party.isin(parties)))
+			.groupby(gle.party)
+		)
+
+	if cost_centers:
+		query = query.where(gle.cost_center.isin(cost_centers))
+
+	return query.run(as_dict=True)
+
+
 def get_count_on(account, fieldname, date):
 	cond = ["is_cancelled=0"]
 	if date:
@@ -453,10 +775,13 @@ def _build_dimensions_dict_for_exc_gain_loss(
 
 
 def reconcile_against_document(
-	args, skip_ref_details_update_for_pe=False, active_dimensions=None
+	args, skip_ref_details_update_for_pe=False, active_dimensions=None, bulk=False
 ):  # nosemgrep
 	"""
 	Cancel PE or JV, Update against document, split if required and resubmit
+
+	With `bulk`, the Payment Ledger Entries of all the vouchers are inserted together and the
+	outstanding of every linked voucher is updated once at the end.
 	"""
 	# To optimize making GL Entry for PE or JV with multiple references
 	reconciled_entries = {}
@@ -466,6 +791,7 @@ def reconcile_against_document(
 
 		reconciled_entries[(row.voucher_type, row.voucher_no)].append(row)
 
+	bulk_gl_map, bulk_outstanding_vouchers, bulk_advance_paid = [], [], set()
 	for key, entries in reconciled_entries.items():
 		voucher_type = key[0]
 		voucher_no = key[1]
@@ -502,7 +828,8 @@ def reconcile_against_document(
 					entry,
 					doc,
 					do_not_save=True,
-					skip_ref_details_update_for_pe=skip_ref_details_update_for_pe,
+					# in bulk mode the outstanding of the references is only updated at the end
+					skip_ref_details_update_for_pe=skip_ref_details_update_for_pe or bulk,
 					dimensions_dict=dimensions_dict,
 				)
 
@@ -520,24 +847,66 @@ def reconcile_against_document(
 			from erpnext.accounts.general_ledger import process_debit_credit_difference
 
 			process_debit_credit_difference(gl_map)
-			create_payment_ledger_entry(gl_map, update_outstanding="No", cancel=0, adv_adj=1)
+			if bulk:
+				bulk_gl_map.extend(gl_map)
+			else:
+				create_payment_ledger_entry(gl_map, update_outstanding="No", cancel=0, adv_adj=1)
 
-		# Only update outstanding for newly linked vouchers
-		for entry in entries:
-			update_voucher_outstanding(
-				entry.against_voucher_type,
-				entry.against_voucher,
-				entry.account,
-				entry.party_type,
-				entry.party,
-			)
-		# update advance paid in Advance Receivable/Payable doctypes
-		if update_advance_paid:
-			for t, n in update_advance_paid:
-				frappe.get_doc(t, n).set_total_advance_paid()
+		if bulk:
+			bulk_outstanding_vouchers.extend(entries)
+			bulk_advance_paid.update(update_advance_paid)
+		else:
+			# Only update outstanding for newly linked vouchers
+			for entry in entries:
+				update_voucher_outstanding(
+					entry.against_voucher_type,
+					entry.against_voucher,
+					entry.account,
+					entry.party_type,
+					entry.party,
+				)
+			# update advance paid in Advance Receivable/Payable doctypes
+			if update_advance_paid:
+				for t, n in update_advance_paid:
+					frappe.get_doc(t, n).set_total_advance_paid()
 
 		frappe.flags.ignore_party_validation = False
 
+	if bulk:
+		insert_payment_ledger_entries(bulk_gl_map)
+		update_vouchers_outstanding(bulk_outstanding_vouchers)
+		for t, n in bulk_advance_paid:
+			frappe.get_doc(t, n).set_total_advance_paid()
+
+		if not skip_ref_details_update_for_pe:
+			update_payment_entry_reference_details(reconciled_entries)
+
+
+def update_payment_entry_reference_details(reconciled_entries):
+	"""
+	Set reference details of the newly linked references of Payment Entries reconciled in bulk,
+	once the outstanding of the references has been updated
+	"""
+	for (voucher_type, voucher_no), entries in reconciled_entries.items():
+		if voucher_type != "Payment Entry":
+			continue
+
+		payment_entry = frappe.get_doc(voucher_type, voucher_no)
+		for entry in entries:
+			reference_exchange_details = frappe._dict()
+			if entry.against_voucher_type == "Journal Entry" and entry.exchange_rate:
+				reference_exchange_details.update(
+					{
+						"reference_doctype": entry.against_voucher_type,
+						"reference_name": entry.against_voucher,
+						"exchange_rate": entry.exchange_rate,
+					}
+				)
+			payment_entry.set_missing_ref_details(
+				update_ref_details_only_for=[(entry.against_voucher_type, entry.against_voucher)],
+				reference_exchange_details=reference_exchange_details,
+			)
+
 
 def check_if_advance_entry_modified(args):
 	"""
@@ -813,6 +1182,22 @@ def update_accounting_ledgers_after_reference_removal(
 
 	# Payment Ledger
 	ple = qb.DocType("Payment Ledger Entry")
+	vouchers = [(ref_type, ref_no)]
+	if is_payment_ledger_outstanding_enabled():
+		# entries moved back to their own voucher change the outstanding of both
+		filters = {"against_voucher_type": ref_type, "against_voucher_no": ref_no, "delinked": 0}
+		if payment_name:
+			filters["voucher_no"] = payment_name
+		vouchers.extend(
+			frappe.get_all(
+				"Payment Ledger Entry",
+				filters=filters,
+				fields=["voucher_type", "voucher_no"],
+				distinct=True,
+				as_list=True,
+			)
+		)
+
 	ple_update_query = (
 		qb.update(ple)
 		.set(ple.against_voucher_type, ple.voucher_type)
@@ -827,6 +1212,7 @@ def update_accounting_ledgers_after_reference_removal(
 	if payment_name:
 		ple_update_query = ple_update_query.where(ple.voucher_no == payment_name)
 	ple_update_query.run()
+	update_payment_ledger_outstanding(vouchers)
 
 
 def remove_ref_from_advance_section(ref_doc: object = None):
@@ -959,6 +1345,11 @@ def get_company_default(company, fieldname, ignore_validation=False):
 
 
 def fix_total_debit_credit():
+	from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+		AMOUNT_FIELDS,
+		update_daily_account_balances,
+	)
+
 	vouchers = frappe.db.sql(
 		"""select voucher_type, voucher_no,
 		sum(debit) - sum(credit) as diff
@@ -972,14 +1363,30 @@ def fix_total_debit_credit():
 		if abs(d.diff) > 0:
 			dr_or_cr = d.voucher_type == "Sales Invoice" and "credit" or "debit"
 
+			gl_entry = frappe.db.get_value(
+				"GL Entry",
+				{"voucher_type": d.voucher_type, "voucher_no": d.voucher_no, dr_or_cr: (">", 0)},
+				"*",
+				as_dict=True,
+			)
+			if not gl_entry:
+				continue
+
 			frappe.db.sql(
-				"""update `tabGL Entry` set {} = {} + {}
-				where voucher_type = {} and voucher_no = {} and {} > 0 limit 1""".format(
-					dr_or_cr, dr_or_cr, "%s", "%s", "%s", dr_or_cr
+				"""update `tabGL Entry` set {} = {} + {} where name = {}""".format(
+					dr_or_cr, dr_or_cr, "%s", "%s"
 				),
-				(d.diff, d.voucher_type, d.voucher_no),
+				(d.diff, gl_entry.name),
 			)
 
+			if not gl_entry.is_cancelled:
+				# the daily balance of the entry moves by the same difference
+				gl_entry.update(dict.fromkeys(AMOUNT_FIELDS, 0))
+				gl_entry[dr_or_cr] = d.diff
+				update_daily_account_balances([gl_entry])
+
+			invalidate_gl_cache([gl_entry.company])
+
 
 def get_currency_precision():
 	precision = cint(frappe.db.get_default("currency_precision"))
@@ -1146,11 +1553,17 @@ def get_account_balances(accounts, company):
 
 	company_currency = frappe.get_cached_value("Company", company, "default_currency")
 
+	balances = get_balances_on([d["value"] for d in accounts], company=company, in_account_currency=False)
+	balances_in_account_currency = get_balances_on(
+		[d["value"] for d in accounts if d["account_currency"] and d["account_currency"] != company_currency],
+		company=company,
+	)
+
 	for account in accounts:
 		account["company_currency"] = company_currency
-		account["balance"] = flt(get_balance_on(account["value"], in_account_currency=False, company=company))
-		if account["account_currency"] and account["account_currency"] != company_currency:
-			account["balance_in_account_currency"] = flt(get_balance_on(account["value"], company=company))
+		account["balance"] = balances.get(account["value"], 0.0)
+		if account["value"] in balances_in_account_currency:
+			account["balance_in_account_currency"] = balances_in_account_currency[account["value"]]
 
 	return accounts
 
@@ -1354,10 +1767,45 @@ def repost_gle_for_stock_vouchers(
 
 def _delete_pl_entries(voucher_type, voucher_no):
 	ple = qb.DocType("Payment Ledger Entry")
+	against_vouchers = get_against_vouchers(voucher_type, voucher_no)
 	qb.from_(ple).delete().where((ple.voucher_type == voucher_type) & (ple.voucher_no == voucher_no)).run()
+	update_payment_ledger_outstanding(against_vouchers)
+
+
+def get_against_vouchers(voucher_type, voucher_no):
+	"""Vouchers whose outstanding is affected by the Payment Ledger Entries of a voucher"""
+	if not is_payment_ledger_outstanding_enabled():
+		return []
+
+	return frappe.get_all(
+		"Payment Ledger Entry",
+		filters={"voucher_type": voucher_type, "voucher_no": voucher_no},
+		fields=["against_voucher_type", "against_voucher_no"],
+		distinct=True,
+		as_list=True,
+	)
 
 
 def _delete_gl_entries(voucher_type, voucher_no):
+	from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+		invalidate_closing_balance_snapshots_of_voucher,
+	)
+	from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+		reverse_daily_account_balances,
+	)
+
+	reverse_daily_account_balances(voucher_type, voucher_no)
+	invalidate_closing_balance_snapshots_of_voucher(voucher_type, voucher_no)
+	clear_balances_cache()
+	invalidate_gl_cache(
+		frappe.get_all(
+			"GL Entry",
+			filters={"voucher_type": voucher_type, "voucher_no": voucher_no},
+			pluck="company",
+			distinct=True,
+		)
+	)
+
 	gle = qb.DocType("GL Entry")
 	qb.from_(gle).delete().where((gle.voucher_type == voucher_type) & (gle.voucher_no == voucher_no)).run()
 
@@ -1690,6 +2138,95 @@ def create_payment_ledger_entry(
 			ple.flags.update_outstanding = update_outstanding
 			ple.submit()
 
+		update_payment_ledger_outstanding(
+			[(entry.against_voucher_type, entry.against_voucher_no) for entry in ple_map]
+		)
+
+
+def insert_payment_ledger_entries(gl_entries):
+	"""
+	Insert the Payment Ledger Entries of already validated GL maps in batched statements,
+	used when reconciliation relinks many vouchers at once
+	"""
+	ple_map = get_payment_ledger_entries(gl_entries)
+	if not ple_map:
+		return
+
+	fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus"]
+	fields.extend(fieldname for fieldname in ple_map[0] if fieldname != "doctype")
+
+	user = frappe.session.user
+	timestamp = now()
+	values = []
+	for entry in ple_map:
+		entry.update(
+			{
+				"name": frappe.generate_hash(length=10),
+				"creation": timestamp,
+				"modified": timestamp,
+				"owner": user,
+				"modified_by": user,
+				"docstatus": 1,
+			}
+		)
+		values.append(tuple(entry.get(fieldname) for fieldname in fields))
+
+	frappe.db.bulk_insert("Payment Ledger Entry", fields=fields, values=values, chunk_size=1000)
+	update_payment_ledger_outstanding(
+		[(entry.against_voucher_type, entry.against_voucher_no) for entry in ple_map]
+	)
+
+
+def update_vouchers_outstanding(vouchers):
+	"""
+	Batched `update_voucher_outstanding`, `vouchers` have `against_voucher_type`, `against_voucher`,
+	`account`, `party_type` and `party`. Outstanding of every voucher is read and written once.
+	"""
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+
+	vouchers_by_party = defaultdict(set)
+	for d in vouchers:
+		if d.against_voucher_type not in ["Sales Invoice", "Purchase Invoice", "Fees"]:
+			continue
+
+		if d.party_type and d.party:
+			vouchers_by_party[(d.account, d.party_type, d.party)].add(
+				(d.against_voucher_type, d.against_voucher)
+			)
+
+	outstanding_by_doctype = defaultdict(dict)
+	for (account, party_type, party), voucher_keys in vouchers_by_party.items():
+		common_filter = [ple.party_type == party_type, ple.party == party]
+		if account:
+			common_filter.append(ple.account == account)
+
+		for batch in create_batch(sorted(voucher_keys), 1000):
+			voucher_outstandings = QueryPaymentLedger().get_voucher_outstandings(
+				[frappe._dict(voucher_type=t, voucher_no=n) for t, n in batch], common_filter=common_filter
+			)
+			for d in voucher_outstandings:
+				outstanding = d.outstanding_in_account_currency or 0.0
+				outstanding_by_doctype[d.voucher_type][d.voucher_no] = outstanding
+
+	for doctype, outstanding in outstanding_by_doctype.items():
+		table = frappe.qb.DocType(doctype)
+		for batch in create_batch(list(outstanding.items()), 500):
+			outstanding_amount = Case()
+			for name, amount in batch:
+				outstanding_amount = outstanding_amount.when(table.name == name, amount)
+
+			(
+				frappe.qb.update(table)
+				.set(table.outstanding_amount, outstanding_amount)
+				.where(table.name.isin([name for name, _amount in batch]))
+			).run()
+
+		# status depends on due dates and returns, so it is still set from each document
+		for name in outstanding:
+			ref_doc = frappe.get_doc(doctype, name)
+			ref_doc.set_status(update=True)
+			ref_doc.notify_update()
+
 
 def update_voucher_outstanding(voucher_type, voucher_no, account, party_type, party):
 	ple = frappe.qb.DocType("Payment Ledger Entry")
@@ -1809,6 +2346,13 @@ class QueryPaymentLedger:
 			filter_on_voucher_no.append(ple.voucher_no.like(f"%{self.voucher_no}%"))
 			filter_on_against_voucher_no.append(ple.against_voucher_no.like(f"%{self.voucher_no}%"))
 
+		# only aggregate the vouchers that are still open instead of the full ledger of the party
+		if (self.get_invoices or self.get_payments) and is_payment_ledger_outstanding_built():
+			open_vouchers = get_open_vouchers_query(self.common_filter, self.get_invoices, self.get_payments)
+			if open_vouchers is not None:
+				filter_on_voucher_no.append(ple.voucher_no.isin(open_vouchers))
+				filter_on_against_voucher_no.append(ple.against_voucher_no.isin(open_vouchers))
+
 		# build outstanding amount filter
 		filter_on_outstanding_amount = []
 		if self.min_outstanding:
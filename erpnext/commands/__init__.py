@@ -2,10 +2,57 @@
 # GPL v3 License. See license.txt
 
 import click
+from frappe.commands import get_site, pass_context
 
 
 def call_command(cmd, context):
 	return click.Context(cmd, obj=context).forward(cmd)
 
 
-commands = []
+@click.command("run-stock-benchmark")
+@click.option("--items", default=10, help="Number of items")
+@click.option("--warehouses", default=2, help="Number of warehouses")
+@click.option("--entries", default=100, help="Stock ledger entries per item-warehouse")
+@click.option("--batches", default=0, help="Batches per item, items are batched when set")
+@click.option("--serialized", default=0, help="Number of items tracked by serial no")
+@click.option("--backdated", default=10, help="Backdated entries to post and repost")
+@click.option("--days", default=365, help="Period over which the entries are spread")
+@click.option(
+	"--company", default=None, help="Company to post the ledger in, defaults to the default company"
+)
+@click.option("--seed", default=42, help="Seed for the synthetic ledger")
+@click.option("--cleanup", is_flag=True, default=False, help="Remove generated data after the run")
+@pass_context
+def run_stock_benchmark(
+	context, items, warehouses, entries, batches, serialized, backdated, days, company, seed, cleanup
+):
+	"Time stock valuation and reposting on a synthetic stock ledger"
+	import frappe
+
+	from erpnext.stock.tests import stock_benchmark
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+
+	try:
+		benchmark = stock_benchmark.StockBenchmark(
+			items=items,
+			warehouses=warehouses,
+			entries=entries,
+			batches=batches,
+			serialized=serialized,
+			backdated=backdated,
+			days=days,
+			company=company,
+			seed=seed,
+		)
+		stock_benchmark.print_results(benchmark.run())
+
+		if cleanup:
+			stock_benchmark.cleanup()
+	finally:
+		frappe.destroy()
+
+
+commands = [run_stock_benchmark]
@@ -28,10 +28,19 @@ from frappe.utils import (
 )
 
 import erpnext
+from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
+	invalidate_closing_balance_snapshots_of_voucher,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 	get_dimensions,
 )
+from erpnext.accounts.doctype.daily_account_balance.daily_account_balance import (
+	reverse_daily_account_balances,
+)
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	update_payment_ledger_outstanding,
+)
 from erpnext.accounts.doctype.pricing_rule.utils import (
 	apply_pricing_rule_for_free_items,
 	apply_pricing_rule_on_transaction,
@@ -45,10 +54,13 @@ from erpnext.accounts.party import (
 	validate_party_frozen_disabled,
 )
 from erpnext.accounts.utils import (
+	clear_balances_cache,
 	create_gain_loss_journal,
 	get_account_currency,
+	get_against_vouchers,
 	get_currency_precision,
 	get_fiscal_years,
+	invalidate_gl_cache,
 	validate_fiscal_year,
 )
 from erpnext.buying.utils import update_last_purchase_rate
@@ -354,6 +366,7 @@ class AccountsController(TransactionBase):
 		# delete sl and gl entries on deletion of transaction
 		if frappe.db.get_single_value("Accounts Settings", "delete_linked_ledger_entries"):
 			ple = frappe.qb.DocType("Payment Ledger Entry")
+			against_vouchers = get_against_vouchers(self.doctype, self.name)
 			frappe.qb.from_(ple).delete().where(
 				(ple.voucher_type == self.doctype) & (ple.voucher_no == self.name)
 				| (
@@ -363,6 +376,11 @@ class AccountsController(TransactionBase):
 					== 1
 				)
 			).run()
+			update_payment_ledger_outstanding(against_vouchers)
+			reverse_daily_account_balances(self.doctype, self.name)
+			invalidate_closing_balance_snapshots_of_voucher(self.doctype, self.name)
+			clear_balances_cache()
+			invalidate_gl_cache([self.company])
 			frappe.db.sql(
 				"delete from `tabGL Entry` where voucher_type=%s and voucher_no=%s", (self.doctype, self.name)
 			)
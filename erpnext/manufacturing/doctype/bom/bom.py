@@ -21,6 +21,31 @@ from erpnext.stock.get_item_details import get_conversion_factor, get_price_list
 form_grid_templates = {"items": "templates/form_grid/item_grid.html"}
 
 
+OPERATION_COST_FIELDS = (
+	"hour_rate",
+	"base_hour_rate",
+	"operating_cost",
+	"base_operating_cost",
+	"cost_per_unit",
+	"base_cost_per_unit",
+)
+
+# item defaults that fall back to these defaults of the company in BOM explosions
+COMPANY_DEFAULT_FIELDS = {"expense_account": "stock_adjustment_account", "cost_center": "cost_center"}
+
+# Item and Item Default fields carried by the cached BOM explosions
+EXPLOSION_ITEM_FIELDS = (
+	"item_name",
+	"description",
+	"image",
+	"stock_uom",
+	"item_group",
+	"allow_alternative_item",
+	"is_stock_item",
+)
+EXPLOSION_ITEM_DEFAULT_FIELDS = ("company", "default_warehouse", "expense_account", "buying_cost_center")
+
+
 class BOMRecursionError(frappe.ValidationError):
 	pass
 
@@ -270,13 +295,16 @@ class BOM(WebsiteGenerator):
 
 	def on_update(self):
 		frappe.cache().hdel("bom_children", self.name)
+		clear_bom_explosion_cache(self.name)
 		self.check_recursion()
 
 	def on_submit(self):
+		clear_bom_explosion_cache(self.name)
 		self.manage_default_bom()
 		self.update_bom_creator_status()
 
 	def on_cancel(self):
+		clear_bom_explosion_cache(self.name)
 		self.db_set("is_active", 0)
 		self.db_set("is_default", 0)
 
@@ -444,9 +472,10 @@ class BOM(WebsiteGenerator):
 			rate = get_valuation_rate(arg)
 		elif arg:
 			# Customer Provided parts and Supplier sourced parts will have zero rate
-			if not frappe.db.get_value("Item", arg["item_code"], "is_customer_provided_item") and not arg.get(
-				"sourced_by_supplier"
-			):
+			is_customer_provided_item = frappe.get_cached_value(
+				"Item", arg["item_code"], "is_customer_provided_item"
+			)
+			if not is_customer_provided_item and not arg.get("sourced_by_supplier"):
 				if arg.get("bom_no") and self.set_rate_of_sub_assembly_item_based_on_bom:
 					rate = flt(self.get_bom_unitcost(arg["bom_no"])) * (arg.get("conversion_factor") or 1)
 				else:
@@ -512,6 +541,10 @@ class BOM(WebsiteGenerator):
 			)
 
 	def get_bom_unitcost(self, bom_no):
+		# unit costs preloaded by the BOM cost update jobs
+		if frappe.flags.bom_unit_costs and bom_no in frappe.flags.bom_unit_costs:
+			return frappe.flags.bom_unit_costs[bom_no]
+
 		bom = frappe.db.sql(
 			"""select name, base_total_cost/quantity as unit_cost from `tabBOM`
 			where is_active = 1 and name = %s""",
@@ -767,6 +800,8 @@ class BOM(WebsiteGenerator):
 			self.base_operating_cost = flt(total_operating_cost * self.conversion_rate, 2)
 
 	def update_rate_and_time(self, row, update_hour_rate=False):
+		old_costs = [row.get(field) for field in OPERATION_COST_FIELDS]
+
 		if not row.hour_rate or update_hour_rate:
 			hour_rate = flt(frappe.get_cached_value("Workstation", row.workstation, "hour_rate"))
 
@@ -782,7 +817,7 @@ class BOM(WebsiteGenerator):
 			row.cost_per_unit = row.operating_cost / (row.batch_size or 1.0)
 			row.base_cost_per_unit = row.base_operating_cost / (row.batch_size or 1.0)
 
-		if update_hour_rate:
+		if update_hour_rate and old_costs != [row.get(field) for field in OPERATION_COST_FIELDS]:
 			row.db_update()
 
 	def calculate_rm_cost(self, save=False):
@@ -831,6 +866,7 @@ class BOM(WebsiteGenerator):
 		base_total_sm_cost = 0
 
 		for d in self.get("scrap_items"):
+			old_costs = (d.base_rate, d.amount, d.base_amount)
 			d.base_rate = flt(d.rate, d.precision("rate")) * flt(
 				self.conversion_rate, self.precision("conversion_rate")
 			)
@@ -840,7 +876,7 @@ class BOM(WebsiteGenerator):
 			)
 			total_sm_cost += d.amount
 			base_total_sm_cost += d.base_amount
-			if save:
+			if save and old_costs != (d.base_rate, d.amount, d.base_amount):
 				d.db_update()
 
 		self.scrap_material_cost = total_sm_cost
@@ -858,6 +894,7 @@ class BOM(WebsiteGenerator):
 			if old_rate != row.rate:
 				# Only db_update if changed
 				row.db_update()
+				clear_bom_explosion_cache(self.name)
 
 	def get_rm_rate_map(self) -> dict[str, float]:
 		"Create Raw Material-Rate map for Exploded Items. Fetch rate from Items table or Subassembly BOM."
@@ -920,30 +957,7 @@ class BOM(WebsiteGenerator):
 
 	def get_child_exploded_items(self, bom_no, stock_qty):
 		"""Add all items from Flat BOM of child BOM"""
-		# Did not use qty_consumed_per_unit in the query, as it leads to rounding loss
-		child_fb_items = frappe.db.sql(
-			"""
-			SELECT
-				bom_item.item_code,
-				bom_item.item_name,
-				bom_item.description,
-				bom_item.source_warehouse,
-				bom_item.operation,
-				bom_item.stock_uom,
-				bom_item.stock_qty,
-				bom_item.rate,
-				bom_item.include_item_in_manufacturing,
-				bom_item.sourced_by_supplier,
-				bom_item.stock_qty / ifnull(bom.quantity, 1) AS qty_consumed_per_unit
-			FROM `tabBOM Explosion Item` bom_item, `tabBOM` bom
-			WHERE
-				bom_item.parent = bom.name
-				AND bom.name = %s
-				AND bom.docstatus = 1
-		""",
-			bom_no,
-			as_dict=1,
-		)
+		child_fb_items = get_exploded_items_per_unit(bom_no)
 
 		for d in child_fb_items:
 			self.add_to_cur_exploded_items(
@@ -969,6 +983,7 @@ class BOM(WebsiteGenerator):
 
 		if save:
 			frappe.db.sql("""delete from `tabBOM Explosion Item` where parent=%s""", self.name)
+			clear_bom_explosion_cache(self.name)
 
 		for d in sorted(self.cur_exploded_items, key=itemgetter(0)):
 			ch = self.append("exploded_items", {})
@@ -1084,6 +1099,12 @@ def get_valuation_rate(data):
 	item_code, company = data.get("item_code"), data.get("company")
 	valuation_rate = 0.0
 
+	# valuation rates are shared by all the BOMs of a BOM cost update job
+	warehouse = data.get("warehouse") if data.get("set_rate_based_on_warehouse") else None
+	key = (item_code, company, warehouse)
+	if frappe.flags.bom_valuation_rates is not None and key in frappe.flags.bom_valuation_rates:
+		return frappe.flags.bom_valuation_rates[key]
+
 	bin_table = frappe.qb.DocType("Bin")
 	wh_table = frappe.qb.DocType("Warehouse")
 	item_valuation = (
@@ -1125,6 +1146,9 @@ def get_valuation_rate(data):
 	if not valuation_rate:
 		valuation_rate = frappe.db.get_value("Item", item_code, "valuation_rate")
 
+	if frappe.flags.bom_valuation_rates is not None:
+		frappe.flags.bom_valuation_rates[key] = flt(valuation_rate)
+
 	return flt(valuation_rate)
 
 
@@ -1133,6 +1157,63 @@ def get_list_context(context):
 	# context.introduction = _('Boms')
 
 
+def get_exploded_items_per_unit(bom_no):
+	"""Flat BOM of the submitted `bom_no` per unit, cached until the BOM is modified"""
+
+	modified = frappe.get_cached_value("BOM", bom_no, "modified")
+	cached = frappe.cache().hget("bom_exploded_items", bom_no)
+	if cached and cached["modified"] == modified:
+		return cached["items"]
+
+	# Did not use qty_consumed_per_unit in the query, as it leads to rounding loss
+	items = frappe.db.sql(
+		"""
+		SELECT
+			bom_item.item_code,
+			bom_item.item_name,
+			bom_item.description,
+			bom_item.source_warehouse,
+			bom_item.operation,
+			bom_item.stock_uom,
+			bom_item.stock_qty,
+			bom_item.rate,
+			bom_item.include_item_in_manufacturing,
+			bom_item.sourced_by_supplier,
+			bom_item.stock_qty / ifnull(bom.quantity, 1) AS qty_consumed_per_unit
+		FROM `tabBOM Explosion Item` bom_item, `tabBOM` bom
+		WHERE
+			bom_item.parent = bom.name
+			AND bom.name = %s
+			AND bom.docstatus = 1
+	""",
+		bom_no,
+		as_dict=1,
+	)
+
+	frappe.cache().hset("bom_exploded_items", bom_no, {"modified": modified, "items": items})
+	return items
+
+
+def clear_bom_explosion_cache(bom_no=None):
+	"""Clear the cached explosion of `bom_no`, or of all BOMs if not set"""
+
+	for key in ("bom_exploded_items", "bom_items_per_unit"):
+		if bom_no:
+			frappe.cache().hdel(key, bom_no)
+		else:
+			frappe.cache().delete_key(key)
+
+
+def clear_bom_explosion_cache_for_item(item_code):
+	"""Clear the cached explosions of the BOMs that contain `item_code`"""
+
+	for doctype in ("BOM Item", "BOM Explosion Item", "BOM Scrap Item"):
+		for bom_no in frappe.get_all(
+			doctype, filters={"item_code": item_code, "parenttype": "BOM"}, pluck="parent", distinct=True
+		):
+			clear_bom_explosion_cache(bom_no)
+
+
 def get_bom_items_as_dict(
 	bom,
 	company,
@@ -1141,6 +1222,62 @@ def get_bom_items_as_dict(
 	fetch_scrap_items=0,
 	include_non_stock_items=False,
 	fetch_qty_in_stock_uom=True,
+):
+	item_dict = get_bom_items_per_unit(
+		bom, company, fetch_exploded, fetch_scrap_items, include_non_stock_items, fetch_qty_in_stock_uom
+	)
+
+	# copied, as the cached rows are shared within the request
+	item_dict = {
+		key: frappe._dict(item, qty=flt(item.qty) * flt(qty), amount=flt(item.amount) * flt(qty))
+		for key, item in item_dict.items()
+	}
+
+	# company defaults are not cached, so changes to the company apply right away
+	for item_details in item_dict.values():
+		for fieldname, company_fieldname in COMPANY_DEFAULT_FIELDS.items():
+			if not item_details.get(fieldname):
+				item_details[fieldname] = frappe.get_cached_value("Company", company, company_fieldname)
+
+	return item_dict
+
+
+def get_bom_items_per_unit(
+	bom, company, fetch_exploded, fetch_scrap_items, include_non_stock_items, fetch_qty_in_stock_uom
+):
+	"""`get_bom_items_as_dict` for one unit of `bom`, cached until the BOM is modified"""
+
+	variant = (company, cint(fetch_exploded), cint(fetch_scrap_items))
+	variant += (cint(include_non_stock_items), cint(fetch_qty_in_stock_uom))
+	modified = frappe.get_cached_value("BOM", bom, "modified")
+
+	cached = frappe.cache().hget("bom_items_per_unit", bom)
+	if not cached or cached["modified"] != modified:
+		cached = {"modified": modified, "variants": {}}
+
+	if variant not in cached["variants"]:
+		cached["variants"][variant] = fetch_bom_items_as_dict(
+			bom,
+			company,
+			qty=1,
+			fetch_exploded=fetch_exploded,
+			fetch_scrap_items=fetch_scrap_items,
+			include_non_stock_items=include_non_stock_items,
+			fetch_qty_in_stock_uom=fetch_qty_in_stock_uom,
+		)
+		frappe.cache().hset("bom_items_per_unit", bom, cached)
+
+	return cached["variants"][variant]
+
+
+def fetch_bom_items_as_dict(
+	bom,
+	company,
+	qty=1,
+	fetch_exploded=1,
+	fetch_scrap_items=0,
+	include_non_stock_items=False,
+	fetch_qty_in_stock_uom=True,
 ):
 	item_dict = {}
 
@@ -1230,15 +1367,16 @@ def get_bom_items_as_dict(
 		else:
 			item_dict[key] = item
 
+	# defaults of another company are dropped, `get_bom_items_as_dict` sets those of `company`
 	for item, item_details in item_dict.items():
 		for d in [
-			["Account", "expense_account", "stock_adjustment_account"],
-			["Cost Center", "cost_center", "cost_center"],
-			["Warehouse", "default_warehouse", ""],
+			["Account", "expense_account"],
+			["Cost Center", "cost_center"],
+			["Warehouse", "default_warehouse"],
 		]:
 			company_in_record = frappe.db.get_value(d[0], item_details.get(d[1]), "company")
 			if not item_details.get(d[1]) or (company_in_record and company != company_in_record):
-				item_dict[item][d[1]] = frappe.get_cached_value("Company", company, d[2]) if d[2] else None
+				item_dict[item][d[1]] = None
 
 	return item_dict
 
@@ -56,6 +56,47 @@ class TestBOM(FrappeTestCase):
 
 		self.assertEqual(len(get_bom_items(bom=get_default_bom(), company="_Test Company")), 3)
 
+	@timeout
+	def test_cached_bom_items_follow_qty_and_changes(self):
+		from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
+
+		def get_qty(bom, qty=1):
+			items = get_bom_items_as_dict(bom=bom.name, company="_Test Company", qty=qty, fetch_exploded=0)
+			return {item_code: flt(d.qty, 6) for item_code, d in items.items()}
+
+		bom = frappe.copy_doc(test_records[2])
+		bom.insert()
+
+		per_unit = get_qty(bom)
+		self.assertEqual(get_qty(bom, qty=3), {d: flt(qty * 3, 6) for d, qty in per_unit.items()})
+
+		# rows returned earlier are copies of the cached ones
+		for d in get_bom_items_as_dict(bom=bom.name, company="_Test Company", fetch_exploded=0).values():
+			d.qty = 0
+		self.assertEqual(get_qty(bom), per_unit)
+
+		bom.items[0].qty += 1
+		bom.save()
+		self.assertEqual(get_qty(bom)[bom.items[0].item_code], flt(bom.items[0].stock_qty / bom.quantity, 6))
+
+	@timeout
+	def test_cached_bom_items_follow_item_changes(self):
+		from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
+
+		bom = frappe.copy_doc(test_records[2])
+		bom.insert()
+		item_code = bom.items[0].item_code
+
+		def get_item_name():
+			items = get_bom_items_as_dict(bom=bom.name, company="_Test Company", fetch_exploded=0)
+			return items[item_code].item_name
+
+		get_item_name()
+		item = frappe.get_doc("Item", item_code)
+		item.item_name = "_Test BOM Cached Item Name"
+		item.save()
+		self.assertEqual(get_item_name(), item.item_name)
+
 	@timeout
 	def test_default_bom(self):
 		def _get_default_bom_in_item():
@@ -103,6 +144,22 @@ class TestBOM(FrappeTestCase):
 		):
 			self.assertEqual(d.base_rate, rm_base_rate + 10)
 
+	@timeout
+	def test_update_cost_writes_only_changed_totals(self):
+		from erpnext.manufacturing.doctype.bom_update_log.bom_updation_utils import update_cost_in_boms
+
+		bom = frappe.get_doc("BOM", "BOM-_Test Item Home Desktop Manufactured-001")
+		update_cost_in_boms([bom.name])
+		bom.reload()
+
+		# a stale total is recomputed from the rates, without touching the BOM otherwise
+		frappe.db.set_value("BOM", bom.name, "total_cost", 0, update_modified=False)
+		update_cost_in_boms([bom.name])
+
+		self.assertAlmostEqual(flt(frappe.db.get_value("BOM", bom.name, "total_cost")), flt(bom.total_cost))
+		self.assertEqual(frappe.db.get_value("BOM", bom.name, "modified"), bom.modified)
+		self.assertIsNone(frappe.flags.bom_unit_costs)
+
 	@timeout
 	def test_bom_cost(self):
 		bom = frappe.copy_doc(test_records[2])
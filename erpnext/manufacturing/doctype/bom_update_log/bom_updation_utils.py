@@ -12,6 +12,19 @@ if TYPE_CHECKING:
 import frappe
 from frappe import _
 
+from erpnext.manufacturing.doctype.bom.bom import clear_bom_explosion_cache
+
+BOM_COST_FIELDS = (
+	"operating_cost",
+	"base_operating_cost",
+	"raw_material_cost",
+	"base_raw_material_cost",
+	"scrap_material_cost",
+	"base_scrap_material_cost",
+	"total_cost",
+	"base_total_cost",
+)
+
 
 def replace_bom(boms: dict, log_name: str) -> None:
 	"Replace current BOM with new BOM in parent BOMs."
@@ -23,6 +36,7 @@ def replace_bom(boms: dict, log_name: str) -> None:
 	update_new_bom_in_bom_items(unit_cost, current_bom, new_bom)
 
 	frappe.cache().delete_key("bom_children")
+	clear_bom_explosion_cache()
 	parent_boms = get_ancestor_boms(new_bom)
 
 	for bom in parent_boms:
@@ -115,13 +129,61 @@ def get_bom_unit_cost(bom_name: str) -> float:
 def update_cost_in_boms(bom_list: list[str]) -> None:
 	"Updates cost in given BOMs. Returns current and total updated BOMs."
 
-	for index, bom in enumerate(bom_list):
-		bom_doc = frappe.get_doc("BOM", bom, for_update=True)
-		bom_doc.calculate_cost(save_updates=True, update_hour_rate=True)
-		bom_doc.db_update()
+	# rates shared by all the BOMs of the batch instead of being looked up per BOM Item
+	frappe.flags.bom_unit_costs = get_bom_unit_costs(bom_list)
+	frappe.flags.bom_valuation_rates = {}
 
-		if (index % 50 == 0) and not frappe.flags.in_test:
-			frappe.db.commit()  # nosemgrep
+	try:
+		for index, bom in enumerate(bom_list):
+			bom_doc = frappe.get_doc("BOM", bom, for_update=True)
+			old_costs = {field: bom_doc.get(field) for field in BOM_COST_FIELDS}
+			bom_doc.calculate_cost(save_updates=True, update_hour_rate=True)
+
+			# rows are saved by `calculate_cost`, only the changed totals remain to be written
+			changed_costs = {
+				field: bom_doc.get(field)
+				for field in BOM_COST_FIELDS
+				if bom_doc.get(field) != old_costs[field]
+			}
+			if changed_costs:
+				frappe.db.set_value("BOM", bom, changed_costs, update_modified=False)
+			clear_bom_explosion_cache(bom)
+
+			if (index % 50 == 0) and not frappe.flags.in_test:
+				frappe.db.commit()  # nosemgrep
+	finally:
+		frappe.flags.bom_unit_costs = None
+		frappe.flags.bom_valuation_rates = None
+
+
+def get_bom_unit_costs(bom_list: list[str]) -> dict[str, float]:
+	"Unit costs of the active sub assembly BOMs used in `bom_list`, updated by the previous levels."
+
+	if not bom_list:
+		return {}
+
+	bom = frappe.qb.DocType("BOM")
+	bom_item = frappe.qb.DocType("BOM Item")
+
+	sub_assembly_boms = (
+		frappe.qb.from_(bom_item)
+		.select(bom_item.bom_no)
+		.distinct()
+		.where(
+			(bom_item.parent.isin(bom_list))
+			& (bom_item.parenttype == "BOM")
+			& (bom_item.bom_no.isnotnull())
+			& (bom_item.bom_no != "")
+		)
+	)
+
+	unit_costs = (
+		frappe.qb.from_(bom)
+		.select(bom.name, bom.base_total_cost / bom.quantity)
+		.where((bom.is_active == 1) & (bom.name.isin(sub_assembly_boms)))
+	).run()
+
+	return {name: unit_cost or 0 for name, unit_cost in unit_costs}
 
 
 def get_next_higher_level_boms(child_boms: list[str], processed_boms: dict[str, bool]) -> list[str]:
@@ -1,5 +1,6 @@
 # Copyright (c) 2021, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
+import bisect
 import datetime
 import json
 from collections import OrderedDict
@@ -52,6 +53,48 @@ class JobCardOverTransferError(frappe.ValidationError):
 	pass
 
 
+class TimeLogIndex:
+	"""
+	Time logs of job cards sorted by their end time, to find the ones overlapping a slot without
+	querying them again. Logs ending before the earliest slot loaded so far are loaded on demand.
+	"""
+
+	def __init__(self, load_time_logs, from_time):
+		self.load_time_logs = load_time_logs
+		self.loaded_from = get_datetime(from_time)
+		self.time_logs = []
+		self.add(load_time_logs(self.loaded_from))
+
+	def add(self, time_logs):
+		self.time_logs.extend(time_logs)
+		self.time_logs.sort(key=lambda d: d.to_time)
+		self.to_times = [d.to_time for d in self.time_logs]
+
+	def get_overlapping(self, args, doctype, workstation=None):
+		from_time = get_datetime(args.from_time)
+		to_time = get_datetime(args.to_time) if args.to_time else None
+
+		if from_time < self.loaded_from:
+			self.add(self.load_time_logs(from_time, self.loaded_from))
+			self.loaded_from = from_time
+
+		time_logs = []
+		# logs ending before the slot starts cannot overlap it
+		for row in self.time_logs[bisect.bisect_left(self.to_times, from_time) :]:
+			if row.time_log_doctype != doctype or (workstation and row.workstation != workstation):
+				continue
+
+			# same conditions as in JobCard.get_time_logs
+			if (
+				(row.from_time < from_time and row.to_time > from_time)
+				or (to_time and row.from_time < to_time and row.to_time > to_time)
+				or (to_time and row.from_time >= from_time and row.to_time <= to_time)
+			):
+				time_logs.append(row)
+
+		return time_logs
+
+
 class JobCard(Document):
 	# begin: auto-generated types
 	# This code is auto-generated. Do not modify anything in this block.
@@ -344,6 +387,9 @@ class JobCard(Document):
 		return overlap
 
 	def get_time_logs(self, args, doctype, open_job_cards=None):
+		if self.flags.time_log_index and not args.get("employee"):
+			return self.flags.time_log_index.get_overlapping(args, doctype, self.workstation)
+
 		jc = frappe.qb.DocType("Job Card")
 		jctl = frappe.qb.DocType(doctype)
 
@@ -353,6 +399,29 @@ class JobCard(Document):
 			((jctl.from_time >= args.from_time) & (jctl.to_time <= args.to_time)),
 		]
 
+		query = self.get_time_logs_query(doctype).where(
+			(Criterion.any(time_conditions))
+			& (jctl.name != f"{args.name or 'No Name'}")
+			& (jc.name != f"{args.parent or 'No Name'}")
+		)
+
+		if args.get("employee"):
+			if not open_job_cards and doctype == "Job Card Scheduled Time":
+				return []
+
+			if doctype == "Job Card Time Log":
+				query = query.where(jctl.employee == args.get("employee"))
+			else:
+				query = query.where(jc.name.isin(open_job_cards))
+
+		time_logs = query.run(as_dict=True)
+
+		return time_logs
+
+	def get_time_logs_query(self, doctype):
+		jc = frappe.qb.DocType("Job Card")
+		jctl = frappe.qb.DocType(doctype)
+
 		query = (
 			frappe.qb.from_(jctl)
 			.from_(jc)
@@ -364,13 +433,7 @@ class JobCard(Document):
 				jc.workstation,
 				jc.workstation_type,
 			)
-			.where(
-				(jctl.parent == jc.name)
-				& (Criterion.any(time_conditions))
-				& (jctl.name != f"{args.name or 'No Name'}")
-				& (jc.name != f"{args.parent or 'No Name'}")
-				& (jc.docstatus < 2)
-			)
+			.where((jctl.parent == jc.name) & (jc.docstatus < 2))
 			.orderby(jctl.to_time)
 		)
 
@@ -380,19 +443,26 @@ class JobCard(Document):
 		if self.workstation:
 			query = query.where(jc.workstation == self.workstation)
 
-		if args.get("employee"):
-			if not open_job_cards and doctype == "Job Card Scheduled Time":
-				return []
-
-			if doctype == "Job Card Time Log":
-				query = query.where(jctl.employee == args.get("employee"))
-			else:
-				query = query.where(jc.name.isin(open_job_cards))
-
 		if doctype != "Job Card Time Log":
 			query = query.where(jc.total_time_in_mins == 0)
 
-		time_logs = query.run(as_dict=True)
+		return query
+
+	def load_time_logs(self, from_time, to_time=None):
+		"""Time logs and scheduled times of the workstation(s) ending in [from_time, to_time)"""
+
+		time_logs = []
+		for doctype in ("Job Card Time Log", "Job Card Scheduled Time"):
+			jctl = frappe.qb.DocType(doctype)
+			query = self.get_time_logs_query(doctype).where(
+				(jctl.from_time.isnotnull()) & (jctl.to_time >= from_time)
+			)
+			if to_time:
+				query = query.where(jctl.to_time < to_time)
+
+			for row in query.run(as_dict=True):
+				row.time_log_doctype = doctype
+				time_logs.append(row)
 
 		return time_logs
 
@@ -445,28 +515,34 @@ class JobCard(Document):
 		return time_slot
 
 	def schedule_time_logs(self, row):
-		row.remaining_time_in_mins = row.time_in_mins
-		while row.remaining_time_in_mins > 0:
-			args = frappe._dict({"from_time": row.planned_start_time, "to_time": row.planned_end_time})
+		# existing time logs are loaded once, instead of being queried for every slot tried
+		self.flags.time_log_index = TimeLogIndex(self.load_time_logs, row.planned_start_time)
+
+		try:
+			row.remaining_time_in_mins = row.time_in_mins
+			while row.remaining_time_in_mins > 0:
+				args = frappe._dict({"from_time": row.planned_start_time, "to_time": row.planned_end_time})
 
-			self.validate_overlap_for_workstation(args, row)
-			self.check_workstation_time(row)
+				self.validate_overlap_for_workstation(args, row)
+				self.check_workstation_time(row)
+		finally:
+			self.flags.time_log_index = None
 
 	def validate_overlap_for_workstation(self, args, row):
-		# get the last record based on the to time from the job card
-		data = self.get_overlap_for(args)
+		while True:
+			# get the last record based on the to time from the job card
+			data = self.get_overlap_for(args)
 
-		if not self.workstation:
-			workstations = get_workstations(self.workstation_type)
-			if workstations:
-				# Get the first workstation
-				self.workstation = workstations[0]
+			if not self.workstation:
+				workstations = get_workstations(self.workstation_type)
+				if workstations:
+					# Get the first workstation
+					self.workstation = workstations[0]
 
-		if not data:
-			row.planned_start_time = args.from_time
-			return
+			if not data:
+				row.planned_start_time = args.from_time
+				return
 
-		if data:
 			if data.get("planned_start_time"):
 				args.planned_start_time = get_datetime(data.planned_start_time)
 			else:
@@ -475,8 +551,6 @@ class JobCard(Document):
 			args.from_time = args.planned_start_time
 			args.to_time = add_to_date(args.planned_start_time, minutes=row.remaining_time_in_mins)
 
-			self.validate_overlap_for_workstation(args, row)
-
 	def check_workstation_time(self, row):
 		workstation_doc = frappe.get_cached_doc("Workstation", self.workstation)
 		if not workstation_doc.working_hours or cint(
@@ -7,7 +7,7 @@ from typing import Literal
 import frappe
 from frappe.test_runner import make_test_records
 from frappe.tests.utils import FrappeTestCase, change_settings
-from frappe.utils import random_string
+from frappe.utils import get_datetime, random_string
 from frappe.utils.data import add_to_date, now, today
 
 from erpnext.manufacturing.doctype.job_card.job_card import (
@@ -176,6 +176,38 @@ class TestJobCard(FrappeTestCase):
 		jc2.save()
 		self.assertTrue(jc2.name)
 
+	@change_settings("Manufacturing Settings", {"mins_between_operations": 10})
+	def test_schedule_time_logs_around_busy_slots(self):
+		wo2 = make_wo_order_test_record(item="_Test FG Item 2", qty=2)
+		workstation = make_workstation(workstation_name=random_string(5)).name
+
+		for work_order, from_time, to_time in [
+			(self.work_order.name, "2021-01-01 00:00:00", "2021-01-01 08:00:00"),
+			(wo2.name, "2021-01-01 08:15:00", "2021-01-01 09:00:00"),
+		]:
+			jc = frappe.get_last_doc("Job Card", {"work_order": work_order})
+			jc.workstation = workstation
+			jc.append("time_logs", {"from_time": from_time, "to_time": to_time, "completed_qty": 1})
+			jc.save()
+
+		jc = frappe.new_doc("Job Card")
+		jc.workstation = workstation
+		row = frappe._dict(
+			{
+				"planned_start_time": get_datetime("2021-01-01 02:00:00"),
+				"planned_end_time": get_datetime("2021-01-01 03:00:00"),
+				"time_in_mins": 60,
+			}
+		)
+		jc.schedule_time_logs(row)
+
+		# moved past the first log, then past the second one it runs into
+		self.assertEqual(len(jc.scheduled_time_logs), 1)
+		scheduled = jc.scheduled_time_logs[0]
+		self.assertEqual(get_datetime(scheduled.from_time), get_datetime("2021-01-01 09:10:00"))
+		self.assertEqual(get_datetime(scheduled.to_time), get_datetime("2021-01-01 10:10:00"))
+		self.assertIsNone(jc.flags.time_log_index)
+
 	def test_job_card_multiple_materials_transfer(self):
 		"Test transferring RMs separately against Job Card with multiple RMs."
 		self.transfer_material_against = "Job Card"
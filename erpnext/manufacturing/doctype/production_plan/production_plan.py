@@ -23,7 +23,6 @@ from frappe.utils import (
 from frappe.utils.csvutils import build_csv_response
 from pypika.terms import ExistsCriterion
 
-from erpnext.manufacturing.doctype.bom.bom import get_children as get_bom_children
 from erpnext.manufacturing.doctype.bom.bom import validate_bom_no
 from erpnext.manufacturing.doctype.work_order.work_order import get_item_details
 from erpnext.setup.doctype.item_group.item_group import get_item_group_defaults
@@ -893,6 +892,7 @@ class ProductionPlan(Document):
 		"Fetch sub assembly items and optionally combine them."
 		self.sub_assembly_items = []
 		sub_assembly_items_store = []  # temporary store to process all subassembly items
+		bom_tree = frappe._dict(children={}, items={}, bins={})  # BOMs loaded so far, shared by all rows
 
 		for row in self.po_items:
 			if self.skip_available_sub_assembly_item and not self.sub_assembly_warehouse:
@@ -907,7 +907,9 @@ class ProductionPlan(Document):
 			bom_data = []
 
 			warehouse = (self.sub_assembly_warehouse) if self.skip_available_sub_assembly_item else None
-			get_sub_assembly_items(row.bom_no, bom_data, row.planned_qty, self.company, warehouse=warehouse)
+			get_sub_assembly_items(
+				row.bom_no, bom_data, row.planned_qty, self.company, warehouse=warehouse, bom_tree=bom_tree
+			)
 			self.set_sub_assembly_items_based_on_level(row, bom_data, manufacturing_type)
 			sub_assembly_items_store.extend(bom_data)
 
@@ -1158,14 +1160,73 @@ def get_subitems(
 	include_subcontracted_items,
 	parent_qty,
 	planned_qty=1,
+	bom_items=None,
 ):
+	if bom_items is None:
+		bom_items = {}
+
+	load_bom_items(bom_items, bom_no, company, include_non_stock_items, data.get("include_exploded_items"))
+	items = [frappe._dict(d, qty=flt(parent_qty) * flt(d.qty) * flt(planned_qty)) for d in bom_items[bom_no]]
+
+	for d in items:
+		if not data.get("include_exploded_items") or not d.default_bom:
+			if d.item_code in item_details:
+				item_details[d.item_code].qty = item_details[d.item_code].qty + d.qty
+			else:
+				if not d.conversion_factor and d.purchase_uom:
+					d.conversion_factor = get_uom_conversion_factor(d.item_code, d.purchase_uom)
+
+				item_details[d.item_code] = d
+
+		if data.get("include_exploded_items") and d.default_bom:
+			if (
+				d.default_material_request_type in ["Manufacture", "Purchase"] and not d.is_sub_contracted
+			) or (d.is_sub_contracted and include_subcontracted_items):
+				if d.qty > 0:
+					get_subitems(
+						doc,
+						data,
+						item_details,
+						d.default_bom,
+						company,
+						include_non_stock_items,
+						include_subcontracted_items,
+						d.qty,
+						bom_items=bom_items,
+					)
+	return item_details
+
+
+def load_bom_items(bom_items, bom_no, company, include_non_stock_items, include_exploded_items=False):
+	"""
+	Load the items of `bom_no` per unit of the BOM into `bom_items`, and with
+	`include_exploded_items` those of their default BOMs all levels down. Each level
+	is fetched with one query for all its BOMs.
+	"""
+
+	to_load = {bom_no} - set(bom_items)
+
+	while to_load:
+		for bom in to_load:
+			bom_items[bom] = []
+
+		for d in get_bom_items_query(to_load, company, include_non_stock_items).run(as_dict=True):
+			bom_items[d.bom].append(d)
+
+		loaded, to_load = to_load, set()
+		if include_exploded_items:
+			to_load = {d.default_bom for bom in loaded for d in bom_items[bom] if d.default_bom}
+			to_load -= set(bom_items)
+
+
+def get_bom_items_query(bom_nos, company, include_non_stock_items):
 	bom_item = frappe.qb.DocType("BOM Item")
 	bom = frappe.qb.DocType("BOM")
 	item = frappe.qb.DocType("Item")
 	item_default = frappe.qb.DocType("Item Default")
 	item_uom = frappe.qb.DocType("UOM Conversion Detail")
 
-	items = (
+	return (
 		frappe.qb.from_(bom_item)
 		.join(bom)
 		.on(bom.name == bom_item.parent)
@@ -1176,12 +1237,11 @@ def get_subitems(
 		.left_join(item_uom)
 		.on((item.name == item_uom.parent) & (item_uom.uom == item.purchase_uom))
 		.select(
+			bom.name.as_("bom"),
 			bom_item.item_code,
 			item.default_material_request_type,
 			item.item_name,
-			IfNull(parent_qty * Sum(bom_item.stock_qty / IfNull(bom.quantity, 1)) * planned_qty, 0).as_(
-				"qty"
-			),
+			IfNull(Sum(bom_item.stock_qty / IfNull(bom.quantity, 1)), 0).as_("qty"),
 			item.is_sub_contracted_item.as_("is_sub_contracted"),
 			bom_item.source_warehouse,
 			item.default_bom.as_("default_bom"),
@@ -1194,39 +1254,14 @@ def get_subitems(
 			item_uom.conversion_factor,
 		)
 		.where(
-			(bom.name == bom_no)
+			(bom.name.isin(list(bom_nos)))
 			& (bom_item.docstatus < 2)
 			& (item.is_stock_item.isin([0, 1]) if include_non_stock_items else item.is_stock_item == 1)
 		)
-		.groupby(bom_item.item_code)
-	).run(as_dict=True)
-
-	for d in items:
-		if not data.get("include_exploded_items") or not d.default_bom:
-			if d.item_code in item_details:
-				item_details[d.item_code].qty = item_details[d.item_code].qty + d.qty
-			else:
-				if not d.conversion_factor and d.purchase_uom:
-					d.conversion_factor = get_uom_conversion_factor(d.item_code, d.purchase_uom)
-
-				item_details[d.item_code] = d
-
-		if data.get("include_exploded_items") and d.default_bom:
-			if (
-				d.default_material_request_type in ["Manufacture", "Purchase"] and not d.is_sub_contracted
-			) or (d.is_sub_contracted and include_subcontracted_items):
-				if d.qty > 0:
-					get_subitems(
-						doc,
-						data,
-						item_details,
-						d.default_bom,
-						company,
-						include_non_stock_items,
-						include_subcontracted_items,
-						d.qty,
-					)
-	return item_details
+		.groupby(bom.name, bom_item.item_code)
+		.orderby(bom.name)
+		.orderby(bom_item.item_code)
+	)
 
 
 def get_material_request_items(
@@ -1382,22 +1417,49 @@ def get_bin_details(row, company, for_warehouse=None, all_warehouse=False):
 	if isinstance(row, str):
 		row = frappe._dict(json.loads(row))
 
+	warehouse = ""
+	if not all_warehouse:
+		warehouse = for_warehouse or row.get("source_warehouse") or row.get("default_warehouse")
+
+	return get_bin_details_query([row["item_code"]], company, warehouse).run(as_dict=True)
+
+
+def get_bin_details_by_row(rows, company, for_warehouse=None):
+	"""`get_bin_details` of each of `rows`, with one query per warehouse rather than per row"""
+
+	warehouses = [
+		for_warehouse or row.get("source_warehouse") or row.get("default_warehouse") for row in rows
+	]
+
+	item_codes_by_warehouse = {}
+	for row, warehouse in zip(rows, warehouses, strict=True):
+		item_codes_by_warehouse.setdefault(warehouse, set()).add(row["item_code"])
+
+	bin_details = {}
+	for warehouse, item_codes in item_codes_by_warehouse.items():
+		for d in get_bin_details_query(item_codes, company, warehouse).run(as_dict=True):
+			bin_details.setdefault((d.item_code, warehouse), []).append(d)
+
+	return [
+		bin_details.get((row["item_code"], warehouse), [])
+		for row, warehouse in zip(rows, warehouses, strict=True)
+	]
+
+
+def get_bin_details_query(item_codes, company, warehouse=None):
 	bin = frappe.qb.DocType("Bin")
 	wh = frappe.qb.DocType("Warehouse")
 
 	subquery = frappe.qb.from_(wh).select(wh.name).where(wh.company == company)
 
-	warehouse = ""
-	if not all_warehouse:
-		warehouse = for_warehouse or row.get("source_warehouse") or row.get("default_warehouse")
-
 	if warehouse:
 		lft, rgt = frappe.db.get_value("Warehouse", warehouse, ["lft", "rgt"])
 		subquery = subquery.where((wh.lft >= lft) & (wh.rgt <= rgt) & (wh.name == bin.warehouse))
 
-	query = (
+	return (
 		frappe.qb.from_(bin)
 		.select(
+			bin.item_code,
 			bin.warehouse,
 			IfNull(Sum(bin.projected_qty), 0).as_("projected_qty"),
 			IfNull(Sum(bin.actual_qty), 0).as_("actual_qty"),
@@ -1405,12 +1467,12 @@ def get_bin_details(row, company, for_warehouse=None, all_warehouse=False):
 			IfNull(Sum(bin.reserved_qty_for_production), 0).as_("reserved_qty_for_production"),
 			IfNull(Sum(bin.planned_qty), 0).as_("planned_qty"),
 		)
-		.where((bin.item_code == row["item_code"]) & (bin.warehouse.isin(subquery)))
+		.where((bin.item_code.isin(list(item_codes))) & (bin.warehouse.isin(subquery)))
 		.groupby(bin.item_code, bin.warehouse)
+		.orderby(bin.item_code)
+		.orderby(bin.warehouse)
 	)
 
-	return query.run(as_dict=True)
-
 
 @frappe.whitelist()
 def get_so_details(sales_order):
@@ -1481,6 +1543,9 @@ def get_items_for_material_requests(doc, warehouses=None, get_parent_warehouse_d
 
 	so_item_details = frappe._dict()
 
+	# BOM items loaded so far, shared by all the rows
+	bom_items = {}
+
 	sub_assembly_items = {}
 	if doc.get("skip_available_sub_assembly_item") and doc.get("sub_assembly_items"):
 		for d in doc.get("sub_assembly_items"):
@@ -1542,6 +1607,7 @@ def get_items_for_material_requests(doc, warehouses=None, get_parent_warehouse_d
 						include_subcontracted_items,
 						1,
 						planned_qty=planned_qty,
+						bom_items=bom_items.setdefault(cint(include_non_stock_items), {}),
 					)
 		elif data.get("item_code"):
 			item_master = frappe.get_doc("Item", data["item_code"]).as_dict()
@@ -1579,26 +1645,30 @@ def get_items_for_material_requests(doc, warehouses=None, get_parent_warehouse_d
 			else:
 				so_item_details[sales_order][item_code] = details
 
+	rows = [
+		(sales_order, details)
+		for sales_order, item_dict in so_item_details.items()
+		for details in item_dict.values()
+	]
+	bin_details = get_bin_details_by_row([details for _so, details in rows], doc.company, warehouse)
+
 	mr_items = []
-	for sales_order in so_item_details:
-		item_dict = so_item_details[sales_order]
-		for details in item_dict.values():
-			bin_dict = get_bin_details(details, doc.company, warehouse)
-			bin_dict = bin_dict[0] if bin_dict else {}
-
-			if details.qty > 0:
-				items = get_material_request_items(
-					doc,
-					details,
-					sales_order,
-					company,
-					ignore_existing_ordered_qty,
-					include_safety_stock,
-					warehouse,
-					bin_dict,
-				)
-				if items:
-					mr_items.append(items)
+	for (sales_order, details), bin_dict in zip(rows, bin_details, strict=True):
+		bin_dict = bin_dict[0] if bin_dict else {}
+
+		if details.qty > 0:
+			items = get_material_request_items(
+				doc,
+				details,
+				sales_order,
+				company,
+				ignore_existing_ordered_qty,
+				include_safety_stock,
+				warehouse,
+				bin_dict,
+			)
+			if items:
+				mr_items.append(items)
 
 	if (not ignore_existing_ordered_qty or get_parent_warehouse_data) and warehouses:
 		new_mr_items = []
@@ -1689,17 +1759,21 @@ def get_item_data(item_code):
 	}
 
 
-def get_sub_assembly_items(bom_no, bom_data, to_produce_qty, company, warehouse=None, indent=0):
-	data = get_bom_children(parent=bom_no)
-	for d in data:
+def get_sub_assembly_items(
+	bom_no, bom_data, to_produce_qty, company, warehouse=None, indent=0, bom_tree=None
+):
+	if bom_tree is None:
+		bom_tree = frappe._dict(children={}, items={}, bins={})
+
+	load_bom_tree(bom_tree, bom_no, company, warehouse)
+
+	for d in bom_tree.children[bom_no]:
 		if d.expandable:
-			parent_item_code = frappe.get_cached_value("BOM", bom_no, "item")
+			parent_item_code = bom_tree.items[bom_no]
 			stock_qty = (d.stock_qty / d.parent_bom_qty) * flt(to_produce_qty)
 
 			if warehouse:
-				bin_details = get_bin_details(d, company, for_warehouse=warehouse)
-
-				for _bin_dict in bin_details:
+				for _bin_dict in bom_tree.bins.get(d.item_code, []):
 					if _bin_dict.projected_qty > 0:
 						if _bin_dict.projected_qty > stock_qty:
 							stock_qty = 0
@@ -1728,10 +1802,68 @@ def get_sub_assembly_items(bom_no, bom_data, to_produce_qty, company, warehouse=
 
 				if d.value:
 					get_sub_assembly_items(
-						d.value, bom_data, stock_qty, company, warehouse, indent=indent + 1
+						d.value,
+						bom_data,
+						stock_qty,
+						company,
+						warehouse,
+						indent=indent + 1,
+						bom_tree=bom_tree,
 					)
 
 
+def load_bom_tree(bom_tree, bom_no, company, warehouse=None):
+	"""
+	Load the children of `bom_no` and of its sub assembly BOMs all levels down into `bom_tree`,
+	as the BOM tree view lists them, along with the Bin details of the sub assemblies
+	in `warehouse`. Each level is fetched with one set of queries for all its BOMs.
+	"""
+
+	to_load = {bom_no} - set(bom_tree.children)
+
+	while to_load:
+		boms = frappe.get_list(
+			"BOM", fields=["name", "item", "quantity"], filters={"name": ("in", list(to_load))}
+		)
+		boms = {d.name: d for d in boms}
+		for name in to_load - set(boms):
+			frappe.has_permission("BOM", doc=name, throw=True)
+
+		bom_items = frappe.get_all(
+			"BOM Item",
+			fields=["parent", "item_code", "bom_no as value", "stock_qty"],
+			filters={"parent": ("in", list(to_load))},
+			order_by="idx",
+		)
+		items = frappe.get_all(
+			"Item",
+			fields=["name", "description", "stock_uom", "item_name", "is_sub_contracted_item"],
+			filters={"name": ("in", list({d.item_code for d in bom_items}))},
+		)
+		items = {d.name: d for d in items}
+
+		for name in to_load:
+			bom_tree.children[name] = []
+			bom_tree.items[name] = boms[name].item
+
+		for d in bom_items:
+			d.update(items[d.item_code])
+			d.parent_bom_qty = boms[d.parent].quantity
+			d.expandable = 0 if d.value in ("", None) else 1
+			bom_tree.children[d.parent].append(d)
+
+		sub_assemblies = [d for d in bom_items if d.expandable and d.item_code not in bom_tree.bins]
+		if warehouse and sub_assemblies:
+			for d in sub_assemblies:
+				bom_tree.bins[d.item_code] = []
+
+			item_codes = {d.item_code for d in sub_assemblies}
+			for d in get_bin_details_query(item_codes, company, warehouse).run(as_dict=True):
+				bom_tree.bins[d.item_code].append(d)
+
+		to_load = {d.value for d in bom_items if d.value} - set(bom_tree.children)
+
+
 def set_default_warehouses(row, default_warehouses):
 	for field in ["wip_warehouse", "fg_warehouse"]:
 		if not row.get(field):
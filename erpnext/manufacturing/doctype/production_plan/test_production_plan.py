@@ -576,6 +576,45 @@ class TestProductionPlan(FrappeTestCase):
 		pln.cancel()
 		frappe.delete_doc("Production Plan", pln.name)
 
+	def test_multi_level_bom_with_shared_sub_assemblies(self):
+		item_codes = ["Test MRP FG 1", "Test MRP FG 2", "Test MRP Sub 1", "Test MRP Sub 2", "Test MRP RM"]
+		for item_code in item_codes:
+			create_item(item_code, is_stock_item=1)
+
+		if not frappe.db.get_value("BOM", {"item": "Test MRP Sub 2"}):
+			make_bom(item="Test MRP Sub 2", raw_materials=["Test MRP RM"], rm_qty=2)
+
+		if not frappe.db.get_value("BOM", {"item": "Test MRP Sub 1"}):
+			make_bom(item="Test MRP Sub 1", raw_materials=["Test MRP Sub 2"], rm_qty=3)
+
+		if not frappe.db.get_value("BOM", {"item": "Test MRP FG 1"}):
+			make_bom(item="Test MRP FG 1", raw_materials=["Test MRP Sub 1"], rm_qty=1)
+
+		if not frappe.db.get_value("BOM", {"item": "Test MRP FG 2"}):
+			make_bom(item="Test MRP FG 2", raw_materials=["Test MRP Sub 2"], rm_qty=2)
+
+		pln = frappe.new_doc("Production Plan")
+		pln.company = "_Test Company"
+		pln.ignore_existing_ordered_qty = 1
+		for item_code, planned_qty in [("Test MRP FG 1", 2), ("Test MRP FG 2", 1)]:
+			pln.append(
+				"po_items",
+				{
+					"item_code": item_code,
+					"bom_no": frappe.db.get_value("Item", item_code, "default_bom"),
+					"planned_qty": planned_qty,
+				},
+			)
+
+		pln.get_sub_assembly_items("In House")
+		self.assertEqual(
+			[(d.production_item, d.bom_level, d.qty) for d in pln.sub_assembly_items],
+			[("Test MRP Sub 1", 0, 2), ("Test MRP Sub 2", 1, 6), ("Test MRP Sub 2", 0, 2)],
+		)
+
+		mr_items = get_items_for_material_requests(pln.as_dict())
+		self.assertEqual([(d["item_code"], d["quantity"]) for d in mr_items], [("Test MRP RM", 16)])
+
 	def test_get_warehouse_list_group(self):
 		"Check if required child warehouses are returned."
 		warehouse_json = '[{"warehouse":"_Test Warehouse Group - _TC"}]'
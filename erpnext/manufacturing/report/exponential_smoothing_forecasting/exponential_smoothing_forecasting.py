@@ -1,9 +1,11 @@
 # Copyright (c) 2020, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
+import bisect
 
 import frappe
 from frappe import _
+from frappe.query_builder.functions import Max, Sum
 from frappe.utils import add_years, cint, flt, getdate
 
 import erpnext
@@ -18,22 +20,38 @@ def execute(filters=None):
 class ExponentialSmoothingForecast:
 	def forecast_future_data(self):
 		for _key, value in self.period_wise_data.items():
-			forecast_data = []
-			for period in self.period_list:
-				forecast_key = "forecast_" + period.key
+			demand = [value.get(period.key) for period in self.period_list]
+			forecast = get_exponential_smoothing_forecast(
+				demand, flt(self.filters.smoothing_constant), flt(value.get("avg", 0))
+			)
+
+			for period, forecast_value in zip(self.period_list, forecast, strict=True):
+				if forecast_value is not None:
+					value["forecast_" + period.key] = forecast_value
 
-				if value.get(period.key) and not forecast_data:
-					value[forecast_key] = flt(value.get("avg", 0)) or flt(value.get(period.key))
 
-				elif forecast_data:
-					previous_period_data = forecast_data[-1]
-					value[forecast_key] = previous_period_data[1] + flt(self.filters.smoothing_constant) * (
-						flt(previous_period_data[0]) - flt(previous_period_data[1])
-					)
+def get_exponential_smoothing_forecast(demand, smoothing_constant, average=0.0):
+	"""
+	Forecast for each period of `demand`, None for the periods before the first demand. The first
+	forecast is `average` (or the first demand), each next one is smoothed from the last non zero
+	forecast and its demand.
+	"""
 
-				if value.get(forecast_key):
-					# will be use to forecaset next period
-					forecast_data.append([value.get(period.key), value.get(forecast_key)])
+	forecast = []
+	previous = None
+
+	for value in demand:
+		if previous is None:
+			forecast_value = (average or flt(value)) if value else None
+		else:
+			forecast_value = previous[1] + smoothing_constant * (flt(previous[0]) - flt(previous[1]))
+
+		forecast.append(forecast_value)
+		if forecast_value:
+			# will be use to forecaset next period
+			previous = (value, forecast_value)
+
+	return forecast
 
 
 class ForecastingReport(ExponentialSmoothingForecast):
@@ -42,6 +60,9 @@ class ForecastingReport(ExponentialSmoothingForecast):
 		self.data = []
 		self.doctype = self.filters.based_on_document
 		self.child_doctype = self.doctype + " Item"
+		self.date_field = (
+			"posting_date" if self.doctype in ("Delivery Note", "Sales Invoice") else "transaction_date"
+		)
 		self.based_on_field = "qty" if self.filters.based_on_field == "Qty" else "amount"
 		self.fieldtype = "Float" if self.based_on_field == "qty" else "Currency"
 		self.company_currency = erpnext.get_company_currency(self.filters.company)
@@ -72,20 +93,25 @@ class ForecastingReport(ExponentialSmoothingForecast):
 			ignore_fiscal_year=True,
 		)
 
+		# items sold only before the periods are listed too, without any demand
+		for entry in self.get_items_for_forecast():
+			self.period_wise_data[(entry.item_code, entry.warehouse)] = frappe._dict(
+				{"item_code": entry.item_code, "warehouse": entry.warehouse, "item_name": entry.item_name}
+			)
+
 		order_data = self.get_data_for_forecast() or []
 
+		# periods are contiguous and sorted, so the period of a date is found by bisecting the end dates
+		period_to_dates = [period.to_date for period in self.period_list]
+
 		for entry in order_data:
-			key = (entry.item_code, entry.warehouse)
-			if key not in self.period_wise_data:
-				self.period_wise_data[key] = entry
+			idx = bisect.bisect_left(period_to_dates, entry.posting_date)
+			if idx == len(self.period_list) or entry.posting_date < self.period_list[idx].from_date:
+				continue
 
-			period_data = self.period_wise_data[key]
-			for period in self.period_list:
-				# check if posting date is within the period
-				if entry.posting_date >= period.from_date and entry.posting_date <= period.to_date:
-					period_data[period.key] = period_data.get(period.key, 0.0) + flt(
-						entry.get(self.based_on_field)
-					)
+			period_data = self.period_wise_data[(entry.item_code, entry.warehouse)]
+			period_key = self.period_list[idx].key
+			period_data[period_key] = period_data.get(period_key, 0.0) + flt(entry.get(self.based_on_field))
 
 		for value in self.period_wise_data.values():
 			list_of_period_value = [value.get(p.key, 0) for p in self.period_list]
@@ -95,29 +121,45 @@ class ForecastingReport(ExponentialSmoothingForecast):
 				if total_qty:
 					value["avg"] = flt(sum(list_of_period_value)) / flt(sum(total_qty))
 
+	def get_items_for_forecast(self):
+		child = frappe.qb.DocType(self.child_doctype)
+
+		return (
+			self.get_history_query()
+			.select(child.item_code, child.warehouse, Max(child.item_name).as_("item_name"))
+			.groupby(child.item_code, child.warehouse)
+			.run(as_dict=True)
+		)
+
 	def get_data_for_forecast(self):
 		parent = frappe.qb.DocType(self.doctype)
 		child = frappe.qb.DocType(self.child_doctype)
 
-		date_field = (
-			"posting_date" if self.doctype in ("Delivery Note", "Sales Invoice") else "transaction_date"
+		return (
+			self.get_history_query()
+			.select(
+				parent[self.date_field].as_("posting_date"),
+				child.item_code,
+				child.warehouse,
+				Sum(child.stock_qty).as_("qty"),
+				Sum(child.base_amount).as_("amount"),
+			)
+			.where(parent[self.date_field] >= self.period_list[0].from_date)
+			.groupby(parent[self.date_field], child.item_code, child.warehouse)
+			.run(as_dict=True)
 		)
 
+	def get_history_query(self):
+		parent = frappe.qb.DocType(self.doctype)
+		child = frappe.qb.DocType(self.child_doctype)
+
 		query = (
 			frappe.qb.from_(parent)
 			.from_(child)
-			.select(
-				parent[date_field].as_("posting_date"),
-				child.item_code,
-				child.warehouse,
-				child.item_name,
-				child.stock_qty.as_("qty"),
-				child.base_amount.as_("amount"),
-			)
 			.where(
 				(parent.docstatus == 1)
 				& (parent.name == child.parent)
-				& (parent[date_field] < self.filters.from_date)
+				& (parent[self.date_field] < self.filters.from_date)
 				& (parent.company == self.filters.company)
 			)
 		)
@@ -129,7 +171,7 @@ class ForecastingReport(ExponentialSmoothingForecast):
 			warehouses = get_child_warehouses(self.filters.warehouse) or []
 			query = query.where(child.warehouse.isin(warehouses))
 
-		return query.run(as_dict=True)
+		return query
 
 	def prepare_final_data(self):
 		self.data = []
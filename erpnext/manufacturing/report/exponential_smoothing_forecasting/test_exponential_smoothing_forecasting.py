@@ -0,0 +1,57 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_months, today
+
+from erpnext.manufacturing.report.exponential_smoothing_forecasting.exponential_smoothing_forecasting import (
+	ForecastingReport,
+	get_exponential_smoothing_forecast,
+)
+from erpnext.selling.doctype.sales_order.test_sales_order import make_sales_order
+from erpnext.stock.doctype.item.test_item import make_item
+
+
+class TestExponentialSmoothingForecasting(FrappeTestCase):
+	def test_forecast_starts_at_first_demand(self):
+		# the first forecast is the average, each next one is smoothed from the previous period
+		self.assertEqual(
+			get_exponential_smoothing_forecast([0, None, 10, 20, 0], 0.5, average=12),
+			[None, None, 12, 11, 15.5],
+		)
+		self.assertEqual(get_exponential_smoothing_forecast([0, 10, 20], 0.5), [None, 10, 10])
+
+	def test_history_before_window_is_not_counted(self):
+		warehouse = "_Test Warehouse - _TC"
+		old_item = make_item("_Test Forecast Old Item", {"is_stock_item": 1}).name
+		item = make_item("_Test Forecast Item", {"is_stock_item": 1}).name
+
+		before_window = add_days(today(), -400)
+		make_sales_order(item_code=old_item, qty=3, transaction_date=before_window, warehouse=warehouse)
+		make_sales_order(item_code=item, qty=5, transaction_date=before_window, warehouse=warehouse)
+		make_sales_order(item_code=item, qty=7, transaction_date=add_days(today(), -30), warehouse=warehouse)
+
+		report = ForecastingReport(
+			{
+				"company": "_Test Company",
+				"from_date": today(),
+				"to_date": add_months(today(), 12),
+				"based_on_document": "Sales Order",
+				"based_on_field": "Qty",
+				"no_of_years": 1,
+				"periodicity": "Yearly",
+				"smoothing_constant": 0.3,
+				"warehouse": warehouse,
+			}
+		)
+		report.execute_report()
+
+		# items sold only before the window are still listed, without any demand
+		old_row = report.period_wise_data[(old_item, warehouse)]
+		self.assertFalse(any(old_row.get(period.key) for period in report.period_list))
+		self.assertIn(old_item, [row.get("item_code") for row in report.data])
+
+		row = report.period_wise_data[(item, warehouse)]
+		self.assertEqual(sum(row.get(period.key, 0) for period in report.period_list), 7)
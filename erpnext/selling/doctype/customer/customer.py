@@ -17,6 +17,10 @@ from frappe.model.utils.rename_doc import update_linked_doctypes
 from frappe.utils import cint, cstr, flt, get_formatted_email, today
 from frappe.utils.user import get_users_with_role
 
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	get_party_outstanding,
+	is_payment_ledger_outstanding_built,
+)
 from erpnext.accounts.party import get_dashboard_info, validate_party_accounts
 from erpnext.controllers.website_list_for_contact import add_role_for_portal_user
 from erpnext.utilities.transaction_base import TransactionBase
@@ -586,16 +590,20 @@ def get_customer_outstanding(customer, company, ignore_outstanding_sales_order=F
 		cond = f""" and cost_center in (select name from `tabCost Center` where
 			lft >= {lft} and rgt <= {rgt})"""
 
-	outstanding_based_on_gle = frappe.db.sql(
-		f"""
-		select sum(debit) - sum(credit)
-		from `tabGL Entry` where party_type = 'Customer'
-		and is_cancelled = 0 and party = %s
-		and company=%s {cond}""",
-		(customer, company),
-	)
+	if not cost_center and is_payment_ledger_outstanding_built():
+		# receivables are maintained per voucher, no need to sum up the ledger of the customer
+		outstanding_based_on_gle = get_party_outstanding(company, "Customer", customer, "Receivable")
+	else:
+		outstanding_based_on_gle = frappe.db.sql(
+			f"""
+			select sum(debit) - sum(credit)
+			from `tabGL Entry` where party_type = 'Customer'
+			and is_cancelled = 0 and party = %s
+			and company=%s {cond}""",
+			(customer, company),
+		)
 
-	outstanding_based_on_gle = flt(outstanding_based_on_gle[0][0]) if outstanding_based_on_gle else 0
+		outstanding_based_on_gle = flt(outstanding_based_on_gle[0][0]) if outstanding_based_on_gle else 0
 
 	# Outstanding based on Sales Order
 	outstanding_based_on_so = 0
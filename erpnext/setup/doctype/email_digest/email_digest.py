@@ -22,7 +22,7 @@ from frappe.utils import (
 	today,
 )
 
-from erpnext.accounts.utils import get_balance_on, get_count_on, get_fiscal_year
+from erpnext.accounts.utils import get_balance_on, get_balances_on, get_count_on, get_fiscal_year
 
 user_specific_content = ["calendar_events", "todo_list"]
 
@@ -613,12 +613,12 @@ class EmailDigest(Document):
 				)
 			]
 
-		balance = prev_balance = 0.0
+		balances = get_balances_on(accounts, date=self.future_to_date, in_account_currency=False)
+		prev_balances = get_balances_on(accounts, date=self.past_to_date, in_account_currency=False)
+		balance, prev_balance = sum(balances.values()), sum(prev_balances.values())
 		count = 0
 		for account in accounts:
-			balance += get_balance_on(account, date=self.future_to_date, in_account_currency=False)
 			count += get_count_on(account, fieldname, date=self.future_to_date)
-			prev_balance += get_balance_on(account, date=self.past_to_date, in_account_currency=False)
 
 		if fieldname in ("bank_balance", "credit_balance"):
 			label = ""
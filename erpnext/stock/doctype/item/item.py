@@ -220,6 +220,29 @@ class Item(Document):
 	def on_update(self):
 		self.update_variants()
 		self.update_item_price()
+		self.clear_bom_explosion_cache()
+
+	def clear_bom_explosion_cache(self):
+		"""Cached BOM items carry item details and defaults, clear them for the BOMs using this item"""
+		from erpnext.manufacturing.doctype.bom.bom import (
+			EXPLOSION_ITEM_DEFAULT_FIELDS,
+			EXPLOSION_ITEM_FIELDS,
+			clear_bom_explosion_cache_for_item,
+		)
+
+		doc_before_save = self.get_doc_before_save()
+		if not doc_before_save:
+			return
+
+		def get_defaults(doc):
+			return sorted(
+				tuple(cstr(d.get(fieldname)) for fieldname in EXPLOSION_ITEM_DEFAULT_FIELDS)
+				for d in doc.get("item_defaults")
+			)
+
+		details_changed = any(self.has_value_changed(fieldname) for fieldname in EXPLOSION_ITEM_FIELDS)
+		if details_changed or get_defaults(self) != get_defaults(doc_before_save):
+			clear_bom_explosion_cache_for_item(self.name)
 
 	def validate_description(self):
 		"""Clean HTML description if set"""
@@ -559,6 +582,10 @@ class Item(Document):
 			)
 
 		frappe.db.set_value("Item", new_name, "item_code", new_name)
+		# cached BOM items still refer to the old item code
+		from erpnext.manufacturing.doctype.bom.bom import clear_bom_explosion_cache
+
+		clear_bom_explosion_cache()
 
 		if merge:
 			self.set_last_purchase_rate(new_name)
@@ -9,7 +9,9 @@ from frappe.model.document import Document
 from frappe.query_builder import DocType, Interval
 from frappe.query_builder.functions import Max, Now
 from frappe.utils import cint, get_link_to_form, get_weekday, getdate, now, nowtime
+from frappe.utils.background_jobs import get_job
 from frappe.utils.user import get_users_with_role
+from rq.job import JobStatus
 from rq.timeouts import JobTimeoutException
 
 import erpnext
@@ -17,12 +19,29 @@ from erpnext.accounts.general_ledger import validate_accounting_period
 from erpnext.accounts.utils import get_future_stock_vouchers, repost_gle_for_stock_vouchers
 from erpnext.stock.stock_ledger import (
 	get_affected_transactions,
+	get_changed_transactions,
+	get_distinct_item_warehouse,
 	get_items_to_be_repost,
 	repost_future_sle,
+	update_args_in_repost_item_valuation,
 )
+from erpnext.stock.utils import get_combine_datetime
 
 RecoverableErrors = (JobTimeoutException, QueryDeadlockError, QueryTimeoutError)
 
+REPOST_FIELDS = [
+	"name",
+	"based_on",
+	"item_code",
+	"warehouse",
+	"voucher_type",
+	"voucher_no",
+	"posting_date",
+	"posting_time",
+	"creation",
+]
+REPOST_FLAG_FIELDS = ["allow_negative_stock", "allow_zero_rate", "via_landed_cost_voucher"]
+
 
 class RepostItemValuation(Document):
 	# begin: auto-generated types
@@ -352,6 +371,25 @@ def repost_gl_entries(doc):
 	if not cint(erpnext.is_perpetual_inventory_enabled(doc.company)):
 		return
 
+	changed_transactions = None
+	if frappe.db.get_single_value("Stock Reposting Settings", "only_repost_gl_of_changed_vouchers"):
+		changed_transactions = get_changed_transactions(doc)
+
+	if changed_transactions is not None:
+		# GL entries of the voucher of the repost itself can change (accounts, cost centers etc)
+		# without a change in its stock value. Vouchers of merged reposts are part of
+		# `changed_transactions` already, valuation of the other vouchers is unchanged.
+		if doc.voucher_type and doc.voucher_no:
+			changed_transactions.add((doc.voucher_type, doc.voucher_no))
+
+		repost_gle_for_stock_vouchers(
+			list(changed_transactions),
+			doc.posting_date,
+			doc.company,
+			repost_doc=doc,
+		)
+		return
+
 	# directly modified transactions
 	directly_dependent_transactions = _get_directly_dependent_vouchers(doc)
 	repost_affected_transaction = get_affected_transactions(doc)
@@ -432,18 +470,281 @@ def repost_entries():
 	if not in_configured_timeslot():
 		return
 
+	repost_settings = frappe.get_cached_doc("Stock Reposting Settings")
+	no_of_workers = cint(repost_settings.no_of_parallel_reposting) or 1
+	if repost_settings.enable_parallel_reposting and is_repost_partition_in_progress(no_of_workers):
+		# reposts of the previous run are still being processed, they must not be coalesced
+		# or picked again, otherwise they would be reposted twice
+		return
+
+	coalesce_similar_reposts()
 	riv_entries = get_repost_item_valuation_entries()
 
-	for row in riv_entries:
-		doc = frappe.get_doc("Repost Item Valuation", row.name)
+	if repost_settings.enable_parallel_reposting and len(riv_entries) > 1:
+		enqueue_repost_partitions(riv_entries, no_of_workers)
+		return
+
+	repost_partition([row.name for row in riv_entries])
+
+	riv_entries = get_repost_item_valuation_entries()
+	if riv_entries:
+		return
+
+
+def repost_partition(riv_names):
+	"""Repost the given 'Repost Item Valuation' entries one after another.
+
+	Every entry is committed (and checkpointed through `current_index`) separately,
+	so a partition which gets interrupted resumes from the last unfinished entry.
+	"""
+	for name in riv_names:
+		doc = frappe.get_doc("Repost Item Valuation", name)
 		if doc.status in ("Queued", "In Progress"):
 			repost(doc)
 			doc.deduplicate_similar_repost()
 
-	riv_entries = get_repost_item_valuation_entries()
-	if riv_entries:
+
+def get_partition_job_id(worker):
+	return f"repost_item_valuation::worker-{worker}"
+
+
+def is_repost_partition_in_progress(no_of_workers):
+	"""Check if any partition job of a previous run is still queued or running."""
+	for worker in range(no_of_workers):
+		job = get_job(get_partition_job_id(worker))
+		if job and job.get_status() in (
+			JobStatus.QUEUED,
+			JobStatus.STARTED,
+			JobStatus.DEFERRED,
+			JobStatus.SCHEDULED,
+		):
+			return True
+
+	return False
+
+
+def enqueue_repost_partitions(riv_entries, no_of_workers):
+	"""Distribute independent reposts across `no_of_workers` background jobs."""
+	if is_repost_partition_in_progress(no_of_workers):
 		return
 
+	partitions = get_independent_repost_partitions([row.name for row in riv_entries])
+
+	# greedy balancing, largest partitions first
+	workers = [[] for _i in range(min(no_of_workers, len(partitions)))]
+	for partition in sorted(partitions, key=len, reverse=True):
+		min(workers, key=len).extend(partition)
+
+	order = {row.name: idx for idx, row in enumerate(riv_entries)}
+	for worker, riv_names in enumerate(workers):
+		frappe.enqueue(
+			repost_partition,
+			riv_names=sorted(riv_names, key=order.get),
+			queue="long",
+			timeout=7200,
+			job_id=get_partition_job_id(worker),
+		)
+
+
+def get_independent_repost_partitions(riv_names):
+	"""Split reposts into groups which do not share any item-warehouse chain.
+
+	Two reposts end up in the same partition when they touch a common item-warehouse,
+	or when stock of one flows into the other through `dependant_sle_voucher_detail_no`
+	(material transfers, manufacture, repack etc). Partitions can be reposted in parallel.
+	"""
+	riv_entries = frappe.get_all(
+		"Repost Item Valuation", filters={"name": ("in", riv_names)}, fields=REPOST_FIELDS
+	)
+
+	return [
+		[row.name for row in group]
+		for group in group_reposts_by_item_warehouse(riv_entries, follow_dependencies=True)
+	]
+
+
+def get_repost_item_warehouses(row):
+	"""Item-warehouses (with posting datetime to repost from) touched by a repost entry."""
+	if row.based_on == "Transaction":
+		return get_items_to_be_repost(row.voucher_type, row.voucher_no)
+
+	return [
+		frappe._dict(
+			{
+				"item_code": row.item_code,
+				"warehouse": row.warehouse,
+				"posting_date": row.posting_date,
+				"posting_time": row.posting_time,
+				"creation": row.creation,
+			}
+		)
+	]
+
+
+def group_reposts_by_item_warehouse(riv_entries, follow_dependencies=False):
+	"""Group repost entries touching common item-warehouses, preserving the order of `riv_entries`.
+
+	Sets `item_warehouses` on each row."""
+	parent = {}
+
+	def find(key):
+		parent.setdefault(key, key)
+		while parent[key] != key:
+			parent[key] = parent[parent[key]]
+			key = parent[key]
+
+		return key
+
+	def union(key, other_key):
+		parent[find(key)] = find(other_key)
+
+	riv_keys = {}
+	item_codes = set()
+	for row in riv_entries:
+		row.item_warehouses = get_repost_item_warehouses(row)
+		keys = [(d.item_code, d.warehouse) for d in row.item_warehouses]
+		item_codes.update(d.item_code for d in row.item_warehouses)
+
+		# use the voucher itself as key, so the repost gets a group even without any SLE
+		keys.append((row.voucher_type or "Repost Item Valuation", row.voucher_no or row.name))
+		riv_keys[row.name] = keys
+		for key in keys[1:]:
+			union(keys[0], key)
+
+	if riv_entries and follow_dependencies:
+		from_datetime = min(get_combine_datetime(d.posting_date, d.posting_time) for d in riv_entries)
+		link_dependent_item_warehouses(item_codes, union, from_datetime)
+
+	groups = {}
+	for row in riv_entries:
+		groups.setdefault(find(riv_keys[row.name][0]), []).append(row)
+
+	return list(groups.values())
+
+
+def coalesce_similar_reposts():
+	"""Merge queued reposts which touch common item-warehouses into the earliest of them.
+
+	The earliest repost replays every item-warehouse of the group once, from its earliest
+	posting datetime. Vouchers of the merged reposts are added to its affected transactions
+	so their GL entries are reposted too, and the merged reposts are marked as skipped."""
+	riv_entries = frappe.get_all(
+		"Repost Item Valuation",
+		filters={
+			"status": "Queued",
+			"docstatus": 1,
+			"current_index": 0,
+			"via_landed_cost_voucher": 0,
+			"reposting_data_file": ("is", "not set"),
+			"items_to_be_repost": ("is", "not set"),
+		},
+		fields=[*REPOST_FIELDS, *REPOST_FLAG_FIELDS],
+		order_by="posting_date asc, posting_time asc, creation asc",
+	)
+
+	# a merged repost runs with the flags of the earliest one, so only reposts with same flags are merged
+	riv_entries_by_flags = {}
+	for row in riv_entries:
+		flags = tuple(cint(row.get(fieldname)) for fieldname in REPOST_FLAG_FIELDS)
+		riv_entries_by_flags.setdefault(flags, []).append(row)
+
+	for entries in riv_entries_by_flags.values():
+		for group in group_reposts_by_item_warehouse(entries):
+			if len(group) > 1:
+				merge_reposts(group)
+
+
+def merge_reposts(group):
+	item_warehouses = {}
+	affected_transactions = set()
+	for row in group:
+		if row.voucher_type and row.voucher_no:
+			affected_transactions.add((row.voucher_type, row.voucher_no))
+
+		for d in row.item_warehouses:
+			key = (d.item_code, d.warehouse)
+			if key not in item_warehouses or get_combine_datetime(
+				d.posting_date, d.posting_time
+			) < get_combine_datetime(item_warehouses[key].posting_date, item_warehouses[key].posting_time):
+				item_warehouses[key] = d
+
+	args = sorted(
+		item_warehouses.values(), key=lambda d: get_combine_datetime(d.posting_date, d.posting_time)
+	)
+
+	# GL entries of the merged vouchers are reposted even if their stock value is unchanged
+	doc = frappe.get_doc("Repost Item Valuation", group[0].name)
+	update_args_in_repost_item_valuation(
+		doc,
+		0,
+		args,
+		get_distinct_item_warehouse(args),
+		affected_transactions,
+		changed_transactions=set(affected_transactions),
+	)
+
+	for row in group[1:]:
+		frappe.db.set_value("Repost Item Valuation", row.name, "status", "Skipped")
+
+
+def link_dependent_item_warehouses(item_codes, union, from_datetime):
+	"""Union item-warehouses of `item_codes` connected after `from_datetime`, via dependent SLEs
+	or via future vouchers touching several of them (their GL entries are reposted as a whole).
+
+	Newly discovered items are followed as well, till no new item is found."""
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+	dependant = frappe.qb.DocType("Stock Ledger Entry").as_("dependant")
+	voucher_sle = frappe.qb.DocType("Stock Ledger Entry").as_("voucher_sle")
+
+	items_to_check = set(item_codes)
+	checked_items = set()
+	while items_to_check:
+		checked_items.update(items_to_check)
+		conditions = (
+			(sle.item_code.isin(list(items_to_check)))
+			& (sle.is_cancelled == 0)
+			& (sle.posting_datetime >= from_datetime)
+		)
+
+		links = (
+			frappe.qb.from_(sle)
+			.inner_join(dependant)
+			.on(
+				(dependant.voucher_detail_no == sle.dependant_sle_voucher_detail_no)
+				& (dependant.name != sle.name)
+			)
+			.select(
+				sle.item_code,
+				sle.warehouse,
+				dependant.item_code.as_("dependant_item_code"),
+				dependant.warehouse.as_("dependant_warehouse"),
+			)
+			.distinct()
+			.where(
+				conditions & (dependant.is_cancelled == 0) & (sle.dependant_sle_voucher_detail_no.isnotnull())
+			)
+		).run(as_dict=True)
+
+		voucher_item_warehouses = (
+			frappe.qb.from_(sle)
+			.inner_join(voucher_sle)
+			.on((voucher_sle.voucher_type == sle.voucher_type) & (voucher_sle.voucher_no == sle.voucher_no))
+			.select(sle.voucher_type, sle.voucher_no, voucher_sle.item_code, voucher_sle.warehouse)
+			.distinct()
+			.where(conditions & (voucher_sle.is_cancelled == 0))
+		).run(as_dict=True)
+
+		items_to_check = set()
+		for link in links:
+			union((link.item_code, link.warehouse), (link.dependant_item_code, link.dependant_warehouse))
+			if link.dependant_item_code not in checked_items:
+				items_to_check.add(link.dependant_item_code)
+
+		for row in voucher_item_warehouses:
+			union((row.item_code, row.warehouse), (row.voucher_type, row.voucher_no))
+			if row.item_code not in checked_items:
+				items_to_check.add(row.item_code)
+
 
 def get_repost_item_valuation_entries():
 	return frappe.db.sql(
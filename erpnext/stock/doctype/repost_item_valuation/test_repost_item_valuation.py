@@ -2,7 +2,7 @@
 # See license.txt
 
 
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
 
 import frappe
 from frappe.tests.utils import FrappeTestCase, change_settings
@@ -14,9 +14,18 @@ from erpnext.controllers.stock_controller import create_item_wise_repost_entries
 from erpnext.stock.doctype.item.test_item import make_item
 from erpnext.stock.doctype.purchase_receipt.test_purchase_receipt import make_purchase_receipt
 from erpnext.stock.doctype.repost_item_valuation.repost_item_valuation import (
+	coalesce_similar_reposts,
+	get_independent_repost_partitions,
 	in_configured_timeslot,
+	repost,
+	repost_entries,
 )
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.stock_ledger import (
+	get_affected_transactions,
+	get_changed_transactions,
+	get_items_to_be_repost,
+)
 from erpnext.stock.tests.test_utils import StockTestMixin
 from erpnext.stock.utils import PendingRepostingError
 
@@ -454,3 +463,278 @@ class TestRepostItemValuation(FrappeTestCase, StockTestMixin):
 						"name",
 					)
 				)
+
+	def test_independent_repost_partitions(self):
+		item_a = make_item("_Test Partition Item A", properties={"is_stock_item": 1}).name
+		item_b = make_item("_Test Partition Item B", properties={"is_stock_item": 1}).name
+		item_c = make_item("_Test Partition Item C", properties={"is_stock_item": 1}).name
+
+		posting_date = add_days(today(), -5)
+		make_stock_entry(item_code=item_a, target="_Test Warehouse - _TC", qty=10, rate=100)
+		make_stock_entry(item_code=item_c, target="_Test Warehouse - _TC", qty=10, rate=100)
+
+		# item C moves to another warehouse, both item-warehouses form a single chain
+		make_stock_entry(
+			item_code=item_c, source="_Test Warehouse - _TC", target="Stores - _TC", qty=5, rate=100
+		)
+
+		rivs = []
+		for item_code, warehouse in [
+			(item_a, "_Test Warehouse - _TC"),
+			(item_a, "_Test Warehouse - _TC"),
+			(item_b, "_Test Warehouse - _TC"),
+			(item_c, "_Test Warehouse - _TC"),
+			(item_c, "Stores - _TC"),
+		]:
+			riv = frappe.get_doc(
+				doctype="Repost Item Valuation",
+				item_code=item_code,
+				warehouse=warehouse,
+				based_on="Item and Warehouse",
+				posting_date=posting_date,
+				posting_time="00:01:00",
+			)
+			riv.flags.dont_run_in_test = True
+			riv.submit()
+			rivs.append(riv.name)
+
+		partitions = get_independent_repost_partitions(rivs)
+		self.assertEqual(
+			sorted(sorted(partition) for partition in partitions),
+			sorted([sorted(rivs[0:2]), [rivs[2]], sorted(rivs[3:5])]),
+		)
+
+		for name in rivs:
+			frappe.db.set_value("Repost Item Valuation", name, "status", "Skipped")
+
+	def test_repost_partitions_follow_multi_item_vouchers(self):
+		item_a = make_item("_Test Partition Item D", properties={"is_stock_item": 1}).name
+		item_b = make_item("_Test Partition Item E", properties={"is_stock_item": 1}).name
+
+		posting_date = add_days(today(), -5)
+		make_stock_entry(item_code=item_a, target="_Test Warehouse - _TC", qty=10, rate=100)
+		make_stock_entry(item_code=item_b, target="Stores - _TC", qty=10, rate=100)
+
+		# a single future voucher consuming both items, its GL entries cover both item-warehouses
+		se = make_stock_entry(item_code=item_a, source="_Test Warehouse - _TC", qty=2, do_not_save=True)
+		se.append(
+			"items",
+			{
+				"item_code": item_b,
+				"s_warehouse": "Stores - _TC",
+				"qty": 2,
+				"conversion_factor": 1.0,
+				"transfer_qty": 2,
+				"cost_center": se.items[0].cost_center,
+				"expense_account": se.items[0].expense_account,
+			},
+		)
+		se.submit()
+
+		rivs = []
+		for item_code, warehouse in [(item_a, "_Test Warehouse - _TC"), (item_b, "Stores - _TC")]:
+			riv = frappe.get_doc(
+				doctype="Repost Item Valuation",
+				item_code=item_code,
+				warehouse=warehouse,
+				based_on="Item and Warehouse",
+				posting_date=posting_date,
+				posting_time="00:01:00",
+			)
+			riv.flags.dont_run_in_test = True
+			riv.submit()
+			rivs.append(riv.name)
+
+		partitions = get_independent_repost_partitions(rivs)
+		self.assertEqual([sorted(partition) for partition in partitions], [sorted(rivs)])
+
+		for name in rivs:
+			frappe.db.set_value("Repost Item Valuation", name, "status", "Skipped")
+
+	def test_unrelated_items_sharing_a_voucher_are_reposted_together(self):
+		item_a = make_item("_Test Partition Item F", properties={"is_stock_item": 1}).name
+		item_b = make_item("_Test Partition Item G", properties={"is_stock_item": 1}).name
+		item_c = make_item("_Test Partition Item H", properties={"is_stock_item": 1}).name
+
+		posting_date = add_days(today(), -5)
+
+		# items A and B never flow into each other, but are received in the same voucher
+		se = make_stock_entry(
+			item_code=item_a, target="_Test Warehouse - _TC", qty=10, rate=100, do_not_save=True
+		)
+		se.append(
+			"items",
+			{
+				"item_code": item_b,
+				"t_warehouse": "_Test Warehouse - _TC",
+				"qty": 10,
+				"basic_rate": 100,
+				"conversion_factor": 1.0,
+				"transfer_qty": 10,
+				"cost_center": se.items[0].cost_center,
+				"expense_account": se.items[0].expense_account,
+			},
+		)
+		se.submit()
+		make_stock_entry(item_code=item_c, target="_Test Warehouse - _TC", qty=10, rate=100)
+
+		rivs = []
+		for item_code in (item_a, item_b, item_c):
+			riv = frappe.get_doc(
+				doctype="Repost Item Valuation",
+				item_code=item_code,
+				warehouse="_Test Warehouse - _TC",
+				based_on="Item and Warehouse",
+				posting_date=posting_date,
+				posting_time="00:01:00",
+			)
+			riv.flags.dont_run_in_test = True
+			riv.submit()
+			rivs.append(riv.name)
+
+		# GL of the shared voucher is reposted as a whole, so A and B can't run in parallel
+		partitions = get_independent_repost_partitions(rivs)
+		self.assertEqual(
+			sorted(sorted(partition) for partition in partitions),
+			sorted([sorted(rivs[0:2]), [rivs[2]]]),
+		)
+
+		for name in rivs:
+			frappe.db.set_value("Repost Item Valuation", name, "status", "Skipped")
+
+	@change_settings(
+		"Stock Reposting Settings", {"enable_parallel_reposting": 1, "no_of_parallel_reposting": 2}
+	)
+	def test_reposts_in_progress_are_not_coalesced(self):
+		module = "erpnext.stock.doctype.repost_item_valuation.repost_item_valuation"
+		with (
+			patch(f"{module}.in_configured_timeslot", return_value=True),
+			patch(f"{module}.is_repost_partition_in_progress", return_value=True),
+			patch(f"{module}.coalesce_similar_reposts") as coalesce,
+			patch(f"{module}.enqueue_repost_partitions") as enqueue,
+		):
+			repost_entries()
+
+		coalesce.assert_not_called()
+		enqueue.assert_not_called()
+
+	@change_settings("Stock Reposting Settings", {"item_based_reposting": 0})
+	def test_coalesce_similar_reposts(self):
+		item_code = make_item("_Test Coalesce Repost Item", properties={"is_stock_item": 1}).name
+		warehouse = "_Test Warehouse - _TC"
+
+		make_stock_entry(item_code=item_code, target=warehouse, qty=10, rate=100)
+
+		frappe.flags.dont_execute_stock_reposts = True
+		backdated_entries = [
+			make_stock_entry(
+				item_code=item_code, target=warehouse, qty=5, rate=90, posting_date=add_days(today(), -days)
+			)
+			for days in (2, 5)
+		]
+
+		rivs = [
+			frappe.get_doc("Repost Item Valuation", {"voucher_no": se.name, "docstatus": 1})
+			for se in backdated_entries
+		]
+		self.assertEqual([riv.status for riv in rivs], ["Queued", "Queued"])
+
+		coalesce_similar_reposts()
+
+		for riv in rivs:
+			riv.load_from_db()
+
+		# older backdated entry absorbs the newer one
+		self.assertEqual(rivs[0].status, "Skipped")
+		self.assertEqual(rivs[1].status, "Queued")
+
+		items_to_be_repost = get_items_to_be_repost(doc=rivs[1])
+		self.assertEqual(len(items_to_be_repost), 1)
+		self.assertEqual(str(items_to_be_repost[0].posting_date), add_days(today(), -5))
+		self.assertIn(("Stock Entry", backdated_entries[0].name), get_affected_transactions(rivs[1]))
+
+		frappe.flags.dont_execute_stock_reposts = False
+		rivs[1].db_set("status", "Queued")
+		repost(rivs[1])
+		rivs[1].load_from_db()
+		self.assertEqual(rivs[1].status, "Completed")
+
+	@change_settings("Stock Reposting Settings", {"item_based_reposting": 0})
+	def test_reposts_with_different_flags_are_not_coalesced(self):
+		item_code = make_item("_Test Coalesce Repost Flags Item", properties={"is_stock_item": 1}).name
+		warehouse = "_Test Warehouse - _TC"
+
+		make_stock_entry(item_code=item_code, target=warehouse, qty=10, rate=100)
+
+		frappe.flags.dont_execute_stock_reposts = True
+		backdated_entries = [
+			make_stock_entry(
+				item_code=item_code, target=warehouse, qty=5, rate=90, posting_date=add_days(today(), -days)
+			)
+			for days in (2, 5)
+		]
+		frappe.flags.dont_execute_stock_reposts = False
+
+		rivs = [
+			frappe.get_doc("Repost Item Valuation", {"voucher_no": se.name, "docstatus": 1})
+			for se in backdated_entries
+		]
+		rivs[0].db_set("allow_negative_stock", 1)
+		rivs[1].db_set("allow_negative_stock", 0)
+
+		coalesce_similar_reposts()
+
+		for riv in rivs:
+			riv.load_from_db()
+			self.assertEqual(riv.status, "Queued")
+			riv.db_set("status", "Skipped")
+
+	@change_settings(
+		"Stock Reposting Settings", {"only_repost_gl_of_changed_vouchers": 1, "item_based_reposting": 0}
+	)
+	def test_changed_transactions_for_gl_reposting(self):
+		item = self.make_item(properties={"valuation_method": "FIFO"}).name
+		company = "_Test Company with perpetual inventory"
+		warehouse = "Stores - TCP1"
+
+		make_stock_entry(item_code=item, company=company, qty=5, rate=10, target=warehouse)
+		consumption = make_stock_entry(item_code=item, company=company, qty=5, source=warehouse)
+		receipt = make_stock_entry(item_code=item, company=company, qty=5, rate=10, target=warehouse)
+
+		# backdated receipt at a different rate changes value of consumption only
+		module = "erpnext.stock.doctype.repost_item_valuation.repost_item_valuation"
+		with (
+			patch(f"{module}.remove_attached_file"),
+			patch(
+				f"{module}.repost_gle_for_stock_vouchers", wraps=repost_gle_for_stock_vouchers
+			) as repost_gle,
+		):
+			backdated_receipt = make_stock_entry(
+				item_code=item,
+				company=company,
+				qty=5,
+				rate=50,
+				target=warehouse,
+				posting_date=add_days(today(), -1),
+			)
+
+		riv = frappe.get_last_doc(
+			"Repost Item Valuation", filters={"voucher_no": backdated_receipt.name, "docstatus": 1}
+		)
+		changed_transactions = get_changed_transactions(riv)
+		self.assertIn(("Stock Entry", consumption.name), changed_transactions)
+		self.assertNotIn(("Stock Entry", receipt.name), changed_transactions)
+
+		# GL is reposted only for the voucher of the repost and the vouchers with changed value
+		repost_gle.assert_called_once()
+		self.assertEqual(
+			sorted(repost_gle.call_args.args[0]),
+			sorted([("Stock Entry", backdated_receipt.name), ("Stock Entry", consumption.name)]),
+		)
+
+		self.assertGLEs(
+			consumption,
+			[{"credit": 250, "debit": 0}],
+			gle_filters={"account": "Stock In Hand - TCP1"},
+		)
+		riv.clear_attachment()
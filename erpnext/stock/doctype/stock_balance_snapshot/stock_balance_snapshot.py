@@ -0,0 +1,256 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder.functions import IfNull, Max, Sum
+from frappe.utils import add_days, add_months, cint, flt, get_datetime, get_last_day, getdate, now, today
+
+SNAPSHOT_FIELDS = [
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"item_code",
+	"warehouse",
+	"company",
+	"posting_date",
+	"stock_ledger_entry",
+	"posting_datetime",
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_queue",
+]
+
+
+class StockBalanceSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		company: DF.Link | None
+		item_code: DF.Link
+		posting_date: DF.Date
+		posting_datetime: DF.Datetime | None
+		qty_after_transaction: DF.Float
+		stock_ledger_entry: DF.Link | None
+		stock_queue: DF.LongText | None
+		stock_value: DF.Currency
+		valuation_rate: DF.Currency
+		warehouse: DF.Link
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Balance Snapshot", ["item_code", "warehouse", "posting_date"])
+
+
+def is_stock_balance_snapshot_enabled():
+	return cint(frappe.db.get_single_value("Stock Settings", "enable_stock_balance_snapshots", cache=True))
+
+
+def get_stock_balance_snapshot(item_code, warehouse, posting_datetime):
+	"""Returns the latest snapshot made up only of entries posted before `posting_datetime`"""
+
+	if not (item_code and warehouse and is_stock_balance_snapshot_enabled()):
+		return None
+
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot")
+	data = (
+		frappe.qb.from_(snapshot)
+		.select(
+			snapshot.posting_date,
+			snapshot.stock_ledger_entry,
+			snapshot.qty_after_transaction,
+			snapshot.valuation_rate,
+			snapshot.stock_value,
+			snapshot.stock_queue,
+		)
+		.where(
+			(snapshot.item_code == item_code)
+			& (snapshot.warehouse == warehouse)
+			& (snapshot.posting_date < getdate(posting_datetime))
+		)
+		.orderby(snapshot.posting_date, order=frappe.qb.desc)
+		.limit(1)
+	).run(as_dict=True)
+
+	if not data:
+		return None
+
+	data = data[0]
+	# entries posted from the next day onwards are not part of the snapshot
+	data.cutoff = get_datetime(add_days(data.posting_date, 1))
+
+	return data
+
+
+def invalidate_stock_balance_snapshots(item_code, warehouse, posting_date):
+	"""Snapshots on or after `posting_date` no longer match the ledger"""
+
+	if not is_stock_balance_snapshot_enabled():
+		return
+
+	filters = {"item_code": item_code, "warehouse": warehouse, "posting_date": (">=", posting_date)}
+
+	# most entries are posted after the latest snapshot, avoid a write on every submit
+	if frappe.db.exists("Stock Balance Snapshot", filters):
+		frappe.db.delete("Stock Balance Snapshot", filters)
+
+
+def get_stock_value_from_snapshots(posting_date, warehouses=None, item_code=None) -> float:
+	"""Stock value on `posting_date`, adds entries posted after the latest snapshot of
+	each item-warehouse to the value of that snapshot"""
+
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot")
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+
+	latest_snapshot = (
+		frappe.qb.from_(snapshot)
+		.select(snapshot.item_code, snapshot.warehouse, Max(snapshot.posting_date).as_("posting_date"))
+		.where(snapshot.posting_date <= posting_date)
+		.groupby(snapshot.item_code, snapshot.warehouse)
+	)
+
+	tail = (
+		frappe.qb.from_(sle)
+		.select(IfNull(Sum(sle.stock_value_difference), 0))
+		.where((sle.posting_date <= posting_date) & (sle.is_cancelled == 0))
+	)
+
+	if warehouses:
+		latest_snapshot = latest_snapshot.where(snapshot.warehouse.isin(warehouses))
+		tail = tail.where(sle.warehouse.isin(warehouses))
+
+	if item_code:
+		latest_snapshot = latest_snapshot.where(snapshot.item_code == item_code)
+		tail = tail.where(sle.item_code == item_code)
+
+	latest_snapshot = latest_snapshot.as_("latest_snapshot")
+
+	snapshot_value = (
+		frappe.qb.from_(snapshot)
+		.join(latest_snapshot)
+		.on(
+			(snapshot.item_code == latest_snapshot.item_code)
+			& (snapshot.warehouse == latest_snapshot.warehouse)
+			& (snapshot.posting_date == latest_snapshot.posting_date)
+		)
+		.select(IfNull(Sum(snapshot.stock_value), 0))
+	).run()[0][0]
+
+	tail_value = (
+		tail.left_join(latest_snapshot)
+		.on((sle.item_code == latest_snapshot.item_code) & (sle.warehouse == latest_snapshot.warehouse))
+		.where(latest_snapshot.posting_date.isnull() | (sle.posting_date > latest_snapshot.posting_date))
+	).run()[0][0]
+
+	return flt(snapshot_value) + flt(tail_value)
+
+
+def create_stock_balance_snapshots(snapshot_date=None):
+	"""Snapshot the balance of every item-warehouse with entries posted since its latest
+	snapshot, as on `snapshot_date` (defaults to the end of the last month)"""
+
+	from erpnext.stock.utils import check_pending_reposting
+
+	if not is_stock_balance_snapshot_enabled():
+		return
+
+	snapshot_date = getdate(snapshot_date or get_last_day(add_months(today(), -1)))
+
+	# replayed values before the snapshot date are not final yet
+	if check_pending_reposting(snapshot_date, throw_error=False):
+		return
+
+	values = []
+	user = frappe.session.user
+	cutoff = get_datetime(add_days(snapshot_date, 1))
+	for row in get_item_warehouses_to_snapshot(snapshot_date):
+		sle = get_last_sle_before(row.item_code, row.warehouse, cutoff)
+		if not sle:
+			continue
+
+		values.append(
+			(
+				frappe.generate_hash(length=10),
+				now(),
+				now(),
+				user,
+				user,
+				sle.item_code,
+				sle.warehouse,
+				sle.company,
+				snapshot_date,
+				sle.name,
+				sle.posting_datetime,
+				sle.qty_after_transaction,
+				sle.valuation_rate,
+				sle.stock_value,
+				sle.stock_queue,
+			)
+		)
+
+	if values:
+		frappe.db.bulk_insert("Stock Balance Snapshot", fields=SNAPSHOT_FIELDS, values=values)
+
+
+def get_item_warehouses_to_snapshot(snapshot_date):
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot")
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+
+	latest_snapshot = (
+		frappe.qb.from_(snapshot)
+		.select(snapshot.item_code, snapshot.warehouse, Max(snapshot.posting_date).as_("posting_date"))
+		.groupby(snapshot.item_code, snapshot.warehouse)
+	).as_("latest_snapshot")
+
+	return (
+		frappe.qb.from_(sle)
+		.left_join(latest_snapshot)
+		.on((sle.item_code == latest_snapshot.item_code) & (sle.warehouse == latest_snapshot.warehouse))
+		.select(sle.item_code, sle.warehouse)
+		.distinct()
+		.where(
+			(sle.posting_date <= snapshot_date)
+			& (sle.is_cancelled == 0)
+			& (latest_snapshot.posting_date.isnull() | (sle.posting_date > latest_snapshot.posting_date))
+		)
+	).run(as_dict=True)
+
+
+def get_last_sle_before(item_code, warehouse, posting_datetime):
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+	data = (
+		frappe.qb.from_(sle)
+		.select(
+			sle.name,
+			sle.item_code,
+			sle.warehouse,
+			sle.company,
+			sle.posting_datetime,
+			sle.qty_after_transaction,
+			sle.valuation_rate,
+			sle.stock_value,
+			sle.stock_queue,
+		)
+		.where(
+			(sle.item_code == item_code)
+			& (sle.warehouse == warehouse)
+			& (sle.is_cancelled == 0)
+			& (sle.posting_datetime < posting_datetime)
+		)
+		.orderby(sle.posting_datetime, order=frappe.qb.desc)
+		.orderby(sle.creation, order=frappe.qb.desc)
+		.limit(1)
+	).run(as_dict=True)
+
+	return data[0] if data else None
@@ -0,0 +1,61 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase, change_settings
+from frappe.utils import add_days, nowtime, today
+
+from erpnext.stock.doctype.item.test_item import make_item
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	create_stock_balance_snapshots,
+	get_stock_balance_snapshot,
+)
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.stock_ledger import get_previous_sle
+from erpnext.stock.utils import get_combine_datetime, get_stock_value_on
+
+
+class TestStockBalanceSnapshot(FrappeTestCase):
+	@change_settings("Stock Settings", {"enable_stock_balance_snapshots": 1})
+	def test_balances_from_snapshot(self):
+		item_code = make_item("_Test Item Stock Balance Snapshot", {"is_stock_item": 1}).name
+		warehouse = "_Test Warehouse - _TC"
+		snapshot_date = add_days(today(), -30)
+
+		make_stock_entry(
+			item_code=item_code, target=warehouse, qty=10, rate=100, posting_date=add_days(today(), -40)
+		)
+		create_stock_balance_snapshots(snapshot_date)
+
+		snapshot = get_stock_balance_snapshot(item_code, warehouse, get_combine_datetime(today(), nowtime()))
+		self.assertEqual(snapshot.qty_after_transaction, 10)
+		self.assertEqual(snapshot.stock_value, 1000)
+
+		# no entries after the snapshot, previous entry is the one the snapshot was taken from
+		args = {
+			"item_code": item_code,
+			"warehouse": warehouse,
+			"posting_date": today(),
+			"posting_time": nowtime(),
+		}
+		self.assertEqual(get_previous_sle(args).name, snapshot.stock_ledger_entry)
+
+		make_stock_entry(
+			item_code=item_code, target=warehouse, qty=5, rate=200, posting_date=add_days(today(), -20)
+		)
+		# entries after the snapshot date leave the snapshot as is
+		self.assertTrue(
+			frappe.db.exists("Stock Balance Snapshot", {"item_code": item_code, "warehouse": warehouse})
+		)
+		self.assertEqual(get_previous_sle(args).qty_after_transaction, 15)
+		self.assertEqual(get_stock_value_on(warehouse, today(), item_code), 2000)
+
+		# backdated entry before the snapshot date discards the snapshot
+		make_stock_entry(
+			item_code=item_code, target=warehouse, qty=2, rate=100, posting_date=add_days(today(), -35)
+		)
+		self.assertFalse(
+			frappe.db.exists("Stock Balance Snapshot", {"item_code": item_code, "warehouse": warehouse})
+		)
+		self.assertEqual(get_previous_sle(args).qty_after_transaction, 17)
+		self.assertEqual(get_stock_value_on(warehouse, today(), item_code), 2200)
@@ -13,6 +13,9 @@ from frappe.utils import add_days, cint, flt, formatdate, get_datetime, getdate
 from erpnext.accounts.utils import get_fiscal_year
 from erpnext.controllers.item_variant import ItemTemplateCannotHaveStock
 from erpnext.stock.doctype.inventory_dimension.inventory_dimension import get_inventory_dimensions
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	invalidate_stock_balance_snapshots,
+)
 from erpnext.stock.serial_batch_bundle import SerialBatchBundle
 from erpnext.stock.stock_ledger import get_previous_sle
 
@@ -175,6 +178,7 @@ class StockLedgerEntry(Document):
 	def on_submit(self):
 		self.set_posting_datetime(save=True)
 		self.check_stock_frozen_date()
+		invalidate_stock_balance_snapshots(self.item_code, self.warehouse, self.posting_date)
 
 		# Added to handle few test cases where serial_and_batch_bundles are not required
 		if frappe.flags.in_test and frappe.flags.ignore_serial_batch_bundle_validation:
@@ -3,6 +3,7 @@
 
 import json
 import time
+from unittest.mock import patch
 from uuid import uuid4
 
 import frappe
@@ -26,7 +27,7 @@ from erpnext.stock.doctype.stock_ledger_entry.stock_ledger_entry import BackDate
 from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
 	create_stock_reconciliation,
 )
-from erpnext.stock.stock_ledger import get_previous_sle
+from erpnext.stock.stock_ledger import get_previous_sle, get_sle_doc, update_entries_after
 from erpnext.stock.tests.test_utils import StockTestMixin
 
 
@@ -1099,6 +1100,298 @@ class TestStockLedgerEntry(FrappeTestCase, StockTestMixin):
 		backdated.cancel()
 		self.assertEqual([1], ordered_qty_after_transaction())
 
+	def test_backdated_replay_across_batches(self):
+		item = make_item().name
+		warehouse = "_Test Warehouse - _TC"
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+
+		def ordered_values():
+			return (
+				frappe.qb.from_(sle)
+				.select(sle.qty_after_transaction, sle.stock_value)
+				.where((sle.item_code == item) & (sle.warehouse == warehouse) & (sle.is_cancelled == 0))
+				.orderby(sle.posting_datetime)
+				.orderby(sle.creation)
+			).run()
+
+		for day in range(1, 6):
+			make_stock_entry(
+				item_code=item,
+				to_warehouse=warehouse,
+				qty=10,
+				rate=10,
+				posting_date=f"2022-01-0{day}",
+				posting_time="01:00:00",
+			)
+
+		# replay future entries two at a time to exercise paging and bulk write back
+		with patch("erpnext.stock.stock_ledger.SLE_REPLAY_BATCH_SIZE", 2):
+			make_stock_entry(
+				item_code=item,
+				to_warehouse=warehouse,
+				qty=5,
+				rate=10,
+				posting_date="2021-12-31",
+				posting_time="01:00:00",
+			)
+
+		self.assertEqual(
+			[(5.0, 50.0), (15.0, 150.0), (25.0, 250.0), (35.0, 350.0), (45.0, 450.0), (55.0, 550.0)],
+			[(flt(qty), flt(value)) for qty, value in ordered_values()],
+		)
+
+	@change_settings("Stock Reposting Settings", {"enable_block_replay": 1})
+	def test_backdated_block_replay(self):
+		item = make_item(properties={"valuation_method": "FIFO"}).name
+		warehouse = "_Test Warehouse - _TC"
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+
+		for day, qty, rate in ((1, 10, 10), (2, -4, 0), (3, 10, 20), (4, -12, 0)):
+			make_stock_entry(
+				item_code=item,
+				target=warehouse if qty > 0 else None,
+				source=warehouse if qty < 0 else None,
+				qty=abs(qty),
+				rate=rate,
+				posting_date=f"2022-01-0{day}",
+				posting_time="01:00:00",
+			)
+
+		# receipts are replayed in blocks, issues update their stock entry and take the row path
+		make_stock_entry(
+			item_code=item,
+			target=warehouse,
+			qty=5,
+			rate=5,
+			posting_date="2021-12-31",
+			posting_time="01:00:00",
+		)
+
+		self.assertEqual(
+			[(5.0, 25.0), (15.0, 125.0), (11.0, 105.0), (21.0, 305.0), (9.0, 180.0)],
+			[
+				(flt(qty), flt(value))
+				for qty, value in (
+					frappe.qb.from_(sle)
+					.select(sle.qty_after_transaction, sle.stock_value)
+					.where((sle.item_code == item) & (sle.warehouse == warehouse) & (sle.is_cancelled == 0))
+					.orderby(sle.posting_datetime)
+					.orderby(sle.creation)
+				).run()
+			],
+		)
+
+	def test_resume_repost_from_checkpoint(self):
+		item = make_item().name
+		warehouse = "_Test Warehouse - _TC"
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+
+		def ordered_qty_after_transaction():
+			return (
+				frappe.qb.from_(sle)
+				.select(sle.qty_after_transaction)
+				.where((sle.item_code == item) & (sle.warehouse == warehouse) & (sle.is_cancelled == 0))
+				.orderby(sle.posting_datetime)
+				.orderby(sle.creation)
+			).run(pluck=True)
+
+		for day in range(1, 7):
+			make_stock_entry(
+				item_code=item,
+				to_warehouse=warehouse,
+				qty=10,
+				rate=10,
+				posting_date=f"2022-01-0{day}",
+				posting_time="01:00:00",
+			)
+
+		args = {
+			"item_code": item,
+			"warehouse": warehouse,
+			"posting_date": "2022-01-01",
+			"posting_time": "01:00:00",
+		}
+		checkpoints = []
+
+		with patch("erpnext.stock.stock_ledger.SLE_REPLAY_BATCH_SIZE", 2), patch(
+			"erpnext.stock.stock_ledger.REPOST_CHECKPOINT_INTERVAL", 1
+		):
+			update_entries_after(args, on_checkpoint=lambda obj, checkpoint: checkpoints.append(checkpoint))
+			self.assertEqual(len(checkpoints), 3)
+
+			# entries after the first checkpoint get corrupted, resuming should only fix those
+			frappe.db.sql(
+				"""update `tabStock Ledger Entry` set qty_after_transaction = 0
+				where item_code = %s and posting_date > '2022-01-02'""",
+				item,
+			)
+			update_entries_after(args, checkpoint=frappe.parse_json(frappe.as_json(checkpoints[0])))
+
+		self.assertEqual([10, 20, 30, 40, 50, 60], ordered_qty_after_transaction())
+
+	def test_resumed_repost_covers_dependent_warehouses(self):
+		from erpnext.stock import stock_ledger
+		from erpnext.stock.doctype.repost_item_valuation.repost_item_valuation import repost_sl_entries
+
+		item = make_item().name
+		warehouse, target_warehouse = "_Test Warehouse - _TC", "Stores - _TC"
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+
+		make_stock_entry(
+			item_code=item,
+			to_warehouse=warehouse,
+			qty=10,
+			rate=10,
+			posting_date="2022-01-01",
+			posting_time="01:00:00",
+		)
+		# transfer early in the chain, stock of the target warehouse depends on it
+		make_stock_entry(
+			item_code=item,
+			from_warehouse=warehouse,
+			to_warehouse=target_warehouse,
+			qty=5,
+			posting_date="2022-01-01",
+			posting_time="02:00:00",
+		)
+		make_stock_entry(
+			item_code=item,
+			to_warehouse=target_warehouse,
+			qty=10,
+			rate=10,
+			posting_date="2022-01-02",
+			posting_time="01:00:00",
+		)
+		for day in range(3, 8):
+			make_stock_entry(
+				item_code=item,
+				to_warehouse=warehouse,
+				qty=10,
+				rate=10,
+				posting_date=f"2022-01-0{day}",
+				posting_time="01:00:00",
+			)
+
+		riv = frappe.get_doc(
+			doctype="Repost Item Valuation",
+			based_on="Item and Warehouse",
+			item_code=item,
+			warehouse=warehouse,
+			posting_date="2022-01-01",
+			posting_time="01:00:00",
+		)
+		riv.flags.dont_run_in_test = True
+		riv.submit()
+
+		class Interrupted(Exception):
+			pass
+
+		save_progress = stock_ledger.update_args_in_repost_item_valuation
+
+		def interrupt_after_dependency_found(doc, index, args, distinct_item_warehouses, *a, **kw):
+			save_progress(doc, index, args, distinct_item_warehouses, *a, **kw)
+			if kw.get("checkpoint") and (item, target_warehouse) in distinct_item_warehouses:
+				raise Interrupted
+
+		with patch("erpnext.stock.stock_ledger.SLE_REPLAY_BATCH_SIZE", 2), patch(
+			"erpnext.stock.stock_ledger.REPOST_CHECKPOINT_INTERVAL", 1
+		):
+			with patch(
+				"erpnext.stock.stock_ledger.update_args_in_repost_item_valuation",
+				interrupt_after_dependency_found,
+			):
+				self.assertRaises(Interrupted, repost_sl_entries, riv)
+
+			# the dependent warehouse has not been reposted yet when the repost resumes
+			frappe.db.sql(
+				"""update `tabStock Ledger Entry` set qty_after_transaction = 0
+				where item_code = %s and warehouse = %s and posting_date > '2022-01-01'""",
+				(item, target_warehouse),
+			)
+			riv.load_from_db()
+			repost_sl_entries(riv)
+
+		self.assertEqual(
+			[5, 15],
+			(
+				frappe.qb.from_(sle)
+				.select(sle.qty_after_transaction)
+				.where(
+					(sle.item_code == item) & (sle.warehouse == target_warehouse) & (sle.is_cancelled == 0)
+				)
+				.orderby(sle.posting_datetime)
+				.orderby(sle.creation)
+			).run(pluck=True),
+		)
+
+	def test_bulk_sl_entries(self):
+		item_a, item_b = make_item().name, make_item().name
+		warehouse = "_Test Warehouse - _TC"
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+
+		stock_entry = make_stock_entry(item_code=item_a, target=warehouse, qty=10, rate=100, do_not_save=True)
+		for item_code, qty, rate in ((item_a, 5, 200), (item_b, 10, 50)):
+			stock_entry.append(
+				"items",
+				{
+					"item_code": item_code,
+					"t_warehouse": warehouse,
+					"qty": qty,
+					"basic_rate": rate,
+					"conversion_factor": 1.0,
+					"transfer_qty": qty,
+				},
+			)
+		stock_entry.insert()
+
+		# rows are inserted in bulk and valued once per item-warehouse
+		with patch("erpnext.stock.stock_ledger.BULK_SL_ENTRIES_THRESHOLD", 2):
+			stock_entry.submit()
+
+		self.assertEqual(
+			[(10.0, 1000.0), (15.0, 2000.0)],
+			[
+				(flt(qty), flt(value))
+				for qty, value in (
+					frappe.qb.from_(sle)
+					.select(sle.qty_after_transaction, sle.stock_value)
+					.where((sle.item_code == item_a) & (sle.voucher_no == stock_entry.name))
+					.orderby(sle.creation)
+				).run()
+			],
+		)
+
+		for item_code, qty, value in ((item_a, 15, 2000), (item_b, 10, 500)):
+			bin = frappe.db.get_value(
+				"Bin", {"item_code": item_code, "warehouse": warehouse}, ["actual_qty", "stock_value"]
+			)
+			self.assertEqual((flt(bin[0]), flt(bin[1])), (qty, value))
+
+		with patch("erpnext.stock.stock_ledger.BULK_SL_ENTRIES_THRESHOLD", 2):
+			stock_entry.cancel()
+
+		for item_code in (item_a, item_b):
+			self.assertEqual(flt(frappe.db.get_value("Bin", {"item_code": item_code}, "actual_qty")), 0)
+
+	def test_bulk_sl_entries_are_validated(self):
+		args = frappe._dict(
+			{
+				"item_code": make_item().name,
+				"warehouse": "_Test Warehouse - _TC",
+				"posting_date": today(),
+				"posting_time": "10:00:00",
+				"voucher_type": "Stock Entry",
+				"voucher_no": "_Test Missing Stock Entry",
+				"actual_qty": 1,
+				"company": "_Test Company",
+				"is_cancelled": 0,
+			}
+		)
+
+		# rows are bulk inserted, links and mandatory fields are checked as on insert
+		self.assertRaises(frappe.LinkValidationError, get_sle_doc, args.copy())
+		self.assertRaises(frappe.ValidationError, get_sle_doc, frappe._dict({**args, "warehouse": None}))
+
 	def test_timestamp_clash(self):
 		item = make_item().name
 		warehouse = "_Test Warehouse - _TC"
@@ -50,6 +50,13 @@ class StockReservationEntry(Document):
 		warehouse: DF.Link | None
 	# end: auto-generated types
 
+	def onload(self) -> None:
+		from erpnext.stock.valuation import get_stock_queue_for_display
+
+		for entry in self.sb_entries:
+			if entry.stock_queue:
+				entry.stock_queue = get_stock_queue_for_display(entry.stock_queue)
+
 	def validate(self) -> None:
 		from erpnext.stock.utils import validate_disabled_warehouse, validate_warehouse_company
 
@@ -40,6 +40,7 @@ class StockSettings(Document):
 		default_warehouse: DF.Link | None
 		disable_serial_no_and_batch_selector: DF.Check
 		do_not_update_serial_batch_on_creation_of_auto_bundle: DF.Check
+		enable_stock_balance_snapshots: DF.Check
 		enable_stock_reservation: DF.Check
 		item_group: DF.Link | None
 		item_naming_by: DF.Literal["Item Code", "Naming Series"]
@@ -216,6 +217,15 @@ class StockSettings(Document):
 
 	def on_update(self):
 		self.toggle_warehouse_field_for_inter_warehouse_transfer()
+		self.clear_stock_balance_snapshots()
+
+	def clear_stock_balance_snapshots(self):
+		# snapshots are not maintained while disabled, they would be stale once enabled again
+		if (
+			self.has_value_changed("enable_stock_balance_snapshots")
+			and not self.enable_stock_balance_snapshots
+		):
+			frappe.db.delete("Stock Balance Snapshot")
 
 	def change_precision_for_for_sales(self):
 		doc_before_save = self.get_doc_before_save()
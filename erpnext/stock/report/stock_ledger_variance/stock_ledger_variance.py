@@ -8,6 +8,7 @@ from frappe.utils import cint, flt
 from erpnext.stock.report.stock_ledger_invariant_check.stock_ledger_invariant_check import (
 	get_data as stock_ledger_invariant_check,
 )
+from erpnext.stock.valuation import get_stock_queue_for_display
 
 
 def execute(filters=None):
@@ -220,6 +221,7 @@ def get_data(filters=None):
 							"item_code": item_warehouse.item_code,
 							"warehouse": item_warehouse.warehouse,
 							"valuation_method": item_warehouse.valuation_method or valuation_method,
+							"stock_queue": get_stock_queue_for_display(row.stock_queue),
 						}
 					)
 					data.append(row)
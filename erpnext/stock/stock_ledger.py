@@ -4,18 +4,22 @@
 import copy
 import gzip
 import json
+from datetime import timedelta
 
 import frappe
 from frappe import _, scrub
 from frappe.model.meta import get_field_precision
+from frappe.query_builder import Case
 from frappe.query_builder.functions import Sum
 from frappe.utils import (
 	cint,
+	create_batch,
 	cstr,
 	flt,
 	get_link_to_form,
 	getdate,
 	now,
+	now_datetime,
 	nowdate,
 	nowtime,
 	parse_json,
@@ -27,6 +31,10 @@ from erpnext.stock.doctype.inventory_dimension.inventory_dimension import get_in
 from erpnext.stock.doctype.serial_and_batch_bundle.serial_and_batch_bundle import (
 	get_available_batches,
 )
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	get_stock_balance_snapshot,
+	invalidate_stock_balance_snapshots,
+)
 from erpnext.stock.doctype.stock_reservation_entry.stock_reservation_entry import (
 	get_sre_reserved_batch_nos_details,
 	get_sre_reserved_serial_nos_details,
@@ -39,7 +47,42 @@ from erpnext.stock.utils import (
 	get_stock_balance,
 	get_valuation_method,
 )
-from erpnext.stock.valuation import FIFOValuation, LIFOValuation, round_off_if_near_zero
+from erpnext.stock.valuation import (
+	FIFOValuation,
+	LIFOValuation,
+	parse_stock_queue,
+	replay_moving_average,
+	replay_stock_queue,
+	round_off_if_near_zero,
+	serialize_stock_queue,
+)
+
+# future SLEs are read and written back in chunks of this size while reposting
+SLE_REPLAY_BATCH_SIZE = 1000
+
+# vouchers with at least these many SLEs insert them in bulk and value them per item-warehouse
+BULK_SL_ENTRIES_THRESHOLD = 100
+
+# while reposting, progress is checkpointed after these many pages of future SLEs
+REPOST_CHECKPOINT_INTERVAL = 10
+
+# valuation state of the item-warehouse saved along with the checkpoint
+CHECKPOINT_STATE_FIELDS = (
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"prev_stock_value",
+	"stock_queue",
+)
+
+# fields recomputed by the replay, written back in bulk for entries without transaction lookups
+REPLAYED_SLE_FIELDS = (
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_queue",
+	"stock_value_difference",
+)
 
 
 class NegativeStockError(frappe.ValidationError):
@@ -72,24 +115,12 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 		args = get_args_for_future_sle(sl_entries[0])
 		future_sle_exists(args, sl_entries)
 
-		for sle in sl_entries:
-			if sle.serial_no and not via_landed_cost_voucher:
-				validate_serial_no(sle)
-
-			if cancel:
-				sle["actual_qty"] = -flt(sle.get("actual_qty"))
-
-				if sle["actual_qty"] < 0 and not sle.get("outgoing_rate"):
-					sle["outgoing_rate"] = get_incoming_outgoing_rate_for_cancel(
-						sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
-					)
-					sle["incoming_rate"] = 0.0
+		if can_make_sl_entries_in_bulk(sl_entries):
+			make_sl_entries_in_bulk(sl_entries, cancel, allow_negative_stock, via_landed_cost_voucher)
+			return
 
-				if sle["actual_qty"] > 0 and not sle.get("incoming_rate"):
-					sle["incoming_rate"] = get_incoming_outgoing_rate_for_cancel(
-						sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
-					)
-					sle["outgoing_rate"] = 0.0
+		for sle in sl_entries:
+			prepare_sl_entry(sle, cancel, via_landed_cost_voucher)
 
 			if sle.get("actual_qty") or sle.get("voucher_type") == "Stock Reconciliation":
 				sle_doc = make_entry(sle, allow_negative_stock, via_landed_cost_voucher)
@@ -113,35 +144,183 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 				)
 
 
+def prepare_sl_entry(sle, cancel=False, via_landed_cost_voucher=False):
+	if sle.serial_no and not via_landed_cost_voucher:
+		validate_serial_no(sle)
+
+	if cancel:
+		sle["actual_qty"] = -flt(sle.get("actual_qty"))
+
+		if sle["actual_qty"] < 0 and not sle.get("outgoing_rate"):
+			sle["outgoing_rate"] = get_incoming_outgoing_rate_for_cancel(
+				sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
+			)
+			sle["incoming_rate"] = 0.0
+
+		if sle["actual_qty"] > 0 and not sle.get("incoming_rate"):
+			sle["incoming_rate"] = get_incoming_outgoing_rate_for_cancel(
+				sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
+			)
+			sle["outgoing_rate"] = 0.0
+
+
+def can_make_sl_entries_in_bulk(sl_entries):
+	if len(sl_entries) < BULK_SL_ENTRIES_THRESHOLD:
+		return False
+
+	# negative stock per inventory dimension is validated against the rows inserted before
+	return not any(dimension.get("validate_negative_stock") for dimension in get_inventory_dimensions())
+
+
+def make_sl_entries_in_bulk(
+	sl_entries, cancel=False, allow_negative_stock=False, via_landed_cost_voucher=False
+):
+	"""Insert the SLEs of a voucher with many rows in bulk, valuation of the rows is
+	computed in one pass and Bin is updated once per item-warehouse"""
+	from erpnext.controllers.stock_controller import future_sle_exists
+
+	sle_docs = []
+	sles_by_item_warehouse = {}
+	for sle in sl_entries:
+		prepare_sl_entry(sle, cancel, via_landed_cost_voucher)
+
+		if sle.get("actual_qty") or sle.get("voucher_type") == "Stock Reconciliation":
+			sle_doc = get_sle_doc(sle, allow_negative_stock, via_landed_cost_voucher)
+			sle_docs.append(sle_doc)
+			sles_by_item_warehouse.setdefault((sle_doc.item_code, sle_doc.warehouse), []).append(sle_doc)
+
+	insert_sl_entries(sle_docs)
+
+	bins = get_bins(sles_by_item_warehouse)
+	for (item_code, warehouse), sles in sles_by_item_warehouse.items():
+		if not frappe.get_cached_value("Item", item_code, "is_stock_item"):
+			frappe.msgprint(_("Item {0} ignored since it is not a stock item").format(item_code))
+			continue
+
+		bin_details = bins.get((item_code, warehouse)) or frappe._dict(
+			name=get_or_make_bin(item_code, warehouse), reserved_stock=0.0
+		)
+
+		rows = []
+		for sle in sles:
+			args = sle.as_dict()
+			args["posting_datetime"] = get_combine_datetime(args.posting_date, args.posting_time)
+			args.reserved_stock = flt(bin_details.reserved_stock)
+			if sle.voucher_type == "Stock Reconciliation":
+				# preserve previous_qty_after_transaction for qty reposting
+				args.previous_qty_after_transaction = sle.get("previous_qty_after_transaction")
+
+			rows.append(args)
+
+		# all rows of the voucher at this timestamp are valued together
+		if not (cancel and via_landed_cost_voucher):
+			repost_current_voucher_entries(rows[0], allow_negative_stock, via_landed_cost_voucher)
+
+		if future_sle_exists(rows[0]):
+			for args in rows:
+				update_qty_in_future_sle(args, allow_negative_stock)
+
+		update_bin_qty(bin_details.name, rows[-1])
+
+
+def get_sle_doc(args, allow_negative_stock=False, via_landed_cost_voucher=False):
+	args["doctype"] = "Stock Ledger Entry"
+	sle = frappe.get_doc(args)
+	sle.flags.ignore_permissions = 1
+	sle.allow_negative_stock = allow_negative_stock
+	sle.via_landed_cost_voucher = via_landed_cost_voucher
+	sle.docstatus = 1
+
+	# same checks as `Document.insert`, the rows are bulk inserted later
+	sle._set_defaults()
+	sle._validate_links()
+	sle.set_new_name()
+	sle.set_posting_datetime()
+	sle.run_method("validate")
+	sle.run_method("before_submit")
+	sle._validate()
+
+	return sle
+
+
+def insert_sl_entries(sl_entries):
+	"""Bulk insert validated SLE documents and run their submit hooks"""
+	if not sl_entries:
+		return
+
+	user = frappe.session.user
+	creation = now_datetime()
+
+	values = []
+	for idx, sle in enumerate(sl_entries):
+		sle.owner = sle.modified_by = user
+		# rows at the same timestamp are valued in the order of creation
+		sle.creation = sle.modified = creation + timedelta(microseconds=idx)
+		if sle.get("creation_time") and sle.voucher_type == "Stock Reconciliation":
+			sle.creation = sle.get("creation_time")
+
+		values.append(sle.get_valid_dict(convert_dates_to_str=True))
+
+	fields = list(values[0])
+	frappe.db.bulk_insert(
+		"Stock Ledger Entry", fields=fields, values=[tuple(row.get(f) for f in fields) for row in values]
+	)
+
+	for sle in sl_entries:
+		sle.run_method("on_submit")
+
+
+def get_bins(item_warehouses):
+	bin = frappe.qb.DocType("Bin")
+	bins = frappe._dict()
+	for batch in create_batch(list(item_warehouses), SLE_REPLAY_BATCH_SIZE):
+		data = (
+			frappe.qb.from_(bin)
+			.select(bin.name, bin.item_code, bin.warehouse, bin.reserved_stock)
+			.where(
+				bin.item_code.isin({row[0] for row in batch}) & bin.warehouse.isin({row[1] for row in batch})
+			)
+		).run(as_dict=True)
+
+		for row in data:
+			bins[(row.item_code, row.warehouse)] = row
+
+	return bins
+
+
 def repost_current_voucher(args, allow_negative_stock=False, via_landed_cost_voucher=False):
 	if args.get("actual_qty") or args.get("voucher_type") == "Stock Reconciliation":
 		if not args.get("posting_date"):
 			args["posting_date"] = nowdate()
 
 		if not (args.get("is_cancelled") and via_landed_cost_voucher):
-			# Reposts only current voucher SL Entries
-			# Updates valuation rate, stock value, stock queue for current transaction
-			update_entries_after(
-				{
-					"item_code": args.get("item_code"),
-					"warehouse": args.get("warehouse"),
-					"posting_date": args.get("posting_date"),
-					"posting_time": args.get("posting_time"),
-					"voucher_type": args.get("voucher_type"),
-					"voucher_no": args.get("voucher_no"),
-					"sle_id": args.get("name"),
-					"creation": args.get("creation"),
-					"reserved_stock": args.get("reserved_stock"),
-				},
-				allow_negative_stock=allow_negative_stock,
-				via_landed_cost_voucher=via_landed_cost_voucher,
-			)
+			repost_current_voucher_entries(args, allow_negative_stock, via_landed_cost_voucher)
 
 		# update qty in future sle and Validate negative qty
 		# For LCV: update future balances with -ve LCV SLE, which will be balanced by +ve LCV SLE
 		update_qty_in_future_sle(args, allow_negative_stock)
 
 
+def repost_current_voucher_entries(args, allow_negative_stock=False, via_landed_cost_voucher=False):
+	# Reposts only current voucher SL Entries
+	# Updates valuation rate, stock value, stock queue for current transaction
+	update_entries_after(
+		{
+			"item_code": args.get("item_code"),
+			"warehouse": args.get("warehouse"),
+			"posting_date": args.get("posting_date"),
+			"posting_time": args.get("posting_time"),
+			"voucher_type": args.get("voucher_type"),
+			"voucher_no": args.get("voucher_no"),
+			"sle_id": args.get("name"),
+			"creation": args.get("creation"),
+			"reserved_stock": args.get("reserved_stock"),
+		},
+		allow_negative_stock=allow_negative_stock,
+		via_landed_cost_voucher=via_landed_cost_voucher,
+	)
+
+
 def get_args_for_future_sle(row):
 	return frappe._dict(
 		{
@@ -253,11 +432,34 @@ def repost_future_sle(
 
 	distinct_item_warehouses = get_distinct_item_warehouse(args, doc, reposting_data=reposting_data)
 	affected_transactions = get_affected_transactions(doc, reposting_data=reposting_data)
+	changed_transactions = get_changed_transactions(doc, reposting_data=reposting_data)
+	checkpoint = frappe._dict((reposting_data.get("checkpoint") if reposting_data else None) or {})
 
 	i = get_current_index(doc) or 0
 	while i < len(args):
 		validate_item_warehouse(args[i])
 
+		if checkpoint and (checkpoint.item_code, checkpoint.warehouse) != (
+			args[i].get("item_code"),
+			args[i].get("warehouse"),
+		):
+			checkpoint = None
+
+		def save_checkpoint(obj, checkpoint):
+			affected_transactions.update(obj.affected_transactions)
+			if changed_transactions is not None:
+				changed_transactions.update(obj.changed_transactions)
+
+			update_args_in_repost_item_valuation(
+				doc,
+				i,
+				args,
+				distinct_item_warehouses,
+				affected_transactions,
+				checkpoint=checkpoint,
+				changed_transactions=changed_transactions,
+			)
+
 		obj = update_entries_after(
 			{
 				"item_code": args[i].get("item_code"),
@@ -269,8 +471,13 @@ def repost_future_sle(
 			},
 			allow_negative_stock=allow_negative_stock,
 			via_landed_cost_voucher=via_landed_cost_voucher,
+			checkpoint=checkpoint,
+			on_checkpoint=save_checkpoint if doc else None,
 		)
+		checkpoint = None
 		affected_transactions.update(obj.affected_transactions)
+		if changed_transactions is not None:
+			changed_transactions.update(obj.changed_transactions)
 
 		distinct_item_warehouses[(args[i].get("item_code"), args[i].get("warehouse"))].reposting_status = True
 
@@ -289,7 +496,12 @@ def repost_future_sle(
 
 		if doc:
 			update_args_in_repost_item_valuation(
-				doc, i, args, distinct_item_warehouses, affected_transactions
+				doc,
+				i,
+				args,
+				distinct_item_warehouses,
+				affected_transactions,
+				changed_transactions=changed_transactions,
 			)
 
 
@@ -330,7 +542,20 @@ def validate_item_warehouse(args):
 			frappe.throw(_(validation_msg))
 
 
-def update_args_in_repost_item_valuation(doc, index, args, distinct_item_warehouses, affected_transactions):
+def update_args_in_repost_item_valuation(
+	doc,
+	index,
+	args,
+	distinct_item_warehouses,
+	affected_transactions,
+	checkpoint=None,
+	changed_transactions=None,
+):
+	"""Save reposting progress.
+
+	`checkpoint` is the replay position and valuation state inside the item-warehouse at `index`,
+	it lets an interrupted repost resume in the middle of a long chain of entries.
+	`changed_transactions` are the vouchers whose stock value difference changed so far."""
 	if not doc.items_to_be_repost:
 		file_name = ""
 		if doc.reposting_data_file:
@@ -342,6 +567,8 @@ def update_args_in_repost_item_valuation(doc, index, args, distinct_item_warehou
 				"items_to_be_repost": args,
 				"distinct_item_and_warehouse": {str(k): v for k, v in distinct_item_warehouses.items()},
 				"affected_transactions": affected_transactions,
+				"checkpoint": checkpoint,
+				"changed_transactions": changed_transactions,
 			},
 			doc,
 			file_name,
@@ -496,6 +723,25 @@ def get_affected_transactions(doc, reposting_data=None) -> set[tuple[str, str]]:
 	return {tuple(transaction) for transaction in transactions}
 
 
+def get_changed_transactions(doc, reposting_data=None) -> set[tuple[str, str]] | None:
+	"""Vouchers whose stock value difference was changed by the repost.
+
+	Returns None when the repost was started without tracking them."""
+	if not reposting_data and doc and doc.reposting_data_file:
+		reposting_data = get_reposting_data(doc.reposting_data_file)
+
+	if reposting_data:
+		if reposting_data.get("changed_transactions") is None:
+			return None
+
+		return {tuple(transaction) for transaction in reposting_data.changed_transactions}
+
+	if doc and (doc.items_to_be_repost or doc.current_index):
+		return None
+
+	return set()
+
+
 def get_current_index(doc=None):
 	if doc and doc.current_index:
 		return doc.current_index
@@ -523,6 +769,8 @@ class update_entries_after:
 		allow_negative_stock=None,
 		via_landed_cost_voucher=False,
 		verbose=1,
+		checkpoint=None,
+		on_checkpoint=None,
 	):
 		self.exceptions = {}
 		self.verbose = verbose
@@ -544,10 +792,31 @@ class update_entries_after:
 		self.new_items_found = False
 		self.distinct_item_warehouses = args.get("distinct_item_warehouses", frappe._dict())
 		self.affected_transactions: set[tuple[str, str]] = set()
+		self.changed_transactions: set[tuple[str, str]] = set()
 		self.reserved_stock = flt(self.args.reserved_stock)
 
+		# replayed SLEs waiting to be written back with a single multi-row UPDATE
+		self.pending_sle_updates = {}
+
+		# consecutive SLEs valued together by the block replay kernels when enabled
+		self.pending_block = []
+		self.block_replay = cint(
+			frappe.db.get_single_value("Stock Reposting Settings", "enable_block_replay", cache=True)
+		)
+
+		# resume from `checkpoint` and report progress to `on_checkpoint(self, checkpoint)`
+		self.checkpoint = checkpoint
+		self.on_checkpoint = on_checkpoint
+
 		self.data = frappe._dict()
 		self.initialize_previous_data(self.args)
+		if self.checkpoint:
+			self.data[self.args.warehouse].update(
+				{key: self.checkpoint["state"].get(key) for key in CHECKPOINT_STATE_FIELDS}
+			)
+			# dependent item-warehouses found before the checkpoint are yet to be queued
+			self.new_items_found = bool(self.checkpoint.get("new_items_found"))
+
 		self.build()
 
 	def set_precision(self):
@@ -587,7 +856,10 @@ class update_entries_after:
 		warehouse_dict.update(
 			{
 				"prev_stock_value": previous_sle.stock_value or 0.0,
-				"stock_queue": json.loads(previous_sle.stock_queue or "[]"),
+				# queue is only needed for FIFO/LIFO, skip decoding it otherwise
+				"stock_queue": parse_stock_queue(previous_sle.stock_queue)
+				if self.valuation_method != "Moving Average"
+				else [],
 				"stock_value_difference": 0.0,
 			}
 		)
@@ -600,18 +872,32 @@ class update_entries_after:
 			if not future_sle_exists(self.args):
 				self.update_bin()
 		else:
-			entries_to_fix = self.get_future_entries_to_fix()
+			invalidate_stock_balance_snapshots(self.item_code, self.args.warehouse, self.args.posting_date)
+
+			last_sle_of_warehouse = {}
+			for sle in self.get_future_entries_to_fix():
+				last_sle_of_warehouse[sle.warehouse] = sle
+
+				if self.can_replay_in_block(sle):
+					self.pending_block.append(sle)
+					if len(self.pending_block) >= SLE_REPLAY_BATCH_SIZE:
+						self.replay_pending_block()
+					continue
 
-			i = 0
-			while i < len(entries_to_fix):
-				sle = entries_to_fix[i]
-				i += 1
+				self.replay_pending_block()
+				if not self.can_defer_sle_update(sle):
+					# transaction lookups may read the ledger, it must be up to date
+					self.flush_sle_updates()
 
 				self.process_sle(sle)
-				self.update_bin_data(sle)
 
 				if sle.dependant_sle_voucher_detail_no:
-					entries_to_fix = self.get_dependent_entries_to_fix(entries_to_fix, sle)
+					self.process_dependent_sle(sle)
+
+			self.replay_pending_block()
+			self.flush_sle_updates()
+			for sle in last_sle_of_warehouse.values():
+				self.update_bin_data(sle)
 
 		if self.exceptions:
 			self.raise_exceptions()
@@ -646,31 +932,104 @@ class update_entries_after:
 		)
 
 	def get_future_entries_to_fix(self):
-		# includes current entry!
-		args = self.data[self.args.warehouse].previous_sle or frappe._dict(
-			{"item_code": self.item_code, "warehouse": self.args.warehouse}
+		"""Stream future SLEs in posting order, one page at a time (includes current entry!)"""
+		args = frappe._dict(
+			self.data[self.args.warehouse].previous_sle
+			or {"item_code": self.item_code, "warehouse": self.args.warehouse}
 		)
 
-		return list(self.get_sle_after_datetime(args))
+		extra_cond = None
+		if self.checkpoint:
+			extra_cond = self.set_keyset_after(args, self.checkpoint["keyset"])
+
+		pages = 0
+		while True:
+			entries = get_stock_ledger_entries(
+				args,
+				">",
+				"asc",
+				f"limit {SLE_REPLAY_BATCH_SIZE}",
+				for_update=True,
+				check_serial_no=False,
+				extra_cond=extra_cond,
+			)
+
+			yield from entries
+
+			if len(entries) < SLE_REPLAY_BATCH_SIZE:
+				break
+
+			# keyset pagination, entries sharing the boundary timestamp are excluded by name
+			last_sle = entries[-1]
+			keyset = {
+				"last_posting_datetime": last_sle.posting_datetime,
+				"last_creation": last_sle.creation,
+				"boundary_sles": [
+					d.name
+					for d in entries
+					if d.posting_datetime == last_sle.posting_datetime and d.creation == last_sle.creation
+				],
+			}
+			extra_cond = self.set_keyset_after(args, keyset)
+
+			pages += 1
+			if pages % REPOST_CHECKPOINT_INTERVAL == 0:
+				self.save_checkpoint(keyset)
+
+	def set_keyset_after(self, args, keyset):
+		"""Set query params to fetch entries after `keyset` and return the condition"""
+		args.last_posting_datetime = keyset["last_posting_datetime"]
+		args.last_creation = keyset["last_creation"]
+		args.boundary_sles = tuple(keyset["boundary_sles"])
+
+		# posting date is dropped so that the keyset alone decides the start
+		args.posting_date = None
 
-	def get_dependent_entries_to_fix(self, entries_to_fix, sle):
+		return """ and (
+			posting_datetime > %(last_posting_datetime)s
+			or (
+				posting_datetime = %(last_posting_datetime)s
+				and creation >= %(last_creation)s
+				and name not in %(boundary_sles)s
+			)
+		)"""
+
+	def save_checkpoint(self, keyset):
+		"""Persist replayed entries along with the position and valuation state reached so far"""
+		if not self.on_checkpoint or self.exceptions:
+			return
+
+		self.replay_pending_block()
+		self.flush_sle_updates()
+
+		wh_data = self.data[self.args.warehouse]
+		self.on_checkpoint(
+			self,
+			{
+				"item_code": self.item_code,
+				"warehouse": self.args.warehouse,
+				"keyset": keyset,
+				"state": {key: wh_data.get(key) for key in CHECKPOINT_STATE_FIELDS},
+				"new_items_found": self.new_items_found,
+			},
+		)
+
+	def process_dependent_sle(self, sle):
 		dependant_sle = get_sle_by_voucher_detail_no(
 			sle.dependant_sle_voucher_detail_no, excluded_sle=sle.name
 		)
 
 		if not dependant_sle:
-			return entries_to_fix
+			return
 		elif dependant_sle.item_code == self.item_code and dependant_sle.warehouse == self.args.warehouse:
-			return entries_to_fix
+			return
 		elif dependant_sle.item_code != self.item_code:
 			self.update_distinct_item_warehouses(dependant_sle)
-			return entries_to_fix
 		elif dependant_sle.item_code == self.item_code and dependant_sle.warehouse in self.data:
-			return entries_to_fix
+			return
 		else:
 			self.initialize_previous_data(dependant_sle)
 			self.update_distinct_item_warehouses(dependant_sle)
-			return entries_to_fix
 
 	def update_distinct_item_warehouses(self, dependant_sle):
 		key = (dependant_sle.item_code, dependant_sle.warehouse)
@@ -708,6 +1067,7 @@ class update_entries_after:
 		# previous sle data for this warehouse
 		self.wh_data = self.data[sle.warehouse]
 		self.affected_transactions.add((sle.voucher_type, sle.voucher_no))
+		previous_stock_value_difference = flt(sle.stock_value_difference)
 
 		if (sle.serial_no and not self.via_landed_cost_voucher) or not cint(self.allow_negative_stock):
 			# validate negative stock for serialized items, fifo valuation
@@ -785,6 +1145,11 @@ class update_entries_after:
 				else:
 					self.update_queue_values(sle)
 
+		self.update_sle_values(sle, previous_stock_value_difference)
+
+	def update_sle_values(self, sle, previous_stock_value_difference, stock_queue=None):
+		"""Set the valuation reached after `sle` on it and write it back"""
+
 		# rounding as per precision
 		self.wh_data.stock_value = flt(self.wh_data.stock_value, self.currency_precision)
 		if not self.wh_data.qty_after_transaction:
@@ -797,19 +1162,122 @@ class update_entries_after:
 		sle.qty_after_transaction = self.wh_data.qty_after_transaction
 		sle.valuation_rate = self.wh_data.valuation_rate
 		sle.stock_value = self.wh_data.stock_value
-		sle.stock_queue = json.dumps(self.wh_data.stock_queue)
+		if stock_queue is None:
+			stock_queue = serialize_stock_queue(self.wh_data.stock_queue)
+		sle.stock_queue = stock_queue
 
 		if not sle.is_adjustment_entry or not self.args.get("sle_id"):
 			sle.stock_value_difference = stock_value_difference
 
+		if flt(sle.stock_value_difference - previous_stock_value_difference, self.currency_precision):
+			self.changed_transactions.add((sle.voucher_type, sle.voucher_no))
+
 		sle.doctype = "Stock Ledger Entry"
-		frappe.get_doc(sle).db_update()
+		if not self.args.get("sle_id") and self.can_defer_sle_update(sle):
+			self.pending_sle_updates[sle.name] = sle
+			if len(self.pending_sle_updates) >= SLE_REPLAY_BATCH_SIZE:
+				self.flush_sle_updates()
+		else:
+			frappe.get_doc(sle).db_update()
 
 		if not self.args.get("sle_id") or (
 			sle.serial_and_batch_bundle and sle.auto_created_serial_and_batch_bundle
 		):
 			self.update_outgoing_rate_on_transaction(sle)
 
+	def can_defer_sle_update(self, sle):
+		"""Entries whose replay does not look up transactions or the ledger can be written back in bulk"""
+		if sle.recalculate_rate or sle.serial_no or sle.batch_no or sle.serial_and_batch_bundle:
+			return False
+
+		if sle.voucher_type in ("Stock Reconciliation", "Subcontracting Receipt"):
+			return False
+
+		if flt(sle.actual_qty) < 0 and sle.voucher_type in (
+			"Stock Entry",
+			"Purchase Receipt",
+			"Purchase Invoice",
+		):
+			return False
+
+		return True
+
+	def can_replay_in_block(self, sle):
+		"""Entries valued from their own incoming/outgoing rate can be replayed by the block kernels"""
+		return (
+			self.block_replay
+			and not sle.dependant_sle_voucher_detail_no
+			and sle.warehouse == self.args.warehouse
+			and self.can_defer_sle_update(sle)
+		)
+
+	def replay_pending_block(self):
+		"""Value pending entries in a single pass over their columns, entries the kernels
+		stop at (negative or insufficient stock) are processed row by row"""
+		block, self.pending_block = self.pending_block, []
+
+		while block:
+			replayed = self.replay_block(block)
+			if len(replayed) < len(block):
+				self.process_sle(block[len(replayed)])
+				block = block[len(replayed) + 1 :]
+			else:
+				block = []
+
+	def replay_block(self, block):
+		self.wh_data = self.data[self.args.warehouse]
+
+		columns = (
+			[flt(sle.actual_qty) for sle in block],
+			[flt(sle.incoming_rate) for sle in block],
+			[flt(sle.outgoing_rate) for sle in block],
+		)
+
+		# entries failing the negative stock validation need the row path
+		min_qty = 0.0 if cint(self.allow_negative_stock) else max(flt(self.reserved_stock), 0.0)
+
+		if self.valuation_method == "Moving Average":
+			replayed = replay_moving_average(
+				*columns,
+				flt(self.wh_data.qty_after_transaction),
+				flt(self.wh_data.valuation_rate),
+				self.currency_precision,
+				min_qty=min_qty,
+			)
+		else:
+			valuation = LIFOValuation if self.valuation_method == "LIFO" else FIFOValuation
+			replayed = replay_stock_queue(
+				valuation(self.wh_data.stock_queue),
+				*columns,
+				flt(self.wh_data.qty_after_transaction),
+				flt(self.wh_data.valuation_rate),
+				flt(self.wh_data.stock_value),
+				self.currency_precision,
+				min_qty=min_qty,
+			)
+
+		for sle, (qty_after_transaction, valuation_rate, stock_value, stock_queue) in zip(
+			block, replayed, strict=False
+		):
+			self.affected_transactions.add((sle.voucher_type, sle.voucher_no))
+			self.wh_data.update(
+				{
+					"qty_after_transaction": qty_after_transaction,
+					"valuation_rate": valuation_rate,
+					"stock_value": stock_value,
+				}
+			)
+			self.update_sle_values(sle, flt(sle.stock_value_difference), stock_queue=stock_queue)
+
+		return replayed
+
+	def flush_sle_updates(self):
+		if not self.pending_sle_updates:
+			return
+
+		update_replayed_sle_values(list(self.pending_sle_updates.values()))
+		self.pending_sle_updates = {}
+
 	def get_serialized_values(self, sle):
 		incoming_rate = flt(sle.incoming_rate)
 		actual_qty = flt(sle.actual_qty)
@@ -1319,6 +1787,7 @@ class update_entries_after:
 	def get_fallback_rate(self, sle) -> float:
 		"""When exact incoming rate isn't available use any of other "average" rates as fallback.
 		This should only get used for negative stock."""
+		self.flush_sle_updates()
 		return get_valuation_rate(
 			sle.item_code,
 			sle.warehouse,
@@ -1408,6 +1877,22 @@ class update_entries_after:
 			frappe.db.set_value("Bin", bin_name, updated_values, update_modified=True)
 
 
+def update_replayed_sle_values(sl_entries):
+	"""Write back values recomputed by reposting using one multi-row UPDATE per chunk"""
+	sle_table = frappe.qb.DocType("Stock Ledger Entry")
+
+	for chunk in create_batch(sl_entries, SLE_REPLAY_BATCH_SIZE):
+		query = frappe.qb.update(sle_table)
+		for field in REPLAYED_SLE_FIELDS:
+			values = Case()
+			for sle in chunk:
+				values = values.when(sle_table.name == sle.name, sle.get(field))
+
+			query = query.set(sle_table[field], values)
+
+		query.where(sle_table.name.isin([sle.name for sle in chunk])).run()
+
+
 def get_previous_sle_of_current_voucher(args, operator="<", exclude_current_voucher=False):
 	"""get stock ledger entries filtered by specific posting datetime conditions"""
 
@@ -1418,9 +1903,15 @@ def get_previous_sle_of_current_voucher(args, operator="<", exclude_current_vouc
 		args["posting_datetime"] = get_combine_datetime(args["posting_date"], args["posting_time"])
 
 	voucher_condition = ""
+	snapshot = None
 	if exclude_current_voucher:
 		voucher_no = args.get("voucher_no")
 		voucher_condition = f"and voucher_no != '{voucher_no}'"
+	else:
+		# only scan the entries posted after the latest balance snapshot
+		snapshot = get_stock_balance_snapshot(
+			args.get("item_code"), args.get("warehouse"), args.get("posting_datetime")
+		)
 
 	sle = frappe.db.sql(
 		f"""
@@ -1433,6 +1924,7 @@ def get_previous_sle_of_current_voucher(args, operator="<", exclude_current_vouc
 			and (
 				posting_datetime {operator} %(posting_datetime)s
 			)
+			{"and posting_datetime >= %(snapshot_cutoff)s" if snapshot else ""}
 		order by posting_datetime desc, creation desc
 		limit 1
 		for update""",
@@ -1440,10 +1932,14 @@ def get_previous_sle_of_current_voucher(args, operator="<", exclude_current_vouc
 			"item_code": args.get("item_code"),
 			"warehouse": args.get("warehouse"),
 			"posting_datetime": args.get("posting_datetime"),
+			"snapshot_cutoff": snapshot.cutoff if snapshot else None,
 		},
 		as_dict=1,
 	)
 
+	if not sle and snapshot:
+		sle = get_sle_of_snapshot(snapshot, for_update=True)
+
 	return sle[0] if sle else frappe._dict()
 
 
@@ -1462,12 +1958,43 @@ def get_previous_sle(args, for_update=False, extra_cond=None):
 	}
 	"""
 	args["name"] = args.get("sle", None) or ""
+
+	snapshot = None
+	if args.get("posting_date") and not (extra_cond or args.get("serial_no")):
+		# only scan the entries posted after the latest balance snapshot
+		snapshot = get_stock_balance_snapshot(
+			args.get("item_code"),
+			args.get("warehouse"),
+			get_combine_datetime(args["posting_date"], args.get("posting_time")),
+		)
+
+	if snapshot:
+		args["snapshot_cutoff"] = snapshot.cutoff
+		extra_cond = " and posting_datetime >= %(snapshot_cutoff)s"
+
 	sle = get_stock_ledger_entries(
 		args, "<=", "desc", "limit 1", for_update=for_update, extra_cond=extra_cond
 	)
+
+	if not sle and snapshot:
+		sle = get_sle_of_snapshot(snapshot, for_update=for_update)
+
 	return sle and sle[0] or {}
 
 
+def get_sle_of_snapshot(snapshot, for_update=False):
+	"""Last entry covered by the balance snapshot, when no entry was posted after it"""
+	return frappe.db.sql(
+		"""
+		select *, posting_datetime as "timestamp"
+		from `tabStock Ledger Entry`
+		where name = %s and is_cancelled = 0
+		{for_update}""".format(for_update=for_update and "for update" or ""),
+		snapshot.stock_ledger_entry,
+		as_dict=1,
+	)
+
+
 def get_stock_ledger_entries(
 	previous_sle,
 	operator=None,
@@ -0,0 +1,676 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""Benchmark for the stock valuation hot path.
+
+Generates a synthetic stock ledger and measures the time and number of queries taken by
+valuation classes, backdated vouchers, `update_entries_after` and `repost_future_sle`.
+
+Run it on a scratch site, generated ledger is committed so that large volumes can be created:
+
+        bench --site benchmark.localhost run-stock-benchmark --items 100 --warehouses 5 --entries 1000
+
+All generated records are named (or remarked) with `BENCH_PREFIX` and can be removed with `cleanup()`.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+import frappe
+from frappe.utils import add_days, add_to_date, cint, flt, get_datetime, getdate, now_datetime
+
+import erpnext
+from erpnext.accounts.utils import get_fiscal_year
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.stock_ledger import repost_future_sle, update_entries_after
+from erpnext.stock.utils import get_or_make_bin
+from erpnext.stock.valuation import FIFOValuation, LIFOValuation, serialize_stock_queue
+
+BENCH_PREFIX = "_Bench"
+BULK_INSERT_CHUNK = 10_000
+
+SLE_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"item_code",
+	"warehouse",
+	"batch_no",
+	"serial_and_batch_bundle",
+	"has_batch_no",
+	"has_serial_no",
+	"posting_date",
+	"posting_time",
+	"posting_datetime",
+	"voucher_type",
+	"voucher_no",
+	"actual_qty",
+	"incoming_rate",
+	"outgoing_rate",
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_value_difference",
+	"stock_queue",
+	"company",
+	"stock_uom",
+	"fiscal_year",
+	"is_cancelled",
+)
+
+BUNDLE_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"company",
+	"item_code",
+	"warehouse",
+	"has_batch_no",
+	"has_serial_no",
+	"type_of_transaction",
+	"voucher_type",
+	"voucher_no",
+	"posting_date",
+	"posting_time",
+	"total_qty",
+	"avg_rate",
+	"total_amount",
+	"is_cancelled",
+)
+
+BUNDLE_ENTRY_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"parent",
+	"parenttype",
+	"parentfield",
+	"idx",
+	"batch_no",
+	"serial_no",
+	"warehouse",
+	"qty",
+	"incoming_rate",
+	"stock_value_difference",
+)
+
+SERIAL_NO_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"serial_no",
+	"item_code",
+	"warehouse",
+	"company",
+	"status",
+)
+
+
+@contextmanager
+def count_queries():
+	"""Count queries issued through `frappe.db.sql` inside the block."""
+	counter = frappe._dict(count=0)
+	original_sql = frappe.db.sql
+
+	def sql(*args, **kwargs):
+		counter.count += 1
+		return original_sql(*args, **kwargs)
+
+	frappe.db.sql = sql
+	try:
+		yield counter
+	finally:
+		frappe.db.sql = original_sql
+
+
+class StockBenchmark:
+	"""Create a synthetic ledger and time each phase of stock valuation on it.
+
+	:param items: number of items, valuation methods are assigned round robin
+	:param warehouses: number of warehouses, every item moves in every warehouse
+	:param entries: stock ledger entries per item-warehouse
+	:param batches: batches per item, items are batched when this is set
+	:param serialized: number of items (taken from the first ones) tracked by serial no instead
+	:param backdated: backdated receipts posted as submitted Stock Entries
+	:param days: period over which the entries are spread
+	"""
+
+	def __init__(
+		self,
+		items=10,
+		warehouses=2,
+		entries=100,
+		batches=0,
+		serialized=0,
+		backdated=10,
+		days=365,
+		company=None,
+		seed=42,
+	):
+		self.no_of_items = cint(items)
+		self.no_of_warehouses = cint(warehouses)
+		self.entries = cint(entries)
+		self.batches = cint(batches)
+		self.serialized = cint(serialized)
+		self.backdated = cint(backdated)
+		self.days = cint(days)
+		self.company = company or erpnext.get_default_company()
+		self.random = random.Random(seed)
+
+		self.start_date = add_days(getdate(), -self.days)
+		self.results = []
+		self.movements = {}
+		self.fiscal_years = {}
+		self.bundles = []
+		self.bundle_entries = []
+		self.serial_no_count = {}
+		self.serial_no_locations = {}
+
+	def run(self):
+		self.setup_masters()
+		self.timed("generate ledger", self.generate_ledger)
+		self.timed("valuation classes", self.replay_valuation_in_memory)
+		self.timed("backdated vouchers", self.make_backdated_entries)
+		self.timed("repost_future_sle", self.repost_backdated_entries)
+		self.timed("update_entries_after", self.replay_all_item_warehouses)
+
+		return self.results
+
+	def timed(self, phase, method):
+		with count_queries() as queries:
+			start = time.perf_counter()
+			rows = method()
+			elapsed = time.perf_counter() - start
+
+		self.results.append(
+			frappe._dict(
+				{
+					"phase": phase,
+					"seconds": elapsed,
+					"queries": queries.count,
+					"rows": rows,
+					"rows_per_second": flt(rows / elapsed, 2) if elapsed else 0.0,
+				}
+			)
+		)
+		frappe.db.commit()
+
+	def setup_masters(self):
+		item_group = frappe.db.get_value("Item Group", {"is_group": 0}) or "All Item Groups"
+		valuation_methods = ["FIFO", "Moving Average", "LIFO"]
+
+		self.items = []
+		for idx in range(self.no_of_items):
+			item_code = f"{BENCH_PREFIX} Item {idx:05d}"
+			if not frappe.db.exists("Item", item_code):
+				frappe.get_doc(
+					{
+						"doctype": "Item",
+						"item_code": item_code,
+						"item_name": item_code,
+						"item_group": item_group,
+						"stock_uom": "Nos",
+						"is_stock_item": 1,
+						"has_batch_no": 1 if self.batches and idx >= self.serialized else 0,
+						"has_serial_no": 1 if idx < self.serialized else 0,
+						"valuation_method": valuation_methods[idx % len(valuation_methods)],
+					}
+				).insert(ignore_permissions=True)
+
+			self.items.append(frappe.get_cached_doc("Item", item_code))
+
+		abbr = frappe.get_cached_value("Company", self.company, "abbr")
+		self.warehouses = []
+		for idx in range(self.no_of_warehouses):
+			warehouse = f"{BENCH_PREFIX} Warehouse {idx:03d} - {abbr}"
+			if not frappe.db.exists("Warehouse", warehouse):
+				frappe.get_doc(
+					{
+						"doctype": "Warehouse",
+						"warehouse_name": f"{BENCH_PREFIX} Warehouse {idx:03d}",
+						"company": self.company,
+					}
+				).insert(ignore_permissions=True)
+
+			self.warehouses.append(warehouse)
+
+		self.batch_nos = {}
+		for item in self.items:
+			self.batch_nos[item.name] = []
+			for idx in range(self.batches if item.has_batch_no else 0):
+				batch_no = f"{BENCH_PREFIX}-{item.name[-5:]}-{idx:04d}"
+				if not frappe.db.exists("Batch", batch_no):
+					frappe.get_doc({"doctype": "Batch", "batch_id": batch_no, "item": item.name}).insert(
+						ignore_permissions=True
+					)
+
+				self.batch_nos[item.name].append(batch_no)
+
+		frappe.db.commit()
+
+	def generate_ledger(self):
+		"""Insert already valued entries in bulk, receipts and issues keep the stock positive."""
+		rows = []
+		total = 0
+		for item in self.items:
+			for warehouse in self.warehouses:
+				state = self.get_valuation_state(item)
+				movements = self.movements[(item.name, warehouse)] = []
+
+				timestamps = sorted(self.get_random_datetime(self.days) for _i in range(self.entries))
+				for timestamp in timestamps:
+					movement = self.get_random_movement(item, state)
+					movements.append(movement)
+					rows.append(self.get_sle_row(item, warehouse, timestamp, movement, state))
+
+					if len(rows) >= BULK_INSERT_CHUNK:
+						total += self.insert_rows(rows)
+						rows = []
+
+				self.update_bin(item.name, warehouse, state)
+
+		total += self.insert_rows(rows)
+		self.insert_serial_nos()
+		return total
+
+	def get_random_datetime(self, days):
+		return get_datetime(add_to_date(self.start_date, seconds=self.random.randrange(days * 86400)))
+
+	def get_fiscal_year(self, posting_date):
+		if posting_date not in self.fiscal_years:
+			self.fiscal_years[posting_date] = get_fiscal_year(posting_date, company=self.company)[0]
+
+		return self.fiscal_years[posting_date]
+
+	def get_valuation_state(self, item):
+		queue_class = LIFOValuation if item.valuation_method == "LIFO" else FIFOValuation
+		return frappe._dict(
+			{
+				"valuation_method": item.valuation_method,
+				"queue": queue_class([]),
+				"qty": 0.0,
+				"value": 0.0,
+				"batches": {},
+				"serial_nos": {},
+			}
+		)
+
+	def get_random_movement(self, item, state):
+		if item.has_serial_no:
+			return self.get_random_serial_no_movement(item, state)
+
+		batch_no = self.random.choice(self.batch_nos[item.name]) if item.has_batch_no else None
+		available = state.batches.get(batch_no, [0.0, 0.0])[0] if batch_no else state.qty
+
+		if available < 1 or self.random.random() < 0.55:
+			return frappe._dict(
+				{
+					"qty": float(self.random.randint(1, 100)),
+					"rate": self.random.randint(90, 110),
+					"batch_no": batch_no,
+				}
+			)
+
+		return frappe._dict(
+			{"qty": -float(self.random.randint(1, int(available))), "rate": 0.0, "batch_no": batch_no}
+		)
+
+	def get_random_serial_no_movement(self, item, state):
+		"""Serial nos move a few at a time, issues pick the oldest serial nos in stock."""
+		if not state.serial_nos or self.random.random() < 0.55:
+			qty = self.random.randint(1, 10)
+			rate = self.random.randint(90, 110)
+			return frappe._dict(
+				{
+					"qty": float(qty),
+					"rate": rate,
+					"batch_no": None,
+					"serial_nos": [(self.get_next_serial_no(item), rate) for _i in range(qty)],
+				}
+			)
+
+		qty = self.random.randint(1, min(10, len(state.serial_nos)))
+		return frappe._dict(
+			{
+				"qty": -float(qty),
+				"rate": 0.0,
+				"batch_no": None,
+				"serial_nos": list(islice(state.serial_nos.items(), qty)),
+			}
+		)
+
+	def get_next_serial_no(self, item):
+		self.serial_no_count[item.name] = self.serial_no_count.get(item.name, 0) + 1
+		return f"{BENCH_PREFIX}-{item.name[-5:]}-SN-{self.serial_no_count[item.name]:07d}"
+
+	def apply_movement(self, state, movement):
+		"""Value a movement the way the stock ledger does, returns stock value difference."""
+		qty = movement.qty
+		previous_value = state.value
+
+		if movement.batch_no:
+			batch = state.batches.setdefault(movement.batch_no, [0.0, 0.0])
+			rate = movement.rate if qty > 0 else (batch[1] / batch[0] if batch[0] else 0.0)
+			batch[0] += qty
+			batch[1] += qty * rate
+			state.value += qty * rate
+		elif movement.get("serial_nos"):
+			# serial nos carry their own incoming rate
+			for serial_no, rate in movement.serial_nos:
+				if qty > 0:
+					state.serial_nos[serial_no] = rate
+				else:
+					del state.serial_nos[serial_no]
+
+			state.value += sum(rate for _serial_no, rate in movement.serial_nos) * (1 if qty > 0 else -1)
+		elif state.valuation_method == "Moving Average":
+			if qty > 0:
+				state.value += qty * movement.rate
+			elif state.qty:
+				state.value += qty * state.value / state.qty
+		else:
+			if qty > 0:
+				state.queue.add_stock(qty=qty, rate=movement.rate)
+			else:
+				state.queue.remove_stock(qty=abs(qty))
+
+			state.value = state.queue.get_total_stock_and_value()[1]
+
+		state.qty += qty
+		return state.value - previous_value
+
+	def get_sle_row(self, item, warehouse, timestamp, movement, state):
+		stock_value_difference = self.apply_movement(state, movement)
+		name = frappe.generate_hash(length=12)
+		creation = now_datetime()
+		voucher_type = "Purchase Receipt" if movement.qty > 0 else "Delivery Note"
+
+		bundle = None
+		if movement.batch_no or movement.get("serial_nos"):
+			# batches and serial nos are valued from the bundles, the same way vouchers post them
+			bundle = self.add_bundle(item, warehouse, timestamp, movement, stock_value_difference, name)
+
+		for serial_no, _rate in movement.get("serial_nos") or []:
+			self.serial_no_locations[serial_no] = (item.name, warehouse if movement.qty > 0 else None)
+
+		return (
+			name,
+			creation,
+			creation,
+			"Administrator",
+			"Administrator",
+			1,
+			item.name,
+			warehouse,
+			None,
+			bundle,
+			1 if movement.batch_no else 0,
+			1 if movement.get("serial_nos") else 0,
+			timestamp.date(),
+			timestamp.time(),
+			timestamp,
+			voucher_type,
+			f"{BENCH_PREFIX}-{name}",
+			movement.qty,
+			movement.rate if movement.qty > 0 else 0.0,
+			0.0 if movement.qty > 0 else abs(stock_value_difference / movement.qty),
+			state.qty,
+			state.value / state.qty if state.qty else 0.0,
+			state.value,
+			stock_value_difference,
+			serialize_stock_queue(state.queue.state) if state.valuation_method != "Moving Average" else "[]",
+			self.company,
+			item.stock_uom,
+			self.get_fiscal_year(timestamp.date()),
+			0,
+		)
+
+	def add_bundle(self, item, warehouse, timestamp, movement, stock_value_difference, voucher_name):
+		bundle = f"{BENCH_PREFIX}-SABB-{voucher_name}"
+		creation = now_datetime()
+		voucher_type = "Purchase Receipt" if movement.qty > 0 else "Delivery Note"
+		rate = abs(stock_value_difference / movement.qty)
+
+		self.bundles.append(
+			(
+				bundle,
+				creation,
+				creation,
+				"Administrator",
+				"Administrator",
+				1,
+				self.company,
+				item.name,
+				warehouse,
+				1 if movement.batch_no else 0,
+				1 if movement.get("serial_nos") else 0,
+				"Inward" if movement.qty > 0 else "Outward",
+				voucher_type,
+				f"{BENCH_PREFIX}-{voucher_name}",
+				timestamp.date(),
+				timestamp.time(),
+				movement.qty,
+				rate,
+				abs(stock_value_difference),
+				0,
+			)
+		)
+		# a single row for the batch, or a row per serial no at its own incoming rate
+		entries = [(movement.batch_no, None, movement.qty, rate, stock_value_difference)]
+		if movement.get("serial_nos"):
+			sign = 1 if movement.qty > 0 else -1
+			entries = [
+				(None, serial_no, sign, serial_no_rate, sign * serial_no_rate)
+				for serial_no, serial_no_rate in movement.serial_nos
+			]
+
+		for idx, (batch_no, serial_no, qty, incoming_rate, value_difference) in enumerate(entries, 1):
+			self.bundle_entries.append(
+				(
+					frappe.generate_hash(length=12),
+					creation,
+					creation,
+					"Administrator",
+					"Administrator",
+					1,
+					bundle,
+					"Serial and Batch Bundle",
+					"entries",
+					idx,
+					batch_no,
+					serial_no,
+					warehouse,
+					qty,
+					incoming_rate,
+					value_difference,
+				)
+			)
+
+		return bundle
+
+	def insert_rows(self, rows):
+		if rows:
+			frappe.db.bulk_insert("Stock Ledger Entry", fields=SLE_FIELDS, values=rows)
+
+		if self.bundles:
+			frappe.db.bulk_insert("Serial and Batch Bundle", fields=BUNDLE_FIELDS, values=self.bundles)
+			frappe.db.bulk_insert(
+				"Serial and Batch Entry", fields=BUNDLE_ENTRY_FIELDS, values=self.bundle_entries
+			)
+			self.bundles, self.bundle_entries = [], []
+
+		frappe.db.commit()
+		return len(rows)
+
+	def insert_serial_nos(self):
+		"""Serial nos are created once the ledger is generated, in the warehouse they end up in."""
+		creation = now_datetime()
+		rows = [
+			(
+				serial_no,
+				creation,
+				creation,
+				"Administrator",
+				"Administrator",
+				0,
+				serial_no,
+				item_code,
+				warehouse,
+				self.company,
+				"Active" if warehouse else "Delivered",
+			)
+			for serial_no, (item_code, warehouse) in self.serial_no_locations.items()
+		]
+
+		for idx in range(0, len(rows), BULK_INSERT_CHUNK):
+			frappe.db.bulk_insert(
+				"Serial No", fields=SERIAL_NO_FIELDS, values=rows[idx : idx + BULK_INSERT_CHUNK]
+			)
+
+		frappe.db.commit()
+
+	def update_bin(self, item_code, warehouse, state):
+		bin_name = get_or_make_bin(item_code, warehouse)
+		frappe.db.set_value(
+			"Bin",
+			bin_name,
+			{
+				"actual_qty": state.qty,
+				"stock_value": state.value,
+				"valuation_rate": state.value / state.qty if state.qty else 0.0,
+			},
+		)
+
+	def replay_valuation_in_memory(self):
+		total = 0
+		for item in self.items:
+			for warehouse in self.warehouses:
+				state = self.get_valuation_state(item)
+				for movement in self.movements[(item.name, warehouse)]:
+					self.apply_movement(state, movement)
+
+				total += len(self.movements[(item.name, warehouse)])
+
+		return total
+
+	def make_backdated_entries(self):
+		"""Submit receipts in the middle of the history, these update qty of the future entries."""
+		self.backdated_args = []
+		self.backdated_vouchers = []
+		for _idx in range(self.backdated):
+			item = self.random.choice(self.items)
+			warehouse = self.random.choice(self.warehouses)
+			posting = self.get_random_datetime(self.days // 2 or 1)
+
+			qty = self.random.randint(1, 10 if item.has_serial_no else 100)
+			serial_nos = [self.get_next_serial_no(item) for _i in range(qty)] if item.has_serial_no else []
+
+			se = make_stock_entry(
+				item_code=item.name,
+				qty=float(qty),
+				rate=self.random.randint(90, 110),
+				to_warehouse=warehouse,
+				company=self.company,
+				batch_no=self.random.choice(self.batch_nos[item.name]) if item.has_batch_no else None,
+				serial_no="\n".join(serial_nos) or None,
+				use_serial_batch_fields=1 if serial_nos else 0,
+				posting_date=posting.date(),
+				posting_time=posting.time(),
+				do_not_save=True,
+			)
+			se.remarks = BENCH_PREFIX
+			se.insert(ignore_permissions=True)
+			se.submit()
+
+			self.backdated_vouchers.append(se.name)
+			self.backdated_args.append(
+				frappe._dict(
+					{
+						"item_code": item.name,
+						"warehouse": warehouse,
+						"posting_date": se.posting_date,
+						"posting_time": se.posting_time,
+					}
+				)
+			)
+
+		return self.backdated
+
+	def repost_backdated_entries(self):
+		repost_future_sle(args=self.backdated_args, allow_negative_stock=True)
+
+		# reposted above, reposts queued by the vouchers need not run again
+		frappe.db.set_value(
+			"Repost Item Valuation",
+			{"voucher_type": "Stock Entry", "voucher_no": ("in", self.backdated_vouchers), "docstatus": 1},
+			"status",
+			"Skipped",
+		)
+
+		return len(self.backdated_args)
+
+	def replay_all_item_warehouses(self):
+		for item in self.items:
+			for warehouse in self.warehouses:
+				update_entries_after(
+					{
+						"item_code": item.name,
+						"warehouse": warehouse,
+						"posting_date": self.start_date,
+						"posting_time": "00:00:00",
+					},
+					allow_negative_stock=True,
+				)
+
+		return frappe.db.count("Stock Ledger Entry", {"item_code": ("like", f"{BENCH_PREFIX}%")})
+
+
+def print_results(results):
+	print(f"{'phase':<24}{'seconds':>12}{'queries':>12}{'rows':>12}{'rows/s':>14}")
+	for row in results:
+		print(
+			f"{row.phase:<24}{row.seconds:>12.2f}{row.queries:>12}{row.rows:>12}{row.rows_per_second:>14.2f}"
+		)
+
+
+def cleanup():
+	"""Remove ledger, vouchers and masters created by the benchmark."""
+	vouchers = frappe.get_all("Stock Entry", filters={"remarks": BENCH_PREFIX}, pluck="name")
+	if vouchers:
+		for doctype in ("GL Entry", "Repost Item Valuation"):
+			frappe.db.delete(doctype, {"voucher_type": "Stock Entry", "voucher_no": ("in", vouchers)})
+
+		frappe.db.delete("Stock Entry Detail", {"parent": ("in", vouchers)})
+		frappe.db.delete("Stock Entry", {"name": ("in", vouchers)})
+
+	items = frappe.get_all("Item", filters={"name": ("like", f"{BENCH_PREFIX}%")}, pluck="name")
+	if items:
+		bundles = frappe.get_all(
+			"Serial and Batch Bundle", filters={"item_code": ("in", items)}, pluck="name"
+		)
+		if bundles:
+			frappe.db.delete("Serial and Batch Entry", {"parent": ("in", bundles)})
+			frappe.db.delete("Serial and Batch Bundle", {"name": ("in", bundles)})
+
+		for doctype in ("Stock Ledger Entry", "Bin", "Batch", "Serial No"):
+			field = "item" if doctype == "Batch" else "item_code"
+			frappe.db.delete(doctype, {field: ("in", items)})
+
+		frappe.db.delete("Item", {"name": ("in", items)})
+
+	frappe.db.delete("Warehouse", {"name": ("like", f"{BENCH_PREFIX}%")})
+	frappe.db.commit()
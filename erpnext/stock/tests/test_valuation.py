@@ -8,7 +8,18 @@ from hypothesis import strategies as st
 
 from erpnext.stock.doctype.item.test_item import make_item
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
-from erpnext.stock.valuation import FIFOValuation, LIFOValuation, round_off_if_near_zero
+from erpnext.stock.valuation import (
+	PACKED_QUEUE_MIN_BINS,
+	PACKED_QUEUE_PREFIX,
+	FIFOValuation,
+	LIFOValuation,
+	get_stock_queue_for_display,
+	parse_stock_queue,
+	replay_moving_average,
+	replay_stock_queue,
+	round_off_if_near_zero,
+	serialize_stock_queue,
+)
 
 qty_gen = st.floats(min_value=-1e6, max_value=1e6)
 value_gen = st.floats(min_value=1, max_value=1e6)
@@ -377,3 +388,87 @@ class TestLIFOValuationSLE(FrappeTestCase):
 
 		out5 = self._make_stock_entry(-5)
 		self.assertStockQueue(out5, [])
+
+
+class TestStockQueueSerialization(unittest.TestCase):
+	def test_short_queue_is_json(self):
+		queue = [[10.0, 100.0], [5.0, 110.5]]
+		serialized = serialize_stock_queue(queue)
+		self.assertEqual(json.loads(serialized), queue)
+		self.assertEqual(parse_stock_queue(serialized), queue)
+
+	def test_empty_queue(self):
+		self.assertEqual(serialize_stock_queue([]), "[]")
+		self.assertEqual(parse_stock_queue(None), [])
+		self.assertEqual(parse_stock_queue(""), [])
+
+	def test_long_queue_is_packed(self):
+		queue = [[float(i + 1), 100 / (i + 3)] for i in range(PACKED_QUEUE_MIN_BINS * 10)]
+		serialized = serialize_stock_queue(queue)
+
+		self.assertTrue(serialized.startswith(PACKED_QUEUE_PREFIX))
+		self.assertLess(len(serialized), len(json.dumps(queue)))
+		self.assertEqual(parse_stock_queue(serialized), queue)
+		self.assertEqual(json.loads(get_stock_queue_for_display(serialized)), queue)
+		self.assertEqual(get_stock_queue_for_display("[[1, 2]]"), "[[1, 2]]")
+
+	@given(stock_queue_generator)
+	def test_serialization_roundtrip_hypothesis(self, stock_queue):
+		queue = [list(stock_bin) for stock_bin in stock_queue]
+		self.assertEqual(parse_stock_queue(serialize_stock_queue(queue)), queue)
+
+
+class TestBlockReplay(unittest.TestCase):
+	movements = ((10, 100, 0), (5, 120, 0), (-8, 0, 0), (20, 90, 0), (-27, 0, 0), (4, 80, 0), (-6, 0, 0))
+
+	def columns(self, movements):
+		return [list(column) for column in zip(*movements, strict=True)]
+
+	def test_moving_average_block(self):
+		replayed = replay_moving_average(*self.columns(self.movements), 0.0, 0.0, precision=2)
+
+		# stops before the entry that takes the balance negative
+		self.assertEqual(len(replayed), 6)
+
+		qty, rate = 0.0, 0.0
+		for (actual, incoming, _outgoing), row in zip(self.movements, replayed, strict=False):
+			if actual > 0:
+				rate = incoming if qty <= 0 else (qty * rate + actual * incoming) / (qty + actual)
+			qty += actual
+			self.assertEqual(row[0], qty)
+			self.assertAlmostEqual(row[1], rate)
+			self.assertEqual(row[2], round(qty * rate, 2) if qty else 0.0)
+
+	def test_stock_queue_block(self):
+		for valuation in (FIFOValuation, LIFOValuation):
+			stock_queue = valuation([])
+			replayed = replay_stock_queue(
+				stock_queue, *self.columns(self.movements), 0.0, 0.0, 0.0, precision=2
+			)
+			self.assertEqual(len(replayed), 6)
+
+			# same steps as `update_entries_after.update_queue_values`
+			expected_queue, rate = valuation([]), 0.0
+			for (actual, incoming, outgoing), row in zip(self.movements, replayed, strict=False):
+				if actual > 0:
+					expected_queue.add_stock(qty=actual, rate=incoming)
+				else:
+					expected_queue.remove_stock(qty=-actual, outgoing_rate=outgoing)
+
+				if not expected_queue.state:
+					expected_queue.state.append([0, incoming or outgoing or rate])
+
+				qty, value = expected_queue.get_total_stock_and_value()
+				if qty:
+					rate = value / qty
+
+				self.assertEqual(row[0], qty)
+				self.assertAlmostEqual(row[1], rate)
+				self.assertAlmostEqual(row[2], value)
+				self.assertEqual(parse_stock_queue(row[3]), expected_queue.state)
+
+			self.assertEqual(stock_queue.state, [[4, 80]])
+
+	def test_stock_queue_with_negative_bin(self):
+		stock_queue = FIFOValuation([[-5, 100]])
+		self.assertEqual(replay_stock_queue(stock_queue, [10], [100], [0], -5, 100, -500, precision=2), [])
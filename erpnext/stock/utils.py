@@ -15,7 +15,7 @@ from erpnext.stock.doctype.serial_and_batch_bundle.serial_and_batch_bundle impor
 )
 from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
 from erpnext.stock.serial_batch_bundle import BatchNoValuation, SerialNoValuation
-from erpnext.stock.valuation import FIFOValuation, LIFOValuation
+from erpnext.stock.valuation import FIFOValuation, LIFOValuation, parse_stock_queue
 
 BarcodeScanResult = dict[str, str | None]
 
@@ -60,9 +60,26 @@ def get_stock_value_from_bin(warehouse=None, item_code=None):
 def get_stock_value_on(
 	warehouses: list | str | None = None, posting_date: str | None = None, item_code: str | None = None
 ) -> float:
+	from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+		get_stock_value_from_snapshots,
+		is_stock_balance_snapshot_enabled,
+	)
+
 	if not posting_date:
 		posting_date = nowdate()
 
+	if warehouses:
+		if isinstance(warehouses, str):
+			warehouses = [warehouses]
+
+		warehouses = set(warehouses)
+		for wh in list(warehouses):
+			if frappe.db.get_value("Warehouse", wh, "is_group"):
+				warehouses.update(get_child_warehouses(wh))
+
+	if is_stock_balance_snapshot_enabled():
+		return get_stock_value_from_snapshots(posting_date, warehouses=warehouses, item_code=item_code)
+
 	sle = frappe.qb.DocType("Stock Ledger Entry")
 	query = (
 		frappe.qb.from_(sle)
@@ -73,14 +90,6 @@ def get_stock_value_on(
 	)
 
 	if warehouses:
-		if isinstance(warehouses, str):
-			warehouses = [warehouses]
-
-		warehouses = set(warehouses)
-		for wh in list(warehouses):
-			if frappe.db.get_value("Warehouse", wh, "is_group"):
-				warehouses.update(get_child_warehouses(wh))
-
 		query = query.where(sle.warehouse.isin(warehouses))
 
 	if item_code:
@@ -296,7 +305,7 @@ def get_incoming_rate(args, raise_error_if_no_rate=True):
 		previous_sle = get_previous_sle(args)
 		if valuation_method in ("FIFO", "LIFO"):
 			if previous_sle:
-				previous_stock_queue = json.loads(previous_sle.get("stock_queue", "[]") or "[]")
+				previous_stock_queue = parse_stock_queue(previous_sle.get("stock_queue"))
 				in_rate = (
 					_get_fifo_lifo_rate(previous_stock_queue, args.get("qty") or 0, valuation_method)
 					if previous_stock_queue
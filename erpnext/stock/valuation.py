@@ -1,3 +1,7 @@
+import base64
+import json
+import struct
+import zlib
 from abc import ABC, abstractmethod, abstractproperty
 from collections.abc import Callable
 from typing import NewType
@@ -10,6 +14,10 @@ StockBin = NewType("StockBin", list[float])  # [[qty, rate], ...]
 QTY = 0
 RATE = 1
 
+# Queues longer than this are stored as compressed packed doubles instead of JSON
+PACKED_QUEUE_MIN_BINS = 32
+PACKED_QUEUE_PREFIX = "z:"
+
 
 class BinWiseValuation(ABC):
 	@abstractmethod
@@ -245,6 +253,47 @@ class LIFOValuation(BinWiseValuation):
 		return consumed_bins
 
 
+def serialize_stock_queue(queue: list[StockBin] | None) -> str:
+	"""Serialize FIFO/LIFO queue for `stock_queue` column of Stock Ledger Entry.
+
+	Short queues are stored as JSON as before. Long queues are stored as zlib
+	compressed little-endian doubles `qty, rate, qty, rate, ...` encoded in base64,
+	prefixed with `PACKED_QUEUE_PREFIX`."""
+	if not queue:
+		return "[]"
+
+	if len(queue) < PACKED_QUEUE_MIN_BINS:
+		return json.dumps(queue)
+
+	values = [flt(value) for stock_bin in queue for value in stock_bin]
+	packed = struct.pack(f"<{len(values)}d", *values)
+	return PACKED_QUEUE_PREFIX + base64.b64encode(zlib.compress(packed)).decode("ascii")
+
+
+def parse_stock_queue(value: str | list | None) -> list[StockBin]:
+	"""Parse `stock_queue` stored either as JSON or in packed format."""
+	if not value:
+		return []
+
+	if isinstance(value, list):
+		return value
+
+	if not value.startswith(PACKED_QUEUE_PREFIX):
+		return json.loads(value)
+
+	packed = zlib.decompress(base64.b64decode(value[len(PACKED_QUEUE_PREFIX) :]))
+	values = struct.unpack(f"<{len(packed) // 8}d", packed)
+	return [[values[i], values[i + 1]] for i in range(0, len(values), 2)]
+
+
+def get_stock_queue_for_display(value: str | list | None) -> str:
+	"""`stock_queue` as JSON, packed queues are not readable as they are stored."""
+	if isinstance(value, str) and not value.startswith(PACKED_QUEUE_PREFIX):
+		return value
+
+	return json.dumps(parse_stock_queue(value))
+
+
 def round_off_if_near_zero(number: float, precision: int = 7) -> float:
 	"""Rounds off the number to zero only if number is close to zero for decimal
 	specified in precision. Precision defaults to 7.
@@ -253,3 +302,90 @@ def round_off_if_near_zero(number: float, precision: int = 7) -> float:
 		return 0.0
 
 	return flt(number)
+
+
+def replay_moving_average(
+	actual_qty: list[float],
+	incoming_rate: list[float],
+	outgoing_rate: list[float],
+	qty_after_transaction: float,
+	valuation_rate: float,
+	precision: int,
+	min_qty: float = 0.0,
+) -> list[tuple[float, float, float, str]]:
+	"""Replay a block of moving average entries given as columns in a single pass.
+
+	Stops before the first entry that takes the balance below `min_qty`, negative
+	balances are left to the row by row replay. Returns `(qty_after_transaction,
+	valuation_rate, stock_value, stock_queue)` for each entry replayed."""
+	replayed = []
+	qty, rate = qty_after_transaction, valuation_rate
+
+	for actual, incoming, outgoing in zip(actual_qty, incoming_rate, outgoing_rate, strict=True):
+		new_qty = qty + actual
+		if new_qty < min_qty or new_qty < 0:
+			break
+
+		if actual > 0:
+			rate = incoming if qty <= 0 else ((qty * rate) + (actual * incoming)) / new_qty
+		elif outgoing:
+			rate = ((qty * rate) + (actual * outgoing)) / new_qty if new_qty else outgoing
+
+		qty = new_qty
+		replayed.append((qty, rate, flt(qty * rate, precision) if qty else 0.0, "[]"))
+
+	return replayed
+
+
+def replay_stock_queue(
+	stock_queue: BinWiseValuation,
+	actual_qty: list[float],
+	incoming_rate: list[float],
+	outgoing_rate: list[float],
+	qty_after_transaction: float,
+	valuation_rate: float,
+	stock_value: float,
+	precision: int,
+	min_qty: float = 0.0,
+) -> list[tuple[float, float, float, str]]:
+	"""Replay a block of FIFO/LIFO entries given as columns in a single pass.
+
+	`stock_queue` is updated in place. Stock value is carried forward by the value of
+	the consumed bins instead of totalling the queue for every entry. Stops before the
+	first entry that would consume more than the queue holds or takes the balance below
+	`min_qty`, those are left to the row by row replay. Returns `(qty_after_transaction,
+	valuation_rate, stock_value, serialized stock_queue)` for each entry replayed."""
+	replayed = []
+	if any(stock_bin[QTY] < 0 for stock_bin in stock_queue.state):
+		return replayed
+
+	queue_qty = sum(stock_bin[QTY] for stock_bin in stock_queue.state)
+	qty, rate, value = qty_after_transaction, valuation_rate, stock_value
+
+	for actual, incoming, outgoing in zip(actual_qty, incoming_rate, outgoing_rate, strict=True):
+		new_qty = round_off_if_near_zero(qty + actual)
+		if new_qty < min_qty or (actual < 0 and -actual > queue_qty):
+			break
+
+		if actual > 0:
+			stock_queue.add_stock(qty=actual, rate=incoming)
+			queue_qty += actual
+			value_difference = actual * incoming
+		else:
+			consumed_bins = stock_queue.remove_stock(qty=-actual, outgoing_rate=outgoing)
+			queue_qty -= sum(stock_bin[QTY] for stock_bin in consumed_bins)
+			value_difference = -sum(stock_bin[QTY] * stock_bin[RATE] for stock_bin in consumed_bins)
+
+		qty = new_qty
+		value = round_off_if_near_zero(value + value_difference)
+
+		if not stock_queue.state:
+			stock_queue.state.append([0, incoming or outgoing or rate])
+
+		if qty:
+			rate = value / qty
+
+		value = flt(value, precision) if qty else 0.0
+		replayed.append((qty, rate, value, serialize_stock_queue(stock_queue.state)))
+
+	return replayed